@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+from contextlib import AsyncExitStack
+from io import BytesIO
+from typing import AsyncIterator, Optional
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# S3 멀티파트 최소 파트 크기 (마지막 파트 제외)
+_MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class AsyncS3Manager:
+    """
+    asyncio 용 S3 클라이언트 (aiobotocore). FastAPI 요청 경로에서 await 로 사용
+    - 전송 중에 스레드 풀 슬롯을 차지하지 않음 (동기 S3Manager 는 요청마다 스레드 1개를 전송 내내 점유)
+    - 클라이언트는 처음 사용할 때 만들어 연결 풀을 공유하고, 앱 종료 시 close()
+    """
+
+    def __init__(self):
+        self.bucket = settings.BUCKET_NAME
+        self.part_size = max(settings.S3_MULTIPART_CHUNKSIZE, _MIN_PART_SIZE)
+        self.concurrency = max(settings.S3_TRANSFER_CONCURRENCY, 1)
+        self._client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_client(self):
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    stack = AsyncExitStack()
+                    self._client = await stack.enter_async_context(get_session().create_client(
+                        's3',
+                        aws_access_key_id=settings.AWS_ACCESS_KEY,
+                        aws_secret_access_key=settings.AWS_SECRET_KEY,
+                        region_name=settings.REGION,
+                        config=AioConfig(
+                            max_pool_connections=settings.s3_pool_connections,
+                            retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "standard"},
+                        ),
+                    ))
+                    self._exit_stack = stack
+        return self._client
+
+    async def close(self):
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+
+    async def upload_fileobj(self, file_obj, folder: str, filename: str) -> str:
+        """
+        비동기 파일 객체(UploadFile 등, await read(n) 지원)를 파트 단위로 읽어 S3 에 업로드
+        - part_size 보다 작으면 put_object 한 번
+        - 크면 멀티파트: 다음 파트를 읽는 동안 최대 concurrency 개 파트를 동시에 전송 (메모리 ≈ part_size × concurrency)
+        """
+        s3_key = f"{folder}/{filename}"
+        client = await self._get_client()
+        if hasattr(file_obj, 'seek'):
+            await _maybe_await(file_obj.seek(0))
+
+        first = await file_obj.read(self.part_size)
+        try:
+            if len(first) < self.part_size:
+                await client.put_object(Bucket=self.bucket, Key=s3_key, Body=first)
+            else:
+                await self._multipart_upload(client, s3_key, first, file_obj)
+            logger.info(f"S3 Async Upload Success: {s3_key}")
+            return s3_key
+        except Exception as e:
+            logger.error(f"S3 Async Upload Failed: {e}")
+            raise e
+
+    async def _multipart_upload(self, client, s3_key: str, first: bytes, file_obj):
+        upload_id = (await client.create_multipart_upload(Bucket=self.bucket, Key=s3_key))["UploadId"]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = []
+
+        async def send(number: int, data: bytes) -> dict:
+            try:
+                response = await client.upload_part(
+                    Bucket=self.bucket, Key=s3_key, UploadId=upload_id, PartNumber=number, Body=data
+                )
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                semaphore.release()
+
+        try:
+            data, number = first, 1
+            while data:
+                # 동시 전송 중인 파트가 concurrency 개면 하나가 끝날 때까지 다음 파트를 읽지 않음
+                await semaphore.acquire()
+                failed = next((t for t in tasks if t.done() and t.exception() is not None), None)
+                if failed is not None:
+                    raise failed.exception()
+                tasks.append(asyncio.create_task(send(number, data)))
+                data = await file_obj.read(self.part_size)
+                number += 1
+            parts = await asyncio.gather(*tasks)
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=s3_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # 요청 경로의 업로드는 이어 올릴 주체가 없으므로 중단해 파트를 정리
+            try:
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=s3_key, UploadId=upload_id)
+            except Exception as e:
+                logger.warning(f"S3 멀티파트 업로드 중단 실패 ({s3_key}): {e}")
+            raise
+
+    async def read_file(self, s3_key: str) -> BytesIO:
+        """S3에서 파일을 읽어 BytesIO 객체로 반환"""
+        client = await self._get_client()
+        try:
+            obj = await client.get_object(Bucket=self.bucket, Key=s3_key)
+            async with obj['Body'] as body:
+                return BytesIO(await body.read())
+        except Exception as e:
+            logger.error(f"S3 Async Read Failed: {e}")
+            raise e
+
+    async def download_file(self, s3_key: str, local_path: str, chunk_size: int = 1 << 20):
+        """S3 객체를 로컬 경로로 스트리밍 다운로드 (디스크 쓰기는 스레드로 넘겨 이벤트 루프를 막지 않음)"""
+        client = await self._get_client()
+        tmp_path = f"{local_path}.part"
+        try:
+            obj = await client.get_object(Bucket=self.bucket, Key=s3_key)
+            f = await asyncio.to_thread(open, tmp_path, "wb")
+            try:
+                async with obj['Body'] as body:
+                    while chunk := await body.read(chunk_size):
+                        await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, tmp_path, local_path)
+            logger.info(f"S3 Async Download Success: {s3_key} -> {local_path}")
+        except Exception as e:
+            logger.error(f"S3 Async Download Failed for {s3_key}: {e}")
+            raise e
+
+    async def delete_file(self, s3_key: str):
+        """S3에서 지정된 키의 객체를 삭제"""
+        client = await self._get_client()
+        try:
+            await client.delete_object(Bucket=self.bucket, Key=s3_key)
+            logger.info(f"S3 Async Delete Success: {s3_key}")
+        except Exception as e:
+            logger.error(f"S3 Async Delete Failed for {s3_key}: {e}")
+            raise e
+
+    async def list_keys(self, prefix: str) -> AsyncIterator[str]:
+        """prefix 아래 객체 키를 페이지 단위로 받아 하나씩 반환"""
+        client = await self._get_client()
+        paginator = client.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
+
+async def _maybe_await(value):
+    if asyncio.iscoroutine(value):
+        return await value
+    return value
+
+
+async_s3_manager = AsyncS3Manager()
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Dict
 import os
 
 class Settings(BaseSettings):
@@ -33,6 +34,88 @@ class Settings(BaseSettings):
     S3_TRAINING_DATA_FOLDER: str = os.getenv('TRAINING_DATA_FOLDER')
     # S3_IMAGE_FOLDER = "images"
 
+    # S3 전송 (연결 풀 / 멀티파트 / 일괄 전송)
+    S3_MAX_POOL_CONNECTIONS: int = 0  # boto3 클라이언트 HTTP 연결 풀 크기 (0 이면 S3_BULK_WORKERS × S3_TRANSFER_CONCURRENCY)
+    S3_MAX_ATTEMPTS: int = 5  # 요청 단위 재시도 (botocore standard 모드)
+    S3_MULTIPART_THRESHOLD: int = 16 * 1024 * 1024  # 이 크기 이상은 멀티파트 (이어 올리기 가능)
+    S3_MULTIPART_CHUNKSIZE: int = 16 * 1024 * 1024  # 파트 크기 (이어 올리려면 시도 간 같아야 함)
+    S3_TRANSFER_CONCURRENCY: int = 8  # 파일 하나의 파트 동시 전송 수
+    S3_BULK_WORKERS: int = 32  # upload_many / download_many 동시 파일 수
+    S3_FILE_RETRIES: int = 3  # 일괄 전송에서 파일 단위 재시도 횟수
+    S3_STREAM_BUFFER_BYTES: int = 256 * 1024 * 1024  # 압축 항목 스트리밍 업로드 시 메모리에 대기할 수 있는 최대 바이트
+    S3_STREAM_SPOOL_BYTES: int = 4 * 1024 * 1024 * 1024  # 큰 압축 항목을 임시 파일로 받아 대기할 수 있는 최대 바이트 (디스크)
+    S3_RANGE_BLOCK_SIZE: int = 8 * 1024 * 1024  # S3 임의 접근 읽기(zip 목차 등)의 Range 요청 단위
+
+    # 학습 데이터 샤드 (데이터셋 준비 시 라벨 + 미리 리사이즈한 이미지를 TFRecord 로 묶어 저장)
+    DATASET_SHARDS_ENABLED: bool = True
+    DATASET_SHARD_BYTES: int = 128 * 1024 * 1024  # 샤드 하나의 최대 크기
+    DATASET_SHARD_MAX_OPEN: int = 4  # 동시에 열어 두는 샤드 수 (그룹이 섞인 압축 파일에서 로컬 디스크 사용 제한)
+
+    # 학습 데이터 표본/분할 (데이터셋 manifest 기준)
+    TRAINING_SAMPLE_SIZE: int = 0  # 라벨 비율을 유지한 표본 수 (0: 전체)
+    TRAINING_VAL_FRACTION: float = 0.2  # 라벨별 검증용 비율 (0: 검증 없음)
+
+    # 이미지 추론 마이크로 배칭
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+    # 추론 실행 방식: thread (API 프로세스 내 세션) / process (워커 프로세스 풀)
+    INFERENCE_BACKEND: str = "thread"
+    INFERENCE_WORKERS: int = 0  # 0 이면 CPU 코어 수
+    INFERENCE_WORKER_THREADS: int = 1  # 워커당 ONNX intra-op 스레드 수
+    MODEL_REGISTRY_MEMORY_MB: int = 2048  # 동시에 로드해 둘 모델 파일 크기 합계 상한
+    MODEL_CACHE_KEEP_VERSIONS: int = 3  # 카테고리별로 로컬에 남겨 둘 모델 버전 수
+    MODEL_LOAD_RETRY_SECONDS: float = 30.0  # 모델 로드 실패 후 재시도까지 대기
+    MODEL_WARMING_RETRY_AFTER: int = 5  # 로드 중 응답(503)의 Retry-After 초
+    IMAGE_BATCH_MAX_FILES: int = 1000  # /upload/images 한 요청당 최대 이미지 수 (압축 파일 안의 이미지 포함)
+    IMAGE_MAX_FILE_BYTES: int = 20 * 1024 * 1024  # /upload/images 이미지 한 장(압축 파일 안의 항목 포함) 최대 크기
+    IMAGE_BATCH_MAX_BYTES: int = 512 * 1024 * 1024  # /upload/images 한 요청의 이미지 크기 합계 상한 (모두 메모리에 올림)
+
+    # ONNX Runtime 세션 옵션
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 이면 ONNX Runtime 기본값 (thread 모드)
+    ONNX_INTER_OP_THREADS: int = 0
+    ONNX_EXECUTION_MODE: str = "sequential"  # sequential / parallel
+    ONNX_GRAPH_OPTIMIZATION: str = "all"  # disabled / basic / extended / all
+    ONNX_OPTIMIZED_CACHE_DIR: str = "app/data/optimized"  # 빈 값이면 최적화 그래프 캐시 사용 안 함
+    ONNX_WARMUP_RUNS: int = 1
+    ONNX_PREFER_QUANTIZED: bool = False  # INT8 변형이 게시되어 있으면 우선 사용
+
+    # 학습 후 INT8 양자화
+    QUANTIZATION_ENABLED: bool = True
+    QUANTIZATION_MODE: str = "static"  # static (보정 이미지 사용) / dynamic
+    QUANTIZATION_CALIBRATION_SIZE: int = 64
+    QUANTIZATION_MAX_ACCURACY_DROP: float = 0.02  # 이보다 정확도가 더 떨어지면 게시하지 않음
+    QUANTIZATION_MIN_EVAL_SAMPLES: int = 20  # 정확도를 비교한 이미지가 이보다 적으면 게시하지 않음
+
+    # CSV 통계 엔진: stream (S3 본문을 청크 단위로 바로 파싱) / dask (로컬 파일을 파티션 병렬 처리)
+    CSV_ENGINE: str = "stream"
+    CSV_STREAM_CHUNK_ROWS: int = 200_000
+    # 고유값 지표별 계산 방식 (exact / hll). 예: {"num_invoices": "hll"}. 지정하지 않은 지표는 exact
+    CSV_DISTINCT_MODES: Dict[str, str] = {}
+    CSV_HLL_PRECISION: int = 14  # HyperLogLog 레지스터 수 2^p (오차 약 1.04/sqrt(2^p))
+    # 헤더 지문별 스키마 계획 (dtype/category/날짜 컬럼) Redis 캐시
+    CSV_SCHEMA_PLAN_ENABLED: bool = True
+    CSV_SCHEMA_PLAN_TTL: int = 30 * 24 * 3600  # 초. 새 파일이 올 때마다 갱신되며 연장됨
+    # 여러 파일 CSV 업로드 (/upload/csv/batch): 파일을 바이트 구간으로 나눠 Celery 워커들에 분산
+    CSV_BATCH_CHUNK_BYTES: int = 64 * 1024 * 1024  # 구간 크기
+    CSV_BATCH_MAX_FILES: int = 100  # 한 요청의 최대 CSV 파일 수 (압축 파일 안의 CSV 포함)
+    # CSV 통계 (Dask 파티션 처리)
+    CSV_DASK_BLOCKSIZE: str = "64MB"  # 파티션 크기
+    CSV_DASK_SCHEDULER: str = "threads"  # threads / processes / synchronous (프로파일링 중에는 processes 대신 threads)
+    CSV_DASK_WORKERS: int = 0  # 0 이면 CPU 코어 수
+
+    # 업로드 데이터 집계 질의 (/query)
+    QUERY_MAX_ROWS: int = 10_000  # 결과 최대 행 수
+    QUERY_CACHE_TTL: int = 3600  # (업로드, 질의) 결과 Redis TTL (초)
+
+    # 이미지 예측 캐시 (내용 해시 + 모델 버전)
+    PREDICTION_CACHE_SIZE: int = 2048  # 프로세스 내 LRU 항목 수
+    PREDICTION_CACHE_TTL: int = 3600  # Redis TTL (초)
+
+    @property
+    def s3_pool_connections(self) -> int:
+        """S3 연결 풀 크기: 일괄 전송 파일 수 × 파일당 동시 파트 수 (멀티파트가 동시에 진행돼도 연결 대기 없음)"""
+        return self.S3_MAX_POOL_CONNECTIONS or self.S3_BULK_WORKERS * self.S3_TRANSFER_CONCURRENCY
+
     class Config:
         env_file = ".env"
         extra = "ignore"
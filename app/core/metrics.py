@@ -1,6 +1,411 @@
+import base64
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_HLL_PRECISION = 14  # 레지스터 2^14 개 (16KB), 표준 오차 약 0.8%
+
+
+def to_builtin(value):
+    """numpy 스칼라 → JSON 직렬화 가능한 파이썬 값"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+# ----------------------------
+# 누적기
+# ----------------------------
+class Accumulator(ABC):
+    """
+    청크 단위 지표 계산
+    - update(청크) 로 누적, merge(다른 누적기) 로 합치고, finalize() 로 최종 값
+    - to_state() 는 JSON 직렬화 가능한 부분 결과 (청크/파일/워커 간 전달용)
+    - 네 메서드를 모두 구현하지 않은 하위 클래스는 생성 시 TypeError
+    """
+    kind = ""
+
+    @abstractmethod
+    def update(self, df: pd.DataFrame):
+        ...
+
+    @abstractmethod
+    def merge(self, other: "Accumulator"):
+        ...
+
+    @abstractmethod
+    def finalize(self):
+        ...
+
+    @abstractmethod
+    def to_state(self) -> dict:
+        ...
+
+
+class SumAccumulator(Accumulator):
+    kind = "sum"
+
+    def __init__(self, fn: Optional[Callable] = None, total=0):
+        self.fn = fn
+        self.total = total
+
+    def update(self, df):
+        self.total += self.fn(df)
+
+    def merge(self, other):
+        self.total += other.total
+
+    def finalize(self):
+        return to_builtin(self.total)
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "total": to_builtin(self.total)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SumAccumulator":
+        return cls(total=state["total"])
+
+
+class ExactDistinct(Accumulator):
+    """정확한 고유값 개수 (고유값 수만큼 메모리 사용)"""
+    kind = "exact"
+
+    def __init__(self, column: str = "", values=None):
+        self.column = column
+        self.values = set(values or ())
+
+    def update(self, df):
+        # nunique 와 같이 결측값은 제외
+        self.values.update(df[self.column].dropna().unique().tolist())
+
+    def merge(self, other):
+        self.values |= other.values
+
+    def finalize(self):
+        return len(self.values)
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "values": list(self.values)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ExactDistinct":
+        return cls(values=state["values"])
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """uint64 배열의 비트 길이 (32비트씩 나눠 float64 로 정확히 계산)"""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, np.frexp(hi)[1] + 32, np.frexp(lo)[1])
+
+
+class HyperLogLog(Accumulator):
+    """
+    근사 고유값 개수 (HyperLogLog)
+    - 메모리는 고유값 수와 무관하게 2^precision 바이트
+    - 병합은 레지스터별 최대값이라 청크/파일 순서와 무관
+    - 해시는 pandas hash_pandas_object (프로세스/실행 간 동일) → dtype 이 같아야 같은 값으로 취급
+    """
+    kind = "hll"
+
+    def __init__(self, column: str = "", precision: int = DEFAULT_HLL_PRECISION, registers: np.ndarray = None):
+        self.column = column
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, df):
+        self.add_values(df[self.column].dropna())
+
+    def add_values(self, values: pd.Series):
+        """결측값을 뺀 값 Series 를 레지스터에 반영"""
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # 남은 (64 - p) 비트에서 첫 1 비트의 위치
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = ((64 - self.precision) - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog precision 이 다른 누적기는 병합할 수 없음")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def finalize(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # 작은 범위는 선형 카운팅이 더 정확
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_state(self) -> dict:
+        return {
+            "kind": self.kind,
+            "precision": self.precision,
+            "registers": base64.b64encode(self.registers.tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "HyperLogLog":
+        registers = np.frombuffer(base64.b64decode(state["registers"]), dtype=np.uint8).copy()
+        return cls(precision=state["precision"], registers=registers)
+
+    @classmethod
+    def from_exact(cls, exact: ExactDistinct, precision: int) -> "HyperLogLog":
+        """
+        정확한 고유값 집합 → 같은 값을 직접 누적한 것과 같은 레지스터
+        (고유값 지표 컬럼은 CSV_DTYPES 로 dtype 이 고정돼 JSON 에서 복원한 값도 같은 해시)
+        """
+        hll = cls(exact.column, precision)
+        hll.add_values(pd.Series(list(exact.values)))
+        return hll
+
+
+# 히스토그램 구간 경계 (파일/청크 간 병합을 위해 고정, 부호 있는 로그 스케일)
+HISTOGRAM_EDGES = (-10_000, -1_000, -100, -10, -1, 0, 1, 10, 100, 1_000, 10_000)
+
+
+def _min(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    try:
+        return min(a, b)
+    except TypeError:
+        # 파일마다 컬럼 종류가 다른 경우 (숫자 vs 문자열 등) 기존 값 유지
+        return a
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    try:
+        return max(a, b)
+    except TypeError:
+        return a
+
+
+class ProfileAccumulator(Accumulator):
+    """
+    데이터 품질 프로파일 (통계와 같은 패스에서 청크 단위로 누적)
+    - 컬럼별 결측 수, 최소/최대(숫자·날짜), 숫자 컬럼 히스토그램(HISTOGRAM_EDGES)
+    - 음수 수량 행 수, 반품(취소 송장 'C...') 행 수, 파서가 건너뛴 줄 수
+    """
+    kind = "profile"
+
+    def __init__(self, rows: int = 0, columns: dict = None, negative_quantity: int = 0, returns: int = 0,
+                 skipped_lines: int = 0):
+        self.rows = rows
+        self.columns = columns or {}
+        self.negative_quantity = negative_quantity
+        self.returns = returns
+        self.skipped_lines = skipped_lines
+
+    def _update_column(self, name: str, series: pd.Series):
+        entry = self.columns.setdefault(name, {"nulls": 0, "min": None, "max": None, "histogram": None})
+        entry["nulls"] += int(series.isna().sum())
+
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            return
+        if pd.api.types.is_numeric_dtype(dtype):
+            values = series.dropna()
+            if values.empty:
+                return
+            entry["min"] = _min(entry["min"], to_builtin(values.min()))
+            entry["max"] = _max(entry["max"], to_builtin(values.max()))
+            counts = np.bincount(
+                np.searchsorted(HISTOGRAM_EDGES, values.to_numpy(), side="right"), minlength=len(HISTOGRAM_EDGES) + 1
+            )
+            histogram = entry["histogram"] or [0] * len(counts)
+            entry["histogram"] = [int(h + c) for h, c in zip(histogram, counts)]
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            values = series.dropna()
+            if not values.empty:
+                # ISO 문자열은 사전식 비교 = 시간 순서 (JSON 상태로 그대로 저장)
+                entry["min"] = _min(entry["min"], values.min().isoformat())
+                entry["max"] = _max(entry["max"], values.max().isoformat())
+
+    def update(self, df):
+        self.rows += len(df)
+        for col in df.columns:
+            self._update_column(str(col), df[col])
+        if "Quantity" in df.columns and pd.api.types.is_numeric_dtype(df["Quantity"].dtype):
+            self.negative_quantity += int((df["Quantity"] < 0).sum())
+        if "InvoiceNo" in df.columns:
+            self.returns += int(df["InvoiceNo"].astype(str).str.startswith("C").sum())
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.negative_quantity += other.negative_quantity
+        self.returns += other.returns
+        self.skipped_lines += other.skipped_lines
+        for name, theirs in other.columns.items():
+            mine = self.columns.get(name)
+            if mine is None:
+                self.columns[name] = dict(theirs)
+                continue
+            mine["nulls"] += theirs["nulls"]
+            mine["min"] = _min(mine["min"], theirs["min"])
+            mine["max"] = _max(mine["max"], theirs["max"])
+            if theirs["histogram"] is not None:
+                histogram = mine["histogram"] or [0] * len(theirs["histogram"])
+                mine["histogram"] = [h + c for h, c in zip(histogram, theirs["histogram"])]
+
+    def finalize(self):
+        return {
+            "rows": self.rows,
+            "skipped_lines": self.skipped_lines,
+            "negative_quantity": self.negative_quantity,
+            "returns": self.returns,
+            "histogram_edges": list(HISTOGRAM_EDGES),
+            "columns": {
+                name: {
+                    **entry,
+                    "null_ratio": round(entry["nulls"] / self.rows, 6) if self.rows else 0.0,
+                }
+                for name, entry in self.columns.items()
+            },
+        }
+
+    def to_state(self) -> dict:
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "columns": self.columns,
+            "negative_quantity": self.negative_quantity,
+            "returns": self.returns,
+            "skipped_lines": self.skipped_lines,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ProfileAccumulator":
+        return cls(
+            rows=state["rows"],
+            columns={name: dict(entry) for name, entry in state["columns"].items()},
+            negative_quantity=state["negative_quantity"],
+            returns=state["returns"],
+            skipped_lines=state["skipped_lines"],
+        )
+
+
+_ACCUMULATOR_TYPES = {cls.kind: cls for cls in (SumAccumulator, ExactDistinct, HyperLogLog, ProfileAccumulator)}
+
+
+def accumulator_from_state(state: dict) -> Accumulator:
+    """to_state() 결과로 누적기 복원 (병합/최종값 계산용)"""
+    return _ACCUMULATOR_TYPES[state["kind"]].from_state(state)
+
+
+# ----------------------------
+# 지표 정의
+# ----------------------------
+@dataclass(frozen=True)
+class SumMetric:
+    fn: Callable
+    columns: Tuple[str, ...] = ()
+
+    def accumulator(self, distinct_mode: str = "exact", precision: int = DEFAULT_HLL_PRECISION) -> Accumulator:
+        return SumAccumulator(self.fn)
+
+
+@dataclass(frozen=True)
+class DistinctMetric:
+    column: str
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (self.column,)
+
+    def accumulator(self, distinct_mode: str = "exact", precision: int = DEFAULT_HLL_PRECISION) -> Accumulator:
+        if distinct_mode == "hll":
+            return HyperLogLog(self.column, precision)
+        return ExactDistinct(self.column)
+
+
+# 프로세스 스케줄러에서도 pickle 되도록 모듈 수준 함수로 정의
+def _total_quantity(df):
+    return df["Quantity"].sum()
+
+
+def _total_revenue(df):
+    return (df["Quantity"] * df["UnitPrice"]).sum()
+
+
 METRICS = {
-    "num_customers": lambda df: df["CustomerID"].nunique(),
-    "total_quantity": lambda df: df["Quantity"].sum(),
-    "total_revenue": lambda df: (df["Quantity"] * df["UnitPrice"]).sum(),
-    "num_invoices": lambda df: df["InvoiceNo"].nunique(),
+    "num_customers": DistinctMetric("CustomerID"),
+    "total_quantity": SumMetric(_total_quantity, ("Quantity",)),
+    "total_revenue": SumMetric(_total_revenue, ("Quantity", "UnitPrice")),
+    "num_invoices": DistinctMetric("InvoiceNo"),
 }
+
+
+def required_columns() -> List[str]:
+    """METRICS 계산에 필요한 컬럼 (컬럼형 파일에서 이 컬럼만 읽음)"""
+    columns: List[str] = []
+    for metric in METRICS.values():
+        columns.extend(c for c in metric.columns if c not in columns)
+    return columns
+
+
+def build_accumulators(
+    distinct_modes: Optional[Dict[str, str]] = None, precision: int = DEFAULT_HLL_PRECISION
+) -> Dict[str, Accumulator]:
+    """
+    METRICS 별 누적기 생성
+    distinct_modes: {지표 이름: "exact" | "hll"} (없으면 exact)
+    """
+    modes = distinct_modes or {}
+    return {name: metric.accumulator(modes.get(name, "exact"), precision) for name, metric in METRICS.items()}
+
+
+def _align_kinds(current: Accumulator, incoming: Accumulator) -> Tuple[Accumulator, Accumulator]:
+    """
+    종류가 다른 누적기를 병합 가능하게 맞춤 (CSV_DISTINCT_MODES 가 바뀐 뒤 저장된 부분 결과와 합칠 때)
+    - exact + hll → exact 쪽 값을 해시해 hll 로 변환 (hll 의 precision 사용)
+    - 그 밖의 조합은 ValueError
+    """
+    if current.kind == incoming.kind:
+        return current, incoming
+    if current.kind == ExactDistinct.kind and incoming.kind == HyperLogLog.kind:
+        return HyperLogLog.from_exact(current, incoming.precision), incoming
+    if current.kind == HyperLogLog.kind and incoming.kind == ExactDistinct.kind:
+        return current, HyperLogLog.from_exact(incoming, current.precision)
+    raise ValueError(f"종류가 다른 누적기는 병합할 수 없음: {current.kind} / {incoming.kind}")
+
+
+def merge_accumulators(target: Dict[str, Accumulator], other: Dict[str, Accumulator]) -> Dict[str, Accumulator]:
+    for name, acc in other.items():
+        if name in target:
+            current, acc = _align_kinds(target[name], acc)
+            current.merge(acc)
+            target[name] = current
+        else:
+            # 나중에 추가된 지표는 해당 부분 결과만으로 계산
+            target[name] = acc
+    return target
+
+
+def finalize_accumulators(accumulators: Dict[str, Accumulator]) -> dict:
+    return {name: acc.finalize() for name, acc in accumulators.items()}
+
+
+def accumulators_to_state(accumulators: Dict[str, Accumulator]) -> dict:
+    return {name: acc.to_state() for name, acc in accumulators.items()}
+
+
+def accumulators_from_state(state: dict) -> Dict[str, Accumulator]:
+    return {name: accumulator_from_state(s) for name, s in state.items()}
@@ -1,19 +1,130 @@
 import boto3
+import hashlib
+import io
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import time
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pyarrow import fs as arrow_fs
 from io import BytesIO
+from typing import BinaryIO, Iterable, List, Optional, Tuple
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+class S3TransferError(Exception):
+    """일괄 전송에서 재시도 후에도 실패한 파일이 있을 때. failures: [(원본, 대상, 오류)]"""
+
+    def __init__(self, failures: list, succeeded: int):
+        self.failures = failures
+        self.succeeded = succeeded
+        super().__init__(f"S3 전송 실패 {len(failures)}건 (성공 {succeeded}건): {failures[0][2]}")
+
+class S3RangeReader(io.RawIOBase):
+    """
+    S3 객체를 Range 요청으로 원하는 위치부터 읽는 파일 객체 (seek 가능)
+    zip 처럼 끝부분의 목차를 먼저 읽어야 하는 형식을 로컬에 받지 않고 열 때 사용 (BufferedReader 로 감싸 요청 수를 줄임)
+    """
+
+    def __init__(self, client, bucket: str, s3_key: str, size: int):
+        self._client = client
+        self._bucket = bucket
+        self._key = s3_key
+        self._size = size
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        else:
+            pos = self._size + offset
+        if pos < 0:
+            raise ValueError(f"음수 위치로 이동할 수 없습니다: {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer):
+        if self._pos >= self._size or len(buffer) == 0:
+            return 0
+        end = min(self._pos + len(buffer), self._size) - 1
+        obj = self._client.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={self._pos}-{end}")
+        data = obj['Body'].read()
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def _member_key(prefix: str, name: str) -> Optional[str]:
+    """
+    압축 경로 → prefix 아래 S3 키 ("./a/b.png", "/a/b.png" → prefix/a/b.png)
+    정규화 후에도 '..' 로 prefix 밖을 가리키는 경로는 None
+    """
+    path = posixpath.normpath(name).lstrip("/")
+    if path in ("", ".") or ".." in path.split("/"):
+        return None
+    return f"{prefix}/{path}"
+
+
+class _ByteBudget:
+    """대기 중인 바이트 수 제한 (메모리/임시 파일). 한도를 넘으면 acquire 가 앞선 업로드의 release 를 기다림"""
+
+    def __init__(self, limit: int):
+        self._limit = max(limit, 1)
+        self._used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, n: int):
+        with self._cond:
+            # 한도보다 큰 항목 하나는 대기 중인 것이 없을 때 통과 (교착 방지)
+            self._cond.wait_for(lambda: self._used == 0 or self._used + n <= self._limit)
+            self._used += n
+
+    def release(self, n: int):
+        with self._cond:
+            self._used -= n
+            self._cond.notify_all()
+
+
 class S3Manager:
     def __init__(self):
+        # 연결 풀은 일괄 전송 스레드 수 × 파일당 동시 파트 수를 감당하도록 설정 (settings.s3_pool_connections)
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY,
             aws_secret_access_key=settings.AWS_SECRET_KEY,
-            region_name=settings.REGION
+            region_name=settings.REGION,
+            config=Config(
+                max_pool_connections=settings.s3_pool_connections,
+                retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "standard"},
+                tcp_keepalive=True,
+            ),
         )
         self.bucket = settings.BUCKET_NAME
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=settings.S3_TRANSFER_CONCURRENCY,
+        )
+        self._arrow_fs = None
 
     def upload_fileobj(self, file_obj, folder: str, filename: str) -> str:
         """파일 객체(스트림)를 S3에 직접 업로드"""
@@ -22,7 +133,7 @@ class S3Manager:
             if hasattr(file_obj, 'seek'):
                 file_obj.seek(0)
             
-            self.s3_client.upload_fileobj(file_obj, self.bucket, s3_key)
+            self.s3_client.upload_fileobj(file_obj, self.bucket, s3_key, Config=self.transfer_config)
             logger.info(f"S3 Upload Success: {s3_key}")
             return s3_key
         except Exception as e:
@@ -38,10 +149,55 @@ class S3Manager:
             logger.error(f"S3 Read Failed: {e}")
             raise e
 
+    def open_stream(self, s3_key: str):
+        """S3 객체 본문을 스트림(StreamingBody)으로 반환 (읽는 만큼만 받음). 반환: (본문, 전체 크기)"""
+        try:
+            obj = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key)
+            return obj['Body'], obj['ContentLength']
+        except Exception as e:
+            logger.error(f"S3 Read Failed: {e}")
+            raise e
+
+    def open_range(self, s3_key: str, start: int):
+        """S3 객체의 start 바이트부터 끝까지를 스트림으로 반환 (Range 요청, 큰 파일을 구간별로 나눠 처리할 때 사용)"""
+        try:
+            obj = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key, Range=f"bytes={start}-")
+            return obj['Body']
+        except Exception as e:
+            logger.error(f"S3 Range Read Failed for {s3_key}: {e}")
+            raise e
+
+    def open_seekable(self, s3_key: str) -> io.BufferedReader:
+        """S3 객체를 seek 가능한 파일 객체로 반환 (Range 요청으로 필요한 부분만 받음, 로컬 디스크 사용 없음)"""
+        size = self.head_object(s3_key)['ContentLength']
+        raw = S3RangeReader(self.s3_client, self.bucket, s3_key, size)
+        return io.BufferedReader(raw, buffer_size=settings.S3_RANGE_BLOCK_SIZE)
+
+    def head_object(self, s3_key: str) -> dict:
+        """S3 객체 메타데이터(ETag, 크기 등) 조회 (본문은 받지 않음)"""
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket, Key=s3_key)
+        except Exception as e:
+            logger.error(f"S3 Head Failed for {s3_key}: {e}")
+            raise e
+
+    def read_optional(self, s3_key: str) -> Optional[BytesIO]:
+        """S3 객체를 읽어 BytesIO 로 반환. 없으면 오류 로그 없이 None (manifest 처럼 없을 수도 있는 객체용)"""
+        try:
+            obj = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key)
+            return BytesIO(obj['Body'].read())
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
     def download_file(self, s3_key: str, local_path: str):
         """S3 객체를 지정된 로컬 경로에 다운로드"""
         try:
-            self.s3_client.download_file(self.bucket, s3_key, local_path)
+            # 임시 이름으로 받은 뒤 교체 → 중간에 실패해도 불완전한 파일이 최종 경로에 남지 않음
+            tmp_path = f"{local_path}.part"
+            self.s3_client.download_file(self.bucket, s3_key, tmp_path, Config=self.transfer_config)
+            os.replace(tmp_path, local_path)
             logger.info(f"S3 Download Success: {s3_key} -> {local_path}")
         except Exception as e:
             logger.error(f"S3 Download Failed for {s3_key}: {e}")
@@ -51,12 +207,265 @@ class S3Manager:
         """로컬 경로의 파일을 S3의 지정된 키로 업로드"""
         try:
             # upload_fileobj와 달리, local_path를 직접 받아 업로드
-            self.s3_client.upload_file(local_path, bucket_name, s3_key)
+            # 큰 파일은 멀티파트로 (이 파일로 시작한 미완료 업로드가 있으면 남은 파트만 전송)
+            # 한 번만 호출하는 경로라 실패하면 이어 올릴 일이 없음 → 업로드와 상태 파일 정리
+            if os.path.getsize(local_path) >= self.transfer_config.multipart_threshold:
+                try:
+                    self.upload_file_resumable(local_path, bucket_name, s3_key)
+                except Exception:
+                    self._abort_own_upload(local_path, bucket_name, s3_key)
+                    raise
+            else:
+                self.s3_client.upload_file(local_path, bucket_name, s3_key, Config=self.transfer_config)
             logger.info(f"S3 Upload Success: {local_path} -> {s3_key}")
         except Exception as e:
             logger.error(f"S3 Upload Failed for {local_path} to {s3_key}: {e}")
             raise e
 
+    # -----------------------------
+    # 이어 올리기 가능한 멀티파트 업로드
+    # -----------------------------
+    @staticmethod
+    def _upload_state_path(local_path: str) -> str:
+        return f"{local_path}.s3upload"
+
+    def _own_multipart_upload(self, local_path: str, bucket_name: str, s3_key: str) -> Optional[str]:
+        """
+        이 로컬 파일로 시작했다가 완료되지 않은 멀티파트 업로드 ID (로컬 상태 파일 기준)
+        같은 키라도 다른 작성자가 진행 중인 업로드는 이어 쓰지 않음
+        """
+        try:
+            with open(self._upload_state_path(local_path)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("bucket") != bucket_name or state.get("key") != s3_key:
+            return None
+        return state.get("upload_id")
+
+    def _list_parts(self, bucket_name: str, s3_key: str, upload_id: str) -> dict:
+        parts = {}
+        paginator = self.s3_client.get_paginator("list_parts")
+        for page in paginator.paginate(Bucket=bucket_name, Key=s3_key, UploadId=upload_id):
+            for part in page.get("Parts", []):
+                parts[part["PartNumber"]] = part
+        return parts
+
+    def upload_file_resumable(self, local_path: str, bucket_name: str, s3_key: str):
+        """
+        로컬 파일을 멀티파트로 업로드하되, 같은 키의 미완료 업로드가 있으면 이미 올라간 파트는 건너뜀
+        - 파트 내용은 MD5(=파트 ETag)로 확인 → 파일이 바뀐 파트만 다시 전송
+        - 실패 시 업로드를 중단(abort)하지 않고 남겨 두어 다음 시도(파일 단위 재시도 등)가 이어서 진행
+          (미완료 업로드 정리는 버킷 수명 주기 규칙 AbortIncompleteMultipartUpload 로)
+        - 이어 올릴 업로드 ID 는 로컬 파일 옆 상태 파일({local_path}.s3upload)에 기록한 것만 사용
+          → 같은 키로 동시에 올리는 다른 프로세스의 업로드에 파트를 섞지 않음
+        """
+        size = os.path.getsize(local_path)
+        chunk = self.transfer_config.multipart_chunksize
+        count = max((size + chunk - 1) // chunk, 1)
+        state_path = self._upload_state_path(local_path)
+
+        upload_id = self._own_multipart_upload(local_path, bucket_name, s3_key)
+        existing = {}
+        if upload_id:
+            try:
+                existing = self._list_parts(bucket_name, s3_key, upload_id)
+            except ClientError:
+                # 이미 완료/중단된 업로드
+                upload_id = None
+        # 파트 크기가 바뀌었으면 이어 올릴 수 없음 → 새로 시작
+        if upload_id and any(
+            p["Size"] != min(chunk, size - (n - 1) * chunk) for n, p in existing.items() if n <= count
+        ):
+            self.s3_client.abort_multipart_upload(Bucket=bucket_name, Key=s3_key, UploadId=upload_id)
+            upload_id, existing = None, {}
+        if upload_id is None:
+            upload_id = self.s3_client.create_multipart_upload(Bucket=bucket_name, Key=s3_key)["UploadId"]
+            with open(state_path, "w") as f:
+                json.dump({"bucket": bucket_name, "key": s3_key, "upload_id": upload_id}, f)
+        elif existing:
+            logger.info(f"S3 멀티파트 이어 올리기: {s3_key} (완료된 파트 {len(existing)}/{count})")
+
+        def send(number: int) -> dict:
+            with open(local_path, "rb") as f:
+                f.seek((number - 1) * chunk)
+                data = f.read(chunk)
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            done = existing.get(number)
+            if done is not None and done["ETag"] == etag:
+                return {"PartNumber": number, "ETag": etag}
+            response = self.s3_client.upload_part(
+                Bucket=bucket_name, Key=s3_key, UploadId=upload_id, PartNumber=number, Body=data
+            )
+            return {"PartNumber": number, "ETag": response["ETag"]}
+
+        with ThreadPoolExecutor(max_workers=self.transfer_config.max_request_concurrency) as pool:
+            parts = list(pool.map(send, range(1, count + 1)))
+
+        self.s3_client.complete_multipart_upload(
+            Bucket=bucket_name, Key=s3_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+        os.unlink(state_path)
+
+    def _abort_own_upload(self, local_path: str, bucket_name: str, s3_key: str):
+        """로컬 파일로 시작한 미완료 멀티파트 업로드와 상태 파일 정리 (더 이어 올리지 않을 때)"""
+        upload_id = self._own_multipart_upload(local_path, bucket_name, s3_key)
+        if upload_id is None:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=bucket_name, Key=s3_key, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"S3 멀티파트 업로드 중단 실패: {s3_key} ({e})")
+        os.unlink(self._upload_state_path(local_path))
+
+    # -----------------------------
+    # 일괄 전송 (스레드 풀, 파일 단위 재시도)
+    # -----------------------------
+    def _with_retries(self, fn, *args):
+        attempts = max(settings.S3_FILE_RETRIES, 0) + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                return fn(*args)
+            except Exception:
+                if attempt == attempts:
+                    raise
+                # 지수 백오프 (0.5, 1, 2 ... 초)
+                time.sleep(0.5 * 2 ** (attempt - 1))
+
+    def _run_many(self, fn, items: List[Tuple[str, str]], workers: Optional[int]) -> int:
+        failures = []
+        workers = min(workers or settings.S3_BULK_WORKERS, max(len(items), 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._with_retries, fn, src, dst): (src, dst) for src, dst in items}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    src, dst = futures[future]
+                    failures.append((src, dst, str(e)))
+        if failures:
+            raise S3TransferError(failures, len(items) - len(failures))
+        return len(items)
+
+    def upload_many(self, items: Iterable[Tuple[str, str]], bucket_name: Optional[str] = None,
+                    workers: Optional[int] = None) -> int:
+        """
+        (로컬 경로, S3 키) 목록을 스레드 풀로 동시 업로드. 반환: 업로드한 파일 수
+        파일마다 S3_FILE_RETRIES 회까지 재시도하고, 그래도 실패한 파일이 있으면 모두 끝난 뒤 S3TransferError
+        """
+        bucket_name = bucket_name or self.bucket
+
+        def upload(local_path, s3_key):
+            if os.path.getsize(local_path) >= self.transfer_config.multipart_threshold:
+                self.upload_file_resumable(local_path, bucket_name, s3_key)
+            else:
+                self.s3_client.upload_file(local_path, bucket_name, s3_key, Config=self.transfer_config)
+
+        items = list(items)
+        count = self._run_many(upload, items, workers)
+        logger.info(f"S3 Bulk Upload Success: {count} files")
+        return count
+
+    def upload_stream_many(self, members: Iterable[Tuple[str, BinaryIO]], prefix: str,
+                           bucket_name: Optional[str] = None, workers: Optional[int] = None) -> int:
+        """
+        (이름, 읽기 스트림) 을 순서대로 받아 prefix/이름 키로 동시 업로드. 반환: 업로드한 파일 수
+        압축 파일 항목을 디스크에 풀지 않고 바로 올릴 때 사용 (스트림은 다음 항목을 받기 전에 다 읽으므로 tar 순차 읽기와 호환)
+        - multipart_threshold 보다 작은 항목: 메모리에 읽어 스레드 풀로 넘기고 바로 다음 항목으로 진행
+        - 큰 항목: 임시 파일로 받아 스레드 풀에서 이어 올리기 가능한 멀티파트로 전송 (재시도 시 완료된 파트는 건너뜀)
+        - 대기 중인 바이트가 S3_STREAM_BUFFER_BYTES(메모리) / S3_STREAM_SPOOL_BYTES(임시 파일) 를 넘으면
+          업로드가 끝날 때까지 다음 항목을 읽지 않음
+        - 정규화한 경로가 '..' 로 prefix 밖을 가리키는 항목은 올리지 않고 실패로 기록
+        실패한 항목은 S3_FILE_RETRIES 회까지 재시도하고, 모두 끝난 뒤 S3TransferError
+        """
+        bucket_name = bucket_name or self.bucket
+        threshold = self.transfer_config.multipart_threshold
+        budget = _ByteBudget(settings.S3_STREAM_BUFFER_BYTES)
+        spool = _ByteBudget(settings.S3_STREAM_SPOOL_BYTES)
+        futures, failures, total = {}, [], 0
+
+        def put(s3_key, data):
+            try:
+                self._with_retries(lambda: self.s3_client.put_object(Bucket=bucket_name, Key=s3_key, Body=data))
+            finally:
+                budget.release(len(data))
+
+        def send_file(s3_key, local_path, size):
+            try:
+                self._with_retries(self.upload_file_resumable, local_path, bucket_name, s3_key)
+            except Exception:
+                # 임시 파일을 지우면 더 이어 올릴 수 없으므로 남은 멀티파트 업로드 정리
+                self._abort_own_upload(local_path, bucket_name, s3_key)
+                raise
+            finally:
+                os.unlink(local_path)
+                spool.release(size)
+
+        with ThreadPoolExecutor(max_workers=workers or settings.S3_BULK_WORKERS) as pool:
+            for name, stream in members:
+                total += 1
+                s3_key = _member_key(prefix, name)
+                if s3_key is None:
+                    # '../models/x_latest.onnx' 처럼 prefix 밖으로 나가는 항목은 올리지 않음
+                    failures.append((name, None, "prefix 밖을 가리키는 경로"))
+                    continue
+                head = stream.read(threshold)
+                if len(head) < threshold:
+                    budget.acquire(len(head))
+                    futures[pool.submit(put, s3_key, head)] = (name, s3_key)
+                    continue
+                fd, local_path = tempfile.mkstemp(suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(head)
+                        shutil.copyfileobj(stream, f, threshold)
+                except Exception as e:
+                    os.unlink(local_path)
+                    failures.append((name, s3_key, str(e)))
+                    continue
+                size = os.path.getsize(local_path)
+                spool.acquire(size)
+                futures[pool.submit(send_file, s3_key, local_path, size)] = (name, s3_key)
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    name, s3_key = futures[future]
+                    failures.append((name, s3_key, str(e)))
+
+        if failures:
+            raise S3TransferError(failures, total - len(failures))
+        logger.info(f"S3 Stream Upload Success: {total} files -> {prefix}")
+        return total
+
+    def download_many(self, items: Iterable[Tuple[str, str]], workers: Optional[int] = None) -> int:
+        """(S3 키, 로컬 경로) 목록을 스레드 풀로 동시 다운로드 (상위 디렉터리 자동 생성). 반환: 파일 수"""
+        def download(s3_key, local_path):
+            os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+            tmp_path = f"{local_path}.part"
+            self.s3_client.download_file(self.bucket, s3_key, tmp_path, Config=self.transfer_config)
+            os.replace(tmp_path, local_path)
+
+        items = list(items)
+        count = self._run_many(download, items, workers)
+        logger.info(f"S3 Bulk Download Success: {count} files")
+        return count
+
+    def arrow_filesystem(self):
+        """pyarrow S3 파일시스템 (Parquet 을 필요한 컬럼/행 그룹만 범위 요청으로 읽을 때 사용)"""
+        if self._arrow_fs is None:
+            self._arrow_fs = arrow_fs.S3FileSystem(
+                access_key=settings.AWS_ACCESS_KEY,
+                secret_key=settings.AWS_SECRET_KEY,
+                region=settings.REGION
+            )
+        return self._arrow_fs
+
+    def arrow_path(self, s3_key: str) -> str:
+        """pyarrow 파일시스템 기준 경로 (버킷/키)"""
+        return f"{self.bucket}/{s3_key}"
+
     def delete_file(self, s3_key: str):
         """S3에서 지정된 키의 객체를 삭제"""
         try:
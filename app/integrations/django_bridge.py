@@ -17,7 +17,7 @@ django.setup()
 # ----------------
 # 모델 import
 # ----------------
-from core.models import UploadRecord, ChatRecord, FAQ, Intent, User as core_models_user
+from core.models import UploadRecord, ChatRecord, FAQ, Intent, Dataset, DatasetPartial, User as core_models_user
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
@@ -29,6 +29,11 @@ def get_upload_record_model():
     return UploadRecord
 
 
+def get_dataset_models():
+    """Dataset, DatasetPartial 모델 반환"""
+    return Dataset, DatasetPartial
+
+
 # ----------------
 # Chat / FAQ 관련
 # ----------------
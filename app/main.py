@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
-from app.routers import auth, upload, chatbot, admin_plotly, admin_dashboard, train
-from app.services.data_service import initialize_onnx
+from contextlib import asynccontextmanager, suppress
+import asyncio
+from app.routers import auth, upload, chatbot, admin_plotly, admin_dashboard, train, query, datasets
+from app.core.async_s3_manager import async_s3_manager
+from app.services.data_service import initialize_onnx, shutdown_onnx, start_inference_batcher, stop_inference_batcher, watch_model_updates
 from dotenv import load_dotenv
 import uvicorn
 
@@ -11,8 +13,19 @@ import uvicorn
 async def lifespan(app: FastAPI):
     # 앱 시작 시 실행
     load_dotenv()
+    # 모델 로드는 백그라운드에서 진행 (완료 전 이미지 요청은 warming 응답)
     initialize_onnx()
+    await start_inference_batcher()
+    # 학습 완료된 모델 자동 교체 구독
+    model_watcher = asyncio.create_task(watch_model_updates())
     yield
+    # 앱 종료 시 실행
+    model_watcher.cancel()
+    with suppress(asyncio.CancelledError, Exception):
+        await model_watcher
+    await stop_inference_batcher()
+    shutdown_onnx()
+    await async_s3_manager.close()
 
 app = FastAPI(
     title="Finnect AI API",
@@ -39,6 +52,8 @@ app.include_router(auth.router)
 app.include_router(upload.router)
 app.include_router(chatbot.router)
 app.include_router(train.router)
+app.include_router(query.router)
+app.include_router(datasets.router)
 app.include_router(admin_plotly.router)
 app.include_router(admin_dashboard.router)
 
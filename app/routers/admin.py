@@ -1,8 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from io import BytesIO
 from pydantic import BaseModel
-from app.services.data_service import process_csv
-from app.services.csv_convert import convert_xlsx_to_csv
+from app.services.data_service import process_csv, process_xlsx
 from app.core.security import require_admin
 from app.integrations.django_bridge import get_upload_record_model, get_or_create_user_by_username
 
@@ -26,8 +25,7 @@ def admin_upload_csv(file: UploadFile = File(...), user=Depends(require_admin)):
 
         if filename.endswith(".xlsx"):
             file_obj.seek(0)
-            csv_file = convert_xlsx_to_csv(file_obj)
-            stats = process_csv(csv_file)
+            stats = process_xlsx(file_obj)
         elif filename.endswith(".csv"):
             file_obj.seek(0)
             stats = process_csv(file_obj)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from datetime import date
+from typing import Optional
+import logging
+
+from app.services.dataset_service import dataset_stats, list_datasets
+
+router = APIRouter(prefix="/datasets", tags=["datasets"])
+logger = logging.getLogger(__name__)
+
+# ---------------
+# 데이터셋 목록
+# ---------------
+@router.get("")
+def get_datasets():
+    return list_datasets()
+
+# ------------------------------
+# 데이터셋 기간 통계 (일별 부분 집계 병합)
+# ------------------------------
+@router.get("/{name}/stats")
+def get_dataset_stats(name: str, start: Optional[date] = None, end: Optional[date] = None):
+    # 원본 파일을 다시 읽지 않고 저장된 일별 누적기 상태만 병합해 계산
+    return dataset_stats(name, start, end)
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Any, List, Optional
+import asyncio
+import logging
+import json
+import pyarrow as pa
+from asgiref.sync import sync_to_async
+
+from app.core.redis import redis_client_async
+from app.core.s3_manager import s3_manager
+from app.core.config import settings
+from app.integrations.django_bridge import get_upload_record_model
+from app.services.query_service import query_cache_key, run_query
+
+router = APIRouter(prefix="/query", tags=["query"])
+UploadRecord = get_upload_record_model()
+logger = logging.getLogger(__name__)
+
+# ----------------
+# Request Models
+# ----------------
+class FilterSpec(BaseModel):
+    column: str
+    op: str = "=="
+    value: Any = None
+
+class AggregationSpec(BaseModel):
+    column: str
+    func: str = "sum"
+
+class OrderSpec(BaseModel):
+    column: str
+    desc: bool = False
+
+class QueryRequest(BaseModel):
+    record_ids: List[int]
+    group_by: List[str] = []
+    filters: List[FilterSpec] = []
+    aggregations: List[AggregationSpec]
+    order_by: List[OrderSpec] = []
+    limit: Optional[int] = None
+
+# -------------------------------
+# 업로드 데이터 집계 질의 (Parquet)
+# -------------------------------
+@router.post("")
+async def query_uploads(req: QueryRequest):
+    # 업로드들의 변환된 Parquet 에 대해 필터/그룹/집계 실행. (업로드, 질의) 단위로 Redis 캐시.
+    rows = await sync_to_async(list)(
+        UploadRecord.objects.filter(id__in=req.record_ids).values_list("id", "processed_key")
+    )
+    keys = {record_id: key for record_id, key in rows}
+    missing = [i for i in req.record_ids if not keys.get(i)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"변환된 데이터가 없는 업로드: {missing}")
+
+    sources = sorted(set(keys.values()))
+    query = req.model_dump(exclude={"record_ids"})
+    cache_key = query_cache_key(sources, query)
+
+    try:
+        cached = await redis_client_async.get(cache_key)
+    except Exception as e:
+        logger.warning(f"질의 캐시 조회 실패: {e}")
+        cached = None
+    if cached:
+        return {**json.loads(cached), "cached": True}
+
+    try:
+        result = await asyncio.to_thread(
+            run_query,
+            [s3_manager.arrow_path(k) for k in sources],
+            query,
+            s3_manager.arrow_filesystem(),
+            settings.QUERY_MAX_ROWS,
+        )
+    except (ValueError, pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("질의 실행 오류")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    result_json = json.dumps(result, default=str)
+    try:
+        await redis_client_async.set(cache_key, result_json, ex=settings.QUERY_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"질의 캐시 저장 실패: {e}")
+    return {**json.loads(result_json), "cached": False}
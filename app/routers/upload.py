@@ -1,17 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from io import BytesIO
+from typing import List, Optional
+import asyncio
 import logging
+import os
 import json
 import datetime
 from asgiref.sync import sync_to_async
 
 from app.core.redis import redis_client_async
-from app.tasks.csv_tasks import process_csv_task
+from app.tasks.csv_tasks import process_csv_batch_task, process_csv_task
 from app.integrations.django_bridge import get_upload_record_model
-from app.services.data_service import predict_image
-from app.tasks.model_tasks import process_image_dataset_task
+from app.services.data_service import (
+    predict_image_async, predict_images_stream, check_model_ready, get_inference_stats, model_status, validate_category, DEFAULT_CATEGORY
+)
+from app.services.image_archive import collect_upload_images, is_archive, is_csv, iter_archive_members
+from app.services.dataset_service import get_or_create_dataset
+from app.services.model_registry import ModelWarming
 from app.core.s3_manager import s3_manager
+from app.core.async_s3_manager import async_s3_manager
 from app.core.config import settings
 
 router = APIRouter(prefix="/upload", tags=["upload"])
@@ -32,25 +41,28 @@ class UploadResponse(BaseModel):
 # 이미지 데이터셋 업로드
 # ---------------------
 @router.post("/images_dataset", response_model=UploadResponse)
-def upload_images_dataset(file: UploadFile = File(...)):
+async def upload_images_dataset(file: UploadFile = File(...)):
     # 대용량 이미지 압축 파일을 S3에 업로드하고, Celery에게 학습 데이터 처리 및 학습 작업을 위임.
     if not file.filename.lower().endswith(('.zip', '.tar', '.gz')):
         raise HTTPException(status_code=400, detail="압축 파일 형식(ZIP, TAR, GZ 등)만 지원됩니다.")
 
     try:
         # DB 레코드 생성 (상태: PENDING)
-        record = UploadRecord.objects.create(
+        record = await sync_to_async(UploadRecord.objects.create)(
             filename=file.filename,
             file_size=0, # 파일 크기는 Celery가 S3에서 확인 후 업데이트
             status="PENDING_DATA_UPLOAD" # 학습 데이터 업로드 대기 상태
         )
         
-        # FastAPI 메모리에 올리지 않고 S3의 'raw-datasets' 폴더로 스트리밍
-        s3_key = s3_manager.upload_fileobj(file.file, settings.S3_RAW_DATASET_FOLDER, file.filename)
+        # FastAPI 메모리에 올리지 않고 S3의 'raw-datasets' 폴더로 파트 단위 멀티파트 스트리밍
+        # (비동기 전송 → 업로드 동안 스레드 풀 슬롯을 점유하지 않음)
+        s3_key = await async_s3_manager.upload_fileobj(file, settings.S3_RAW_DATASET_FOLDER, file.filename)
 
         # Celery Task에 S3 주소와 DB ID 전달
         # Celery Task는 압축 해제, 파일 정리, S3 재업로드, 학습 지시 등을 처리.
-        process_image_dataset_task.apply_async((s3_key, record.id, file.filename))
+        # (TensorFlow 를 끌어오는 학습 모듈은 이 경로에서만 필요하므로 여기서 import)
+        from app.tasks.model_tasks import process_image_dataset_task
+        await asyncio.to_thread(process_image_dataset_task.apply_async, (s3_key, record.id, file.filename))
         
         logger.info(f"이미지 데이터셋 S3 업로드 및 태스크 요청 완료: {s3_key}")
         return UploadResponse(filename=record.filename, uploaded_at=record.uploaded_at, status=record.status)
@@ -62,13 +74,22 @@ def upload_images_dataset(file: UploadFile = File(...)):
 # -------------
 # 이미지 업로드
 # -------------
+def _warming_response(category: str) -> HTTPException:
+    # 모델 로드가 끝나기 전에는 503 + Retry-After 로 응답 (클라이언트/로드밸런서가 재시도)
+    return HTTPException(
+        status_code=503,
+        detail={"status": "warming", "category": category},
+        headers={"Retry-After": str(settings.MODEL_WARMING_RETRY_AFTER)},
+    )
+
 @router.post("/image", response_model=UploadResponse)
-async def upload_image(file: UploadFile = File(...)):
-    # 이미지 추론을 위한 단일 파일 처리.
+async def upload_image(file: UploadFile = File(...), category: str = Form(DEFAULT_CATEGORY)):
+    # 이미지 추론을 위한 단일 파일 처리. category 에 해당하는 모델로 추론.
+    validate_category(category)
     try:
         file_bytes = await file.read()
         file_size = len(file_bytes)
-        result = predict_image(BytesIO(file_bytes))
+        result = await predict_image_async(file_bytes, category)
 
         record = await sync_to_async(UploadRecord.objects.create)(
             filename=file.filename, file_size=file_size, prediction=result.get("prediction"), confidence=result.get("confidence")
@@ -79,30 +100,110 @@ async def upload_image(file: UploadFile = File(...)):
             filename=record.filename, uploaded_at=record.uploaded_at, file_size=record.file_size, prediction=result
         )
 
+    except ModelWarming:
+        raise _warming_response(category)
     except Exception as e:
         logger.exception("이미지 업로드 처리 오류")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ---------------------------------
+# 이미지 여러 장 업로드 (NDJSON 스트리밍)
+# ---------------------------------
+@router.post("/images")
+async def upload_images(files: List[UploadFile] = File(...), category: str = Form(DEFAULT_CATEGORY)):
+    # 이미지 여러 장 또는 압축 파일 1개를 배치 추론하고, 끝나는 순서대로 한 줄씩 결과 전송.
+    # DB 기록은 모두 끝난 뒤 bulk_create 한 번, Redis 기록은 파이프라인 한 번으로 처리.
+    validate_category(category)
+    try:
+        check_model_ready(category)
+    except ModelWarming:
+        raise _warming_response(category)
+
+    try:
+        items = await asyncio.to_thread(
+            collect_upload_images, [(f.filename, f.file) for f in files], settings.IMAGE_BATCH_MAX_FILES,
+            settings.IMAGE_MAX_FILE_BYTES, settings.IMAGE_BATCH_MAX_BYTES,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"압축 파일을 읽을 수 없습니다: {e}")
+    if not items:
+        raise HTTPException(status_code=400, detail="이미지 파일이 없습니다.")
+
+    async def stream_results():
+        results = [None] * len(items)
+        async for i, result in predict_images_stream([data for _, data in items], category):
+            results[i] = result
+            yield json.dumps({"index": i, "filename": items[i][0], **result}, ensure_ascii=False) + "\n"
+
+        records = [
+            UploadRecord(
+                filename=filename,
+                file_size=len(data),
+                prediction=result.get("prediction"),
+                confidence=result.get("confidence"),
+                status="FAILURE" if result.get("prediction") == "error" else "SUCCESS",
+            )
+            for (filename, data), result in zip(items, results)
+        ]
+        try:
+            records = await sync_to_async(UploadRecord.objects.bulk_create)(records, batch_size=500)
+            async with redis_client_async.pipeline(transaction=False) as pipe:
+                for record, result in zip(records, results):
+                    if record.id is not None:
+                        pipe.set(f"image:{record.id}", json.dumps(result), ex=3600)
+                await pipe.execute()
+        except Exception:
+            logger.exception("이미지 일괄 업로드 기록 저장 오류")
+
+        errors = sum(1 for r in results if r.get("prediction") == "error")
+        yield json.dumps({"summary": {"total": len(items), "errors": errors, "category": category}}) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# ------------------------
+# 이미지 추론 상태 (배치/캐시)
+# ------------------------
+@router.get("/image/stats")
+def get_image_inference_stats():
+    return get_inference_stats()
+
+@router.get("/image/status")
+def get_image_model_status(category: str = DEFAULT_CATEGORY):
+    # 준비 상태 확인용 (readiness probe). 로드 중이면 503
+    validate_category(category)
+    status = model_status(category)
+    if status == "warming":
+        raise _warming_response(category)
+    return {"category": category, "status": status}
+
 # -------------------------
 # CSV 업로드 (Celery 비동기)
 # -------------------------
 @router.post("/csv")
-def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(
+    file: UploadFile = File(...), dataset: Optional[str] = Form(None), profile: bool = Form(False)
+):
     # S3로 스트리밍 업로드 후, Celery에게 처리(다운로드+분석)를 위임합니다.
+    # dataset 을 지정하면 처리 후 해당 데이터셋의 누적 통계(일별 부분 집계)에 합쳐짐.
+    # profile=true 면 통계와 같은 패스에서 데이터 품질 프로파일(결측/범위/반품/건너뛴 줄 등)도 계산.
+    target_dataset = await sync_to_async(get_or_create_dataset)(dataset) if dataset else None
     try:
         # DB 레코드 생성 (상태: PENDING)
-        record = UploadRecord.objects.create(
+        record = await sync_to_async(UploadRecord.objects.create)(
             filename=file.filename,
             file_size=0, # 사이즈는 Celery가 S3에서 확인 후 업데이트
-            status="PENDING"
+            status="PENDING",
+            dataset=target_dataset
         )
 
         # FastAPI 메모리에 다 올리지 않고 S3로 바로 보냄
-        # file.file은 임시 파일 객체이므로 바로 boto3에 넘길 수 있음
-        s3_key = s3_manager.upload_fileobj(file.file, settings.S3_RAW_FOLDER, file.filename)
+        # UploadFile 을 파트 크기씩 읽어 멀티파트로 비동기 전송 (동시 대용량 업로드가 스레드 풀을 소진하지 않음)
+        s3_key = await async_s3_manager.upload_fileobj(file, settings.S3_RAW_FOLDER, file.filename)
 
         # Celery에는 거대한 파일 대신 'S3 주소(Key)'만 전달
-        process_csv_task.apply_async((s3_key, file.filename, record.id))
+        await asyncio.to_thread(process_csv_task.apply_async, (s3_key, file.filename, record.id), {"profile": profile})
         
         logger.info(f"CSV S3 업로드 및 태스크 요청 완료: {s3_key}")
         return {"record_id": record.id, "status": record.status}
@@ -111,6 +212,61 @@ def upload_csv(file: UploadFile = File(...)):
         logger.exception("CSV 업로드 처리 오류")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ----------------------------------------
+# 여러 CSV / 압축 파일 업로드 (구간 분산 처리)
+# ----------------------------------------
+def _upload_batch_members(files: List[UploadFile], record_id: int) -> List[str]:
+    # CSV 파일과 압축 파일 안의 CSV 를 하나씩 S3 로 스트리밍 (압축 해제 결과를 메모리에 모으지 않음)
+    folder = f"{settings.S3_RAW_FOLDER}/batch-{record_id}"
+    s3_keys: List[str] = []
+
+    def upload(name: str, fileobj):
+        if len(s3_keys) >= settings.CSV_BATCH_MAX_FILES:
+            raise ValueError(f"한 번에 처리할 수 있는 CSV 는 최대 {settings.CSV_BATCH_MAX_FILES}개입니다.")
+        # 압축 파일마다 같은 이름이 있을 수 있으므로 순번을 붙임
+        s3_keys.append(s3_manager.upload_fileobj(fileobj, folder, f"{len(s3_keys):03d}-{os.path.basename(name)}"))
+
+    for f in files:
+        if is_archive(f.filename):
+            for name, member in iter_archive_members(f.file, f.filename, is_csv):
+                upload(name, member)
+        elif is_csv(f.filename):
+            upload(f.filename, f.file)
+        else:
+            raise ValueError(f"CSV 또는 압축 파일만 지원됩니다: {f.filename}")
+    return s3_keys
+
+@router.post("/csv/batch")
+def upload_csv_batch(
+    files: List[UploadFile] = File(...), dataset: Optional[str] = Form(None), profile: bool = Form(False)
+):
+    # 지역별 CSV 여러 개 또는 압축 파일을 하나의 업로드로 처리.
+    # 파일을 바이트 구간으로 나눠 Celery 워커들이 나눠 집계하고(chord), 마지막에 부분 결과를 병합.
+    target_dataset = get_or_create_dataset(dataset) if dataset else None
+    record = UploadRecord.objects.create(
+        filename=", ".join(f.filename for f in files)[:255],
+        file_size=0, # 전체 크기는 Celery가 S3에서 확인 후 업데이트
+        status="PENDING",
+        dataset=target_dataset
+    )
+
+    try:
+        s3_keys = _upload_batch_members(files, record.id)
+        if not s3_keys:
+            raise ValueError("CSV 파일이 없습니다.")
+    except Exception as e:
+        record.status = "FAILURE"
+        record.statistics = json.dumps({"error": str(e)})
+        record.save()
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.exception("CSV 일괄 업로드 처리 오류")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    process_csv_batch_task.apply_async((s3_keys, record.id), {"profile": profile})
+    logger.info(f"CSV 일괄 업로드 및 태스크 요청 완료: record_id={record.id}, files={len(s3_keys)}")
+    return {"record_id": record.id, "files": len(s3_keys), "status": record.status}
+
 # -------------
 # CSV 기록 조회
 # -------------
@@ -124,7 +280,8 @@ def get_csv_record(record_id: int):
             "filename": record.filename,
             "file_size": record.file_size,
             "status": record.status,
-            "statistics": record.statistics
+            "statistics": record.statistics,
+            "profile": record.profile
         }
     except UploadRecord.DoesNotExist:
         raise HTTPException(status_code=404, detail="CSV record not found")
\ No newline at end of file
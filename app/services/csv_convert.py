@@ -1,9 +1,62 @@
+from typing import Iterator
+
 import pandas as pd
-from io import BytesIO
-
-def convert_xlsx_to_csv(file_obj: BytesIO) -> BytesIO:
-    df = pd.read_excel(file_obj)
-    csv_buffer = BytesIO()
-    df.to_csv(csv_buffer, index=False, encoding="ISO-8859-1")
-    csv_buffer.seek(0)
-    return csv_buffer
+from openpyxl import load_workbook
+
+from app.core.metrics import METRICS, SumMetric
+from app.services.csv_engine import CSV_DTYPES
+
+# 합계 지표가 읽는 숫자 컬럼 (Quantity, UnitPrice)
+NUMERIC_COLUMNS = tuple(dict.fromkeys(
+    col for metric in METRICS.values() if isinstance(metric, SumMetric) for col in metric.columns
+))
+
+
+def _typed_chunk(rows: list, header: list) -> pd.DataFrame:
+    """셀 값(openpyxl 타입) 행 목록 → CSV 경로와 같은 dtype 의 DataFrame"""
+    df = pd.DataFrame.from_records(rows, columns=header)
+    for col, dtype in CSV_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype == "object":
+            # 숫자로 저장된 송장/상품 코드도 CSV 와 같은 문자열로 통일 (빈 셀은 그대로 결측)
+            df[col] = df[col].map(str, na_action="ignore")
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+    for col in NUMERIC_COLUMNS:
+        # 문자열 셀('6', 'N/A' 등)이 섞이면 object 컬럼이 되어 합계가 문자열 연결이 됨 → 숫자로 변환, 변환 불가 값은 결측
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def iter_xlsx_chunks(source, chunksize: int = 200_000) -> Iterator[pd.DataFrame]:
+    """
+    XLSX 첫 시트를 openpyxl 읽기 전용(스트리밍) 모드로 읽어 chunksize 행씩 DataFrame 으로 반환
+    - 전체 통합 문서를 메모리에 올리거나 CSV 텍스트로 바꾸지 않음
+    - 날짜 셀은 datetime, 숫자 셀은 숫자 그대로 전달
+    source: 파일 경로 또는 seek 가능한 파일 객체 (XLSX 는 zip 이므로 순차 스트림은 불가)
+    """
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        # 잘못 기록된 dimension 정보 때문에 행이 잘리지 않도록 초기화
+        ws.reset_dimensions()
+
+        header = None
+        rows = []
+        for row in ws.iter_rows(values_only=True):
+            if all(v is None for v in row):
+                continue
+            if header is None:
+                header = [str(v) if v is not None else f"column_{i}" for i, v in enumerate(row)]
+                continue
+            # 뒤쪽 빈 셀이 생략된 행은 헤더 길이에 맞춤
+            rows.append(row[:len(header)] + (None,) * (len(header) - len(row)))
+            if len(rows) >= chunksize:
+                yield _typed_chunk(rows, header)
+                rows = []
+        if rows:
+            yield _typed_chunk(rows, header)
+    finally:
+        wb.close()
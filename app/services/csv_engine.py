@@ -0,0 +1,284 @@
+import logging
+import os
+import threading
+import warnings
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import dask
+import dask.dataframe as dd
+import pandas as pd
+import pyarrow.dataset as pa_ds
+
+from app.core.metrics import (
+    DEFAULT_HLL_PRECISION,
+    ProfileAccumulator,
+    accumulators_to_state,
+    build_accumulators,
+    finalize_accumulators,
+    merge_accumulators,
+    required_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+# Online Retail CSV 읽기 옵션
+# 파티션마다 dtype 을 따로 추론하면 섞인 값(예: 'C536379', '85123A')에서 불일치가 나므로 문자열 컬럼은 고정
+# (HyperLogLog 해시도 dtype 에 따라 달라지므로 청크/파일 간 dtype 을 맞추는 역할도 함)
+CSV_ENCODING = "ISO-8859-1"
+CSV_DTYPES = {"InvoiceNo": "object", "StockCode": "object", "Description": "object", "CustomerID": "float64"}
+
+# 파티션 부분 결과를 합칠 때 한 태스크가 병합하는 개수
+_MERGE_FAN_IN = 8
+
+# catch_warnings 는 프로세스 전역 상태(warnings.filters, showwarning)를 바꾸므로 건너뛴 줄 집계는 한 번에 하나만
+_skipped_lines_lock = threading.Lock()
+
+
+def csv_read_kwargs(read_options: Optional[dict] = None) -> dict:
+    """공통 CSV 읽기 인자 + 스키마 계획 인자 (계획의 dtype 이 기본 CSV_DTYPES 를 대체)"""
+    return {"encoding": CSV_ENCODING, "on_bad_lines": "skip", "dtype": CSV_DTYPES, **(read_options or {})}
+
+
+@contextmanager
+def count_skipped_lines(profile: Optional[ProfileAccumulator]):
+    """
+    on_bad_lines="warn" 로 읽는 동안 파서가 건너뛴 줄 수를 profile 에 더함
+    (pandas 는 건너뛴 줄을 ParserWarning 메시지로만 알려줌. 다른 경고는 그대로 다시 발생)
+    - 이 프로세스에서 발생한 경고만 잡으므로 Dask 파싱은 threads/synchronous 스케줄러여야 함 (profile_scheduler)
+    - 동시에 들어온 집계는 잠금으로 순서대로 처리 (다른 스레드의 catch_warnings 와 상태가 섞이지 않도록)
+    """
+    if profile is None:
+        yield
+        return
+    with _skipped_lines_lock, warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", pd.errors.ParserWarning)
+        try:
+            yield
+        finally:
+            for w in caught:
+                if issubclass(w.category, pd.errors.ParserWarning):
+                    profile.skipped_lines += str(w.message).count("Skipping line")
+                else:
+                    warnings.warn_explicit(w.message, w.category, w.filename, w.lineno)
+
+
+def profile_read_options(read_options: Optional[dict], profile: Optional[ProfileAccumulator]) -> Optional[dict]:
+    """프로파일링 중에는 잘못된 줄을 조용히 버리지 않고 경고로 받아 개수를 셈"""
+    if profile is None:
+        return read_options
+    return {**(read_options or {}), "on_bad_lines": "warn"}
+
+
+def profile_scheduler(scheduler: str, profile: Optional[ProfileAccumulator]) -> str:
+    """
+    프로파일링 중에는 processes 스케줄러 대신 threads 사용
+    (자식 프로세스의 ParserWarning 은 count_skipped_lines 에 잡히지 않아 건너뛴 줄이 0 으로 집계됨)
+    """
+    if profile is not None and scheduler == "processes":
+        logger.info("프로파일링 중에는 건너뛴 줄 집계를 위해 threads 스케줄러로 파싱")
+        return "threads"
+    return scheduler
+
+
+def _partition_accumulators(df: pd.DataFrame, distinct_modes, precision):
+    accumulators = build_accumulators(distinct_modes, precision)
+    for acc in accumulators.values():
+        acc.update(df)
+    return accumulators
+
+
+def _merge_all(parts):
+    merged = parts[0]
+    for part in parts[1:]:
+        merge_accumulators(merged, part)
+    return merged
+
+
+def compute_stats_dask(
+    path: str,
+    blocksize="64MB",
+    scheduler: str = "threads",
+    num_workers: int = 0,
+    distinct_modes: Optional[Dict[str, str]] = None,
+    hll_precision: int = DEFAULT_HLL_PRECISION,
+    read_options: Optional[dict] = None,
+) -> dict:
+    """
+    dask.dataframe 으로 CSV 를 blocksize 단위 파티션으로 나눠 읽고 METRICS 를 한 번에 계산
+    - 파티션마다 모든 지표의 누적기를 갱신하고, 부분 결과를 트리 형태로 병합하는 하나의 그래프
+    - 파티션 단위로 처리하므로 메모리 사용량은 대략 blocksize × 동시 작업 수
+    - scheduler: threads / processes / synchronous
+    - read_options: 스키마 계획에서 만든 read_csv 인자 (dtype, parse_dates, usecols 등)
+    """
+    ddf = dd.read_csv(path, blocksize=blocksize, **csv_read_kwargs(read_options))
+
+    partials = [
+        dask.delayed(_partition_accumulators)(part, distinct_modes, hll_precision) for part in ddf.to_delayed()
+    ]
+    while len(partials) > 1:
+        partials = [
+            dask.delayed(_merge_all)(partials[i:i + _MERGE_FAN_IN]) for i in range(0, len(partials), _MERGE_FAN_IN)
+        ]
+
+    options = {"scheduler": scheduler}
+    if num_workers > 0:
+        options["num_workers"] = num_workers
+    (accumulators,) = dask.compute(partials[0], **options)
+
+    logger.info(f"CSV 통계 계산 완료: partitions={ddf.npartitions}, scheduler={scheduler}")
+    return finalize_accumulators(accumulators)
+
+
+def iter_csv_partitions(
+    path: str,
+    blocksize="64MB",
+    scheduler: str = "threads",
+    num_workers: int = 0,
+    read_options: Optional[dict] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    dask.dataframe 파티션을 병렬로 파싱해 파일 순서대로 하나씩 반환
+    - 한 번에 num_workers(0 이면 CPU 코어 수) 개 파티션만 파싱 → 메모리 사용량은 대략 blocksize × 동시 작업 수
+    - 같은 파티션을 통계/Parquet 변환/프로파일에 함께 넘길 때 사용 (CSV 를 한 번만 파싱)
+    - dask 의 스키마 추론용 샘플 읽기는 호출 시점에 끝남 (이후 건너뛴 줄 집계에 샘플이 중복으로 잡히지 않음)
+    """
+    ddf = dd.read_csv(path, blocksize=blocksize, **csv_read_kwargs(read_options))
+    window = num_workers if num_workers > 0 else (os.cpu_count() or 1)
+    options = {"scheduler": scheduler}
+    if num_workers > 0:
+        options["num_workers"] = num_workers
+    parts = ddf.to_delayed()
+
+    def partitions():
+        for i in range(0, len(parts), window):
+            yield from dask.compute(*parts[i:i + window], **options)
+        logger.info(f"CSV 파티션 읽기 완료: partitions={ddf.npartitions}, scheduler={scheduler}")
+
+    return partitions()
+
+
+def compute_stats_stream(
+    fileobj,
+    chunksize: int = 200_000,
+    distinct_modes: Optional[Dict[str, str]] = None,
+    hll_precision: int = DEFAULT_HLL_PRECISION,
+    on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+    read_options: Optional[dict] = None,
+    profile: Optional[ProfileAccumulator] = None,
+) -> dict:
+    """
+    파일 객체(예: S3 StreamingBody)를 받는 대로 chunksize 행씩 파싱하며 누적기 갱신
+    - 전체 파일을 메모리/디스크에 두지 않음
+    - 고유값 지표를 hll 로 두면 메모리 사용량이 파일 크기/카디널리티와 무관
+    - on_chunk: 파싱된 청크를 함께 받을 콜백 (예: Parquet 변환을 같은 패스에서 처리)
+    - profile: 주면 같은 패스에서 데이터 품질 프로파일도 누적 (건너뛴 줄 수 포함)
+    """
+    reader = pd.read_csv(fileobj, chunksize=chunksize, **csv_read_kwargs(profile_read_options(read_options, profile)))
+    with reader, count_skipped_lines(profile):
+        return compute_stats_chunks(reader, distinct_modes, hll_precision, on_chunk, profile)
+
+
+def compute_stats_chunks(
+    chunks: Iterable[pd.DataFrame],
+    distinct_modes: Optional[Dict[str, str]] = None,
+    hll_precision: int = DEFAULT_HLL_PRECISION,
+    on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+    profile: Optional[ProfileAccumulator] = None,
+) -> dict:
+    """DataFrame 청크 스트림(CSV 파서, XLSX 행 읽기 등)으로 누적기 갱신 후 최종 통계 반환"""
+    accumulators, rows = accumulate_chunks(chunks, distinct_modes, hll_precision, on_chunk, profile)
+    logger.info(f"청크 통계 계산 완료: rows={rows}")
+    return finalize_accumulators(accumulators)
+
+
+def accumulate_chunks(
+    chunks: Iterable[pd.DataFrame],
+    distinct_modes: Optional[Dict[str, str]] = None,
+    hll_precision: int = DEFAULT_HLL_PRECISION,
+    on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+    profile: Optional[ProfileAccumulator] = None,
+) -> Tuple[dict, int]:
+    """청크 스트림 → (병합 가능한 누적기, 행 수). 최종 통계 대신 부분 결과가 필요할 때 사용 (분산 처리 등)"""
+    accumulators = build_accumulators(distinct_modes, hll_precision)
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for acc in accumulators.values():
+            acc.update(chunk)
+        if profile is not None:
+            profile.update(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+    return accumulators, rows
+
+
+def compute_stats_parquet(
+    path: str,
+    filesystem=None,
+    distinct_modes: Optional[Dict[str, str]] = None,
+    hll_precision: int = DEFAULT_HLL_PRECISION,
+) -> dict:
+    """
+    변환된 Parquet 에서 METRICS 다시 계산
+    - METRICS 에 필요한 컬럼만 읽음 (S3 에서는 해당 컬럼 청크만 범위 요청)
+    - 레코드 배치 단위로 누적하므로 메모리 사용량은 배치 크기 수준
+    """
+    dataset = pa_ds.dataset(path, filesystem=filesystem, format="parquet")
+    accumulators = build_accumulators(distinct_modes, hll_precision)
+    for batch in dataset.to_batches(columns=required_columns()):
+        chunk = batch.to_pandas()
+        for acc in accumulators.values():
+            acc.update(chunk)
+    return finalize_accumulators(accumulators)
+
+
+def compute_daily_states_parquet(
+    path: str,
+    date_column: str = "InvoiceDate",
+    distinct_modes: Optional[Dict[str, str]] = None,
+    hll_precision: int = DEFAULT_HLL_PRECISION,
+) -> Dict[Optional[date], Tuple[dict, int]]:
+    """
+    Parquet 을 날짜별로 나눠 METRICS 부분 결과 계산 (데이터셋 누적 통계용)
+    - 반환: {날짜: (누적기 상태, 행 수)}. 날짜가 없거나 파싱되지 않은 행은 None
+    """
+    dataset = pa_ds.dataset(path, format="parquet")
+    has_date = date_column in dataset.schema.names
+    columns = required_columns() + ([date_column] if has_date else [])
+
+    daily = DailyAccumulators(date_column, distinct_modes, hll_precision)
+    for batch in dataset.to_batches(columns=columns):
+        daily.update(batch.to_pandas())
+    return daily.states()
+
+
+class DailyAccumulators:
+    """청크를 날짜별로 나눠 METRICS 누적 (날짜 컬럼이 없거나 파싱되지 않은 행은 None)"""
+
+    def __init__(
+        self,
+        date_column: str = "InvoiceDate",
+        distinct_modes: Optional[Dict[str, str]] = None,
+        hll_precision: int = DEFAULT_HLL_PRECISION,
+    ):
+        self.date_column = date_column
+        self.distinct_modes = distinct_modes
+        self.hll_precision = hll_precision
+        self._daily: Dict[Optional[date], list] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        if self.date_column in chunk.columns:
+            days = pd.to_datetime(chunk[self.date_column], errors="coerce").dt.date
+        else:
+            days = pd.Series(None, index=chunk.index)
+        for day, part in chunk.groupby(days, dropna=False, sort=False):
+            key = None if pd.isna(day) else day
+            entry = self._daily.setdefault(key, [build_accumulators(self.distinct_modes, self.hll_precision), 0])
+            for acc in entry[0].values():
+                acc.update(part)
+            entry[1] += len(part)
+
+    def states(self) -> Dict[Optional[date], Tuple[dict, int]]:
+        return {day: (accumulators_to_state(accs), rows) for day, (accs, rows) in self._daily.items()}
@@ -0,0 +1,96 @@
+import io
+from typing import List, Tuple
+
+
+def plan_byte_ranges(size: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """파일 크기를 chunk_bytes 단위 [start, end) 구간으로 나눔 (마지막 구간은 짧을 수 있음)"""
+    if size <= 0:
+        return [(0, 0)]
+    chunk_bytes = max(int(chunk_bytes), 1)
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def range_read_offset(start: int) -> int:
+    """구간을 읽을 때 요청할 시작 위치 (앞 구간 경계의 줄바꿈 한 바이트를 포함해 줄 경계를 판별)"""
+    return max(start - 1, 0)
+
+
+class LineRangeReader(io.RawIOBase):
+    """
+    바이트 구간 [start, end) 에서 "시작 위치가 구간 안에 있는 줄" 만 반환하는 스트림
+    - body 는 range_read_offset(start) 부터의 원본 스트림 (예: S3 Range 요청 본문)
+    - 첫 줄바꿈까지는 버림: start=0 이면 헤더 행, 그 외에는 앞 구간에 속한 줄의 나머지
+    - end 를 넘긴 뒤에는 그 줄의 끝(줄바꿈)까지만 읽고 멈춤 → 인접 구간과 겹치거나 빠지는 줄 없음
+    - 따옴표 안의 줄바꿈(여러 줄 필드)은 지원하지 않음
+    """
+
+    def __init__(self, body, start: int, end: int, block_size: int = 1 << 20):
+        self._body = body
+        self._pos = range_read_offset(start)  # 다음에 body 에서 읽을 바이트의 절대 위치
+        self._end = end
+        self._block_size = block_size
+        self._buffer = b""
+        self._skipping = True  # 첫 줄바꿈까지 버리는 중
+        self._tail = False  # end 를 넘겨 마지막 줄의 끝을 찾는 중
+        self._done = start >= end
+
+    def readable(self):
+        return True
+
+    def _fill(self) -> bytes:
+        while not self._done:
+            block = self._body.read(self._block_size)
+            if not block:
+                self._done = True
+                return b""
+            block_start = self._pos
+            self._pos += len(block)
+
+            if self._skipping:
+                newline = block.find(b"\n")
+                if newline < 0:
+                    continue
+                self._skipping = False
+                block_start += newline + 1
+                block = block[newline + 1:]
+                if block_start >= self._end:
+                    # 구간 안에서 시작하는 줄이 없음
+                    self._done = True
+                    return b""
+                if not block:
+                    continue
+
+            if not self._tail:
+                if block_start + len(block) < self._end:
+                    return block
+                # 구간의 마지막 바이트(end - 1)까지 포함하는 지점에서 이후 처리 결정
+                self._tail = True
+                cut = self._end - block_start
+                head, block = block[:cut], block[cut:]
+                if head.endswith(b"\n"):
+                    self._done = True
+                    return head
+                newline = block.find(b"\n")
+                if newline >= 0:
+                    self._done = True
+                    return head + block[:newline + 1]
+                return head + block
+
+            newline = block.find(b"\n")
+            if newline >= 0:
+                self._done = True
+                return block[:newline + 1]
+            return block
+        return b""
+
+    def readinto(self, buffer):
+        if not self._buffer:
+            self._buffer = self._fill()
+        n = min(len(buffer), len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        self._body.close()
+        super().close()
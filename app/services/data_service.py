@@ -1,16 +1,41 @@
+import asyncio
+import hashlib
+import shutil
 import tempfile
-import dask
-import pandas as pd
 import numpy as np
 from io import BytesIO
-from PIL import Image
 from fastapi import HTTPException
 import os
+import re
 import logging
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from app.core.metrics import METRICS
+from app.core.config import settings
+from app.core.redis import redis_client_async, redis_client_sync
 from app.core.s3_manager import s3_manager
+from app.services.csv_convert import iter_xlsx_chunks
+from app.services.csv_engine import (
+    CSV_ENCODING,
+    compute_stats_chunks,
+    compute_stats_dask,
+    compute_stats_parquet,
+    compute_stats_stream,
+    count_skipped_lines,
+    iter_csv_partitions,
+    profile_read_options,
+    profile_scheduler,
+)
+from app.services.image_preprocess import ImagePreprocessor
+from app.services.inference_batcher import InferenceBatcher
+from app.services.inference_pool import InferencePool
+from app.services.model_registry import LoadedModel, ModelNotAvailable, ModelRegistry, ModelWarming, MODEL_UPDATE_CHANNEL
+from app.services.model_spec import ModelSpec
+from app.services.model_store import ModelStore
+from app.services.onnx_session import SessionConfig, create_session
+from app.services.prediction_cache import prediction_cache
+from app.services.schema_plan import header_fingerprint, load_plan, plan_read_options, read_header, widen_plan
 
 logger = logging.getLogger(__name__)
 
@@ -23,120 +48,397 @@ except ImportError:
     ort = None
 
 BASE_MODEL_DIR = os.path.abspath("app/data")
-ONNX_MODEL_PATH: Optional[str] = None
-session = None
+DEFAULT_CATEGORY = "bottle"
+_CATEGORY_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
 
-def initialize_onnx(category: str = 'bottle'):
-    global ONNX_MODEL_PATH, session
-    dir_to_check = BASE_MODEL_DIR
-    local_temp_path = None # 임시 파일 경로 초기화
+# process 모드에서 모든 카테고리가 공유하는 워커 풀
+_pool: Optional[InferencePool] = None
 
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# S3 ETag 기준 로컬 모델 캐시 (재시작 시 바뀌지 않은 모델은 다시 받지 않음)
+model_store = ModelStore(
+    s3_manager,
+    BASE_MODEL_DIR,
+    keep_versions=settings.MODEL_CACHE_KEEP_VERSIONS,
+    optimized_cache_dir=settings.ONNX_OPTIMIZED_CACHE_DIR and os.path.abspath(settings.ONNX_OPTIMIZED_CACHE_DIR),
+)
+
+def _resolve_model_path(category: str) -> Optional[str]:
+    """
+    S3 최신 모델의 로컬 캐시 경로 반환 (ETag 가 바뀐 경우에만 다운로드)
+    S3 실패 시 마지막으로 받은 로컬 모델 사용
+    """
+    s3_model_keys = [("float", f"models/{category}_latest.onnx")]
+    if settings.ONNX_PREFER_QUANTIZED:
+        # 학습 태스크가 정확도 검증 후 게시한 INT8 변형 우선
+        s3_model_keys.insert(0, ("int8", f"models/{category}_latest.int8.onnx"))
+
+    for variant, S3_MODEL_KEY in s3_model_keys:
+        try:
+            local_model_path = model_store.fetch(S3_MODEL_KEY, category, variant)
+            logger.info(f"사용 ONNX 모델 (S3 확인): {S3_MODEL_KEY}")
+            return local_model_path
+
+        except Exception:
+            logger.warning(f"S3에서 ONNX 모델 로드 실패: {S3_MODEL_KEY}")
+
+    logger.warning(f"'{category}' S3 모델 없음 (로컬 탐색 시도)")
+
+    # 로컬 대체도 같은 변형 우선순위 (ONNX_PREFER_QUANTIZED 가 꺼져 있으면 INT8 파일은 쓰지 않음)
+    latest = next(filter(None, (model_store.latest_local(category, variant) for variant, _ in s3_model_keys)), None)
+    if latest is None:
+        logger.warning(f"'{category}' ONNX 모델 파일 없음")
+        return None
+
+    logger.info(f"사용 ONNX 모델 (로컬 로드): {os.path.basename(latest)}")
+    return latest
+
+def _session_config(intra_op_threads: Optional[int] = None) -> SessionConfig:
+    return SessionConfig(
+        intra_op_threads=settings.ONNX_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads,
+        inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+        execution_mode=settings.ONNX_EXECUTION_MODE,
+        graph_optimization=settings.ONNX_GRAPH_OPTIMIZATION,
+        optimized_cache_dir=settings.ONNX_OPTIMIZED_CACHE_DIR and os.path.abspath(settings.ONNX_OPTIMIZED_CACHE_DIR),
+        warmup_runs=settings.ONNX_WARMUP_RUNS,
+    )
+
+def _open_model(category: str, model_path: str) -> LoadedModel:
+    """INFERENCE_BACKEND 에 따라 현재 프로세스 세션 또는 워커 풀로 모델 로드"""
     if ort is None:
-        logger.warning("onnxruntime 패키지 없음, 이미지 추론 비활성화")
+        raise RuntimeError("onnxruntime 패키지 없음")
+
+    if _pool is not None:
+        info = _pool.describe(model_path)
+        spec = ModelSpec.from_model_info(info["name"], info["shape"], info["metadata"])
         session = None
-        return
-    
-    # S3에서 최신 모델 로드
-    S3_MODEL_KEY = f"models/{category}_latest.onnx"
+    else:
+        session = create_session(model_path, _session_config())
+        spec = ModelSpec.from_session(session)
 
-    try:
-        # 임시 파일 생성
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".onnx") as tmp:
-            local_temp_path = tmp.name
-
-        # S3에서 파일 다운로드
-        s3_manager.download_file(S3_MODEL_KEY, local_temp_path)
-        
-        # 세션 생성
-        ONNX_MODEL_PATH = local_temp_path
-        session = ort.InferenceSession(ONNX_MODEL_PATH)
-        logger.info(f"사용 ONNX 모델 (S3 로드): {S3_MODEL_KEY}")
+    if spec.dtype != "float32":
+        logger.warning(f"지원하지 않는 입력 dtype: {spec.dtype} (float32 로 전달)")
+    logger.info(f"모델 입력 규격: {spec.width}x{spec.height}, labels={spec.labels}, version={spec.version or '-'}")
+
+    return LoadedModel(
+        category=category,
+        model_path=model_path,
+        # 예측 캐시 키에 포함되는 버전 (학습 시 기록된 버전, 없으면 모델 파일 해시)
+        version=spec.version or _file_digest(model_path),
+        spec=spec,
+        preprocessor=ImagePreprocessor.from_spec(spec),
+        size_bytes=os.path.getsize(model_path),
+        session=session,
+        pool=_pool,
+    )
+
+model_registry = ModelRegistry(
+    _resolve_model_path,
+    _open_model,
+    memory_budget=settings.MODEL_REGISTRY_MEMORY_MB * 1024 * 1024,
+    retry_failed_after=settings.MODEL_LOAD_RETRY_SECONDS,
+)
+
+def validate_category(category: str) -> str:
+    if not category or not _CATEGORY_PATTERN.match(category):
+        raise HTTPException(status_code=400, detail=f"잘못된 카테고리 이름: {category}")
+    return category
+
+def initialize_onnx(category: str = DEFAULT_CATEGORY):
+    """
+    워커 풀(process 모드) 시작 후 기본 카테고리 모델 로드를 백그라운드로 시작
+    로드가 끝날 때까지 해당 카테고리 요청은 ModelWarming (lifespan 을 막지 않음)
+    """
+    global _pool
+
+    if ort is None:
+        logger.warning("onnxruntime 패키지 없음, 이미지 추론 비활성화")
         return
 
-    except Exception:
-        logger.warning(f"S3에서 ONNX 모델 로드 실패: {S3_MODEL_KEY} (로컬 탐색 시도)")
-        session = None # 세션 초기화
+    if settings.INFERENCE_BACKEND == "process" and _pool is None:
+        _pool = InferencePool(
+            num_workers=settings.INFERENCE_WORKERS or os.cpu_count() or 1,
+            # 워커끼리 코어를 나눠 쓰도록 워커당 intra-op 스레드 수를 따로 지정
+            session_config=_session_config(settings.INFERENCE_WORKER_THREADS),
+            memory_budget=settings.MODEL_REGISTRY_MEMORY_MB * 1024 * 1024,
+        )
+        _pool.start()
+
+    model_registry.warm(category)
 
-        # 로컬 디렉터리에서 최신 모델 파일 탐색
-        if not os.path.isdir(dir_to_check):
-            logger.warning(f"모델 디렉토리 없음: {dir_to_check}")
-            return
+def model_status(category: str = DEFAULT_CATEGORY) -> str:
+    """ready / warming / failed / unloaded"""
+    return model_registry.status(category)
 
-        onnx_files = [f for f in os.listdir(dir_to_check) if f.endswith(".onnx")]
-        if not onnx_files:
-            logger.warning("ONNX 모델 파일 없음, 추론 비활성화")
-            return
+def shutdown_onnx():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
 
-        latest = max(onnx_files, key=lambda f: os.path.getctime(os.path.join(dir_to_check, f)))
-        ONNX_MODEL_PATH = os.path.join(dir_to_check, latest)
+async def watch_model_updates():
+    """학습 태스크의 모델 업데이트 알림을 구독해 로드된 카테고리 모델을 교체"""
+    while True:
+        pubsub = redis_client_async.pubsub()
         try:
-            session = ort.InferenceSession(ONNX_MODEL_PATH)
-            logger.info(f"사용 ONNX 모델 (로컬 로드): {ONNX_MODEL_PATH}")
-        except Exception:
-            logger.exception("ONNX InferenceSession 생성 실패 (로컬)")
-        
-    finally:
-        # 다운로드된 임시 파일은 세션 로드 후 즉시 삭제
-        if local_temp_path and os.path.exists(local_temp_path):
-             os.unlink(local_temp_path)
+            await pubsub.subscribe(MODEL_UPDATE_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                category = message.get("data")
+                if not model_registry.is_loaded(category):
+                    continue  # 아직 로드되지 않은 카테고리는 첫 요청 시 최신 모델을 받음
+                try:
+                    await asyncio.to_thread(model_registry.reload, category)
+                except ModelNotAvailable as e:
+                    logger.error(f"모델 교체 실패: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"모델 업데이트 구독 오류: {e} (5초 후 재시도)")
+            await asyncio.sleep(5)
+        finally:
+            await pubsub.aclose()
 
 # ----------------------------
 # 이미지 전처리 및 예측
 # ----------------------------
-def preprocess_image(file: BytesIO, target_size=(224, 224)) -> np.ndarray:
+_thread_buffers = threading.local()
+
+def preprocess_image(file: BytesIO, category: str = DEFAULT_CATEGORY) -> np.ndarray:
+    model = model_registry.get(category)
+    spec = model.spec
+    arr = np.empty((1, spec.height, spec.width, spec.channels), dtype=np.float32)
     try:
-        img = Image.open(file).convert("RGB").resize(target_size)
-        arr = np.array(img).astype(np.float32) / 255.0
-        arr = np.expand_dims(arr, axis=0)
+        model.preprocessor.decode_into(file, arr[0])
         return arr
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid image file: {e}")
 
-def predict_image(file: BytesIO) -> dict:
-    if session is None:
-        return {"prediction": "error", "confidence": 0.0, "error": "ONNX session not initialized"}
+@contextmanager
+def _batch_buffer(batch_size: int, model: LoadedModel):
+    """
+    배치 입력 버퍼와 실행 함수 제공
+    - 워커 풀 모드: 워커와 공유하는 공유 메모리 슬롯
+    - 스레드 모드: 스레드별로 재사용하는 배열 (필요 시에만 확장)
+    """
+    spec = model.spec
+    shape = (batch_size, spec.height, spec.width, spec.channels)
+    if model.pool is not None:
+        with model.pool.acquire() as slot:
+            buf = slot.ndarray(shape)
+
+            def run(n: int) -> np.ndarray:
+                return model.run(buf[:n], slot)
+            yield buf, run
+        return
+
+    buf = getattr(_thread_buffers, "buf", None)
+    if buf is None or buf.shape[0] < batch_size or buf.shape[1:] != shape[1:]:
+        buf = np.empty(shape, dtype=np.float32)
+        _thread_buffers.buf = buf
 
+    def run(n: int) -> np.ndarray:
+        return model.run(buf[:n])
+    yield buf, run
+
+def _predict_with(model: LoadedModel, files: List[BytesIO]) -> List[dict]:
+    results: List[Optional[dict]] = [None] * len(files)
+    with _batch_buffer(len(files), model) as (batch, run):
+        # 디코딩 결과를 배치 버퍼에 바로 기록
+        indices, errors = model.preprocessor(files, batch)
+        for i, detail in errors.items():
+            results[i] = {"prediction": "error", "confidence": 0.0, "error": detail}
+
+        if indices:
+            try:
+                preds = run(len(indices))
+                for i, pred in zip(indices, preds):
+                    results[i] = {"prediction": model.spec.label(int(np.argmax(pred))), "confidence": float(np.max(pred))}
+            except Exception as e:
+                for i in indices:
+                    results[i] = {"prediction": "error", "confidence": 0.0, "error": str(e)}
+    return results
+
+def predict_batch(files: List[BytesIO], category: str = DEFAULT_CATEGORY) -> List[dict]:
+    """여러 이미지를 한 번의 session.run 으로 추론 (입력 순서대로 결과 반환)"""
     try:
-        arr = preprocess_image(file)
-        input_name = session.get_inputs()[0].name
-        pred = session.run(None, {input_name: arr})[0]
-        idx = int(np.argmax(pred))
-        confidence = float(np.max(pred))
-        label_map = {0: "normal", 1: "defect"}  # 실제 라벨 필요 시 수정
-        return {"prediction": label_map.get(idx, "unknown"), "confidence": confidence}
-    except Exception as e:
+        # 배치 도중 모델이 교체되어도 같은 버전으로 끝까지 처리
+        with model_registry.use(category) as model:
+            return _predict_with(model, files)
+    except ModelNotAvailable as e:
+        return [{"prediction": "error", "confidence": 0.0, "error": str(e)} for _ in files]
+
+def predict_image(file: BytesIO, category: str = DEFAULT_CATEGORY) -> dict:
+    return predict_batch([file], category)[0]
+
+# ----------------------------
+# 추론 마이크로 배칭
+# ----------------------------
+# 카테고리마다 별도 배처 (한 배치는 한 모델로만 실행)
+_batchers: Dict[str, InferenceBatcher] = {}
+_batching_enabled = False
+
+def _make_batch_runner(category: str):
+    def run(items: List[bytes]) -> List[dict]:
+        return predict_batch([BytesIO(b) for b in items], category)
+    return run
+
+async def _get_batcher(category: str) -> InferenceBatcher:
+    batcher = _batchers.get(category)
+    if batcher is None:
+        batcher = InferenceBatcher(
+            _make_batch_runner(category),
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            # 워커 풀 모드에서는 워커 수만큼 배치를 동시에 실행
+            max_concurrency=_pool.num_workers if _pool is not None else 1,
+        )
+        _batchers[category] = batcher
+        await batcher.start()
+    return batcher
+
+async def start_inference_batcher():
+    global _batching_enabled
+    _batching_enabled = True
+
+async def stop_inference_batcher():
+    global _batching_enabled
+    _batching_enabled = False
+    for batcher in list(_batchers.values()):
+        await batcher.stop()
+    _batchers.clear()
+
+async def predict_image_async(file_bytes: bytes, category: str = DEFAULT_CATEGORY) -> dict:
+    """
+    동일 이미지(내용 해시 + 카테고리 모델 버전)는 캐시 결과 반환
+    캐시 미스 시 배처가 동작 중이면 배치 큐로, 아니면 스레드에서 단건 추론
+    모델이 아직 로드 중이면 기다리지 않고 ModelWarming 을 그대로 전달
+    """
+    try:
+        model = model_registry.try_get(category)
+    except ModelNotAvailable as e:
         return {"prediction": "error", "confidence": 0.0, "error": str(e)}
 
+    cache_key = prediction_cache.make_key(file_bytes, f"{category}:{model.version}")
+    cached = await prediction_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if _batching_enabled:
+        result = await (await _get_batcher(category)).submit(file_bytes)
+    else:
+        result = await asyncio.to_thread(predict_image, BytesIO(file_bytes), category)
+
+    if result.get("prediction") != "error":
+        await prediction_cache.set(cache_key, result)
+    return result
+
+def check_model_ready(category: str = DEFAULT_CATEGORY):
+    """
+    모델이 로드 중이면 ModelWarming (스트리밍 응답을 시작하기 전에 확인)
+    모델이 없는 경우는 항목별 오류 결과로 처리되므로 여기서는 통과
+    """
+    try:
+        model_registry.try_get(category)
+    except ModelNotAvailable:
+        pass
+
+async def predict_images_stream(
+    items: Sequence[bytes], category: str = DEFAULT_CATEGORY
+) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    여러 이미지를 배처(+캐시)로 동시에 추론하고 끝나는 순서대로 (입력 인덱스, 결과) 반환
+    배처 대기열에 한 번에 넣는 수는 배치 크기의 몇 배로 제한
+    """
+    limit = asyncio.Semaphore(max(1, settings.INFERENCE_MAX_BATCH_SIZE) * 4)
+
+    async def run(i: int, data: bytes):
+        async with limit:
+            try:
+                return i, await predict_image_async(data, category)
+            except ModelWarming as e:
+                # 처리 도중 모델이 해제되어 다시 로드 중인 경우
+                return i, {"prediction": "error", "confidence": 0.0, "error": str(e)}
+
+    tasks = [asyncio.create_task(run(i, data)) for i, data in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # 클라이언트 연결이 끊기면 남은 추론 취소
+        for task in tasks:
+            task.cancel()
+
+def get_inference_stats() -> dict:
+    return {
+        "registry": model_registry.stats(),
+        "batchers": {category: dict(b.stats) for category, b in _batchers.items()},
+        "cache": prediction_cache.stats(),
+    }
+
 # ----------------------------
 # CSV 처리
 # ----------------------------
 _latest_csv_stats = {}
 
-def process_csv(file: BytesIO) -> dict:
+def _cached_plan(header: Sequence[str]) -> Optional[dict]:
+    """헤더 지문으로 캐시된 스키마 계획 (없거나 조회 실패 시 None)"""
+    if not settings.CSV_SCHEMA_PLAN_ENABLED or not header:
+        return None
+    try:
+        return load_plan(redis_client_sync, header_fingerprint(header))
+    except Exception as e:
+        logger.warning(f"스키마 계획 조회 실패: {e}")
+        return None
+
+def process_csv(file, read_options: Optional[dict] = None) -> dict:
+    """
+    CSV 통계 계산 (Dask 파티션 엔진, METRICS 를 한 번의 그래프 실행으로 계산)
+    file: 파일 객체 또는 로컬 파일 경로. 파일 객체는 임시 파일로 나눠 복사한 뒤 처리
+    read_options: 스키마 계획에서 만든 read_csv 인자 (schema_plan.plan_read_options)
+                  없으면 헤더 지문으로 캐시된 계획을 찾아 METRICS 에 필요한 컬럼만 읽음 (Parquet 변환 없이 통계만 냄)
+    """
     global _latest_csv_stats
     tmp = None
     try:
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
-        tmp.write(file.read())
-        tmp.flush()
-        tmp.close()
-
-        df = pd.read_csv(tmp.name, encoding="ISO-8859-1", on_bad_lines="skip", dtype={"InvoiceNo": "object"})
-
-        # METRICS 기반 계산
-        metrics = {k: f(df) for k, f in METRICS.items()}
-        # Dask compute
-        keys, tasks = zip(*[(k, v) for k, v in metrics.items() if v is not None])
-        results = dask.compute(*tasks)
-
-        stats = {}
-        for k, v in zip(keys, results):
-            if isinstance(v, (np.integer, np.int64)):
-                stats[k] = int(v)
-            elif isinstance(v, (np.floating, np.float64)):
-                stats[k] = float(v)
-            else:
-                stats[k] = v
+        if isinstance(file, (str, os.PathLike)):
+            path = os.fspath(file)
+        else:
+            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
+            shutil.copyfileobj(file, tmp, 1 << 20)
+            tmp.close()
+            path = tmp.name
+
+        def run(options):
+            return compute_stats_dask(
+                path,
+                blocksize=settings.CSV_DASK_BLOCKSIZE,
+                scheduler=settings.CSV_DASK_SCHEDULER,
+                num_workers=settings.CSV_DASK_WORKERS,
+                distinct_modes=settings.CSV_DISTINCT_MODES,
+                hll_precision=settings.CSV_HLL_PRECISION,
+                read_options=options,
+            )
+
+        if read_options is not None:
+            stats = run(read_options)
+        else:
+            header = read_header(path, CSV_ENCODING)
+            plan = _cached_plan(header)
+            try:
+                stats = run(plan_read_options(plan, header, metrics_only=True))
+            except Exception:
+                if plan is None:
+                    raise
+                logger.warning("스키마 계획으로 읽기 실패, 추론 모드로 재시도", exc_info=True)
+                stats = run(plan_read_options(widen_plan(plan), header, metrics_only=True))
 
         _latest_csv_stats = stats
         return stats
@@ -147,5 +449,70 @@ def process_csv(file: BytesIO) -> dict:
         if tmp:
             os.unlink(tmp.name)
 
+def process_csv_stream(fileobj, on_chunk=None, read_options: Optional[dict] = None, profile=None) -> dict:
+    """
+    스트림(S3 본문 등)을 청크 단위로 파싱해 CSV 통계 계산 (임시 파일/전체 버퍼 없음)
+    on_chunk 가 있으면 파싱된 청크를 같은 패스에서 함께 전달 (Parquet 변환 등)
+    profile(ProfileAccumulator) 이 있으면 같은 패스에서 데이터 품질 프로파일도 누적
+    """
+    global _latest_csv_stats
+    stats = compute_stats_stream(
+        fileobj,
+        chunksize=settings.CSV_STREAM_CHUNK_ROWS,
+        distinct_modes=settings.CSV_DISTINCT_MODES,
+        hll_precision=settings.CSV_HLL_PRECISION,
+        on_chunk=on_chunk,
+        read_options=read_options,
+        profile=profile,
+    )
+    _latest_csv_stats = stats
+    return stats
+
+def process_csv_partitions(path: str, on_chunk=None, read_options: Optional[dict] = None, profile=None) -> dict:
+    """
+    로컬 CSV 를 Dask 파티션 단위로 병렬 파싱해 통계 계산
+    같은 파티션을 on_chunk(Parquet 변환 등)와 profile 에도 넘겨 CSV 를 한 번만 파싱
+    """
+    global _latest_csv_stats
+    partitions = iter_csv_partitions(
+        path,
+        blocksize=settings.CSV_DASK_BLOCKSIZE,
+        scheduler=profile_scheduler(settings.CSV_DASK_SCHEDULER, profile),
+        num_workers=settings.CSV_DASK_WORKERS,
+        read_options=profile_read_options(read_options, profile),
+    )
+    with count_skipped_lines(profile):
+        stats = compute_stats_chunks(
+            partitions,
+            distinct_modes=settings.CSV_DISTINCT_MODES,
+            hll_precision=settings.CSV_HLL_PRECISION,
+            on_chunk=on_chunk,
+            profile=profile,
+        )
+    _latest_csv_stats = stats
+    return stats
+
+def process_xlsx(source, on_chunk=None, profile=None) -> dict:
+    """XLSX 를 행 스트리밍으로 읽어 CSV 와 같은 누적기로 통계 계산 (CSV 텍스트 변환 없음)"""
+    global _latest_csv_stats
+    stats = compute_stats_chunks(
+        iter_xlsx_chunks(source, chunksize=settings.CSV_STREAM_CHUNK_ROWS),
+        distinct_modes=settings.CSV_DISTINCT_MODES,
+        hll_precision=settings.CSV_HLL_PRECISION,
+        on_chunk=on_chunk,
+        profile=profile,
+    )
+    _latest_csv_stats = stats
+    return stats
+
+def process_parquet(s3_key: str) -> dict:
+    """변환된 Parquet(S3) 에서 필요한 컬럼만 읽어 CSV 통계 다시 계산"""
+    return compute_stats_parquet(
+        s3_manager.arrow_path(s3_key),
+        filesystem=s3_manager.arrow_filesystem(),
+        distinct_modes=settings.CSV_DISTINCT_MODES,
+        hll_precision=settings.CSV_HLL_PRECISION,
+    )
+
 def get_latest_csv_stats() -> dict:
     return _latest_csv_stats if _latest_csv_stats else {}
\ No newline at end of file
@@ -0,0 +1,182 @@
+import hashlib
+import io
+import json
+import logging
+import posixpath
+import time
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from app.services.image_archive import is_image
+
+logger = logging.getLogger(__name__)
+
+# 파일 목록 manifest 는 학습 경로({그룹}) 아래 _manifest/ 에 버전별로 저장하고 latest.json 에 최신본 복사
+MANIFEST_DIR = "_manifest"
+LATEST_NAME = "latest.json"
+SCHEMA_VERSION = 1
+
+
+def manifest_prefix(base: str) -> str:
+    return f"{base}/{MANIFEST_DIR}" if base else MANIFEST_DIR
+
+
+def latest_manifest_key(base: str) -> str:
+    return f"{manifest_prefix(base)}/{LATEST_NAME}"
+
+
+def normalize_path(path: str) -> str:
+    """압축 파일 안 경로 정규화 ('./a/b.png', '/a/b.png' → 'a/b.png')"""
+    return posixpath.normpath(path).lstrip("/")
+
+
+def split_label(path: str, label_names: Sequence[str]) -> Optional[Tuple[str, int]]:
+    """
+    압축 파일 안 경로 → (그룹, 라벨 인덱스). 라벨 이름과 같은 디렉터리 중 가장 깊은 것 기준
+    예: 'bottle/train/good/000.png' → ('bottle/train', 0). 라벨 디렉터리가 없거나 '..' 로 밖을 가리키면 None
+    """
+    parts = normalize_path(path).split("/")[:-1]
+    if ".." in parts:
+        return None
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] in label_names:
+            return "/".join(parts[:i]), list(label_names).index(parts[i])
+    return None
+
+
+def tee_images(
+    members: Iterable[Tuple[str, BinaryIO]], *consumers: Callable[[str, bytes], object]
+) -> Iterator[Tuple[str, BinaryIO]]:
+    """(이름, 스트림) 을 그대로 넘기면서 이미지는 바이트로 읽어 consumers 에도 전달 (원본 업로드와 같은 한 번의 읽기)"""
+    for name, stream in members:
+        if not is_image(name):
+            yield name, stream
+            continue
+        data = stream.read()
+        for consume in consumers:
+            consume(name, data)
+        yield name, io.BytesIO(data)
+
+
+# -----------------------------
+# 데이터셋 준비 측: manifest 생성
+# -----------------------------
+class ManifestBuilder:
+    """
+    데이터셋 준비 중 라벨이 있는 이미지의 목록을 그룹(학습 경로)별로 수집
+    항목: path(압축 내 경로), key(S3 키), label, size, md5(단일 업로드 ETag 와 같음), width, height
+    """
+
+    def __init__(self, base_prefix: str, label_names: Sequence[str], source: str = ""):
+        self.base_prefix = base_prefix
+        self.label_names = list(label_names)
+        self.source = source
+        self._files: Dict[str, List[dict]] = {}
+
+    def _group_base(self, group: str) -> str:
+        return f"{self.base_prefix}/{group}" if group else self.base_prefix
+
+    def add(self, path: str, data: bytes) -> bool:
+        found = split_label(path, self.label_names)
+        if found is None:
+            return False
+        group, label = found
+        try:
+            # 헤더만 읽어 크기 확인 (디코딩 없음)
+            width, height = Image.open(io.BytesIO(data)).size
+        except Exception as e:
+            logger.warning(f"manifest 에서 제외된 이미지: {path} ({e})")
+            return False
+        path = normalize_path(path)
+        self._files.setdefault(group, []).append({
+            "path": path,
+            "key": f"{self.base_prefix}/{path}",
+            "label": self.label_names[label],
+            "size": len(data),
+            "md5": hashlib.md5(data).hexdigest(),
+            "width": width,
+            "height": height,
+        })
+        return True
+
+    def build(self, version: Optional[str] = None) -> Dict[str, dict]:
+        """{그룹 경로: manifest}"""
+        version = version or time.strftime("%Y%m%d%H%M%S")
+        manifests = {}
+        for group, files in self._files.items():
+            label_counts: Dict[str, int] = {}
+            for entry in files:
+                label_counts[entry["label"]] = label_counts.get(entry["label"], 0) + 1
+            manifests[self._group_base(group)] = {
+                "schema": SCHEMA_VERSION,
+                "version": version,
+                "source": self.source,
+                "labels": self.label_names,
+                "total": len(files),
+                "label_counts": label_counts,
+                "files": sorted(files, key=lambda e: e["path"]),
+            }
+        return manifests
+
+
+def save_manifest(s3_manager, base: str, manifest: dict):
+    """버전별 파일을 먼저 쓰고 latest.json 을 마지막에 교체 (읽는 쪽은 항상 완성된 manifest 를 봄)"""
+    body = json.dumps(manifest).encode()
+    s3_manager.upload_fileobj(io.BytesIO(body), manifest_prefix(base), f"{manifest['version']}.json")
+    s3_manager.upload_fileobj(io.BytesIO(body), manifest_prefix(base), LATEST_NAME)
+
+
+# -----------------------------
+# 학습 측: 읽기 / 표본 / 분할
+# -----------------------------
+def load_manifest(s3_manager, base: str) -> Optional[dict]:
+    """학습 경로의 최신 manifest (GET 한 번, 없으면 None)"""
+    body = s3_manager.read_optional(latest_manifest_key(base))
+    if body is None:
+        return None
+    manifest = json.loads(body.getvalue())
+    if manifest.get("schema") != SCHEMA_VERSION:
+        logger.warning(f"지원하지 않는 manifest 스키마: {manifest.get('schema')} ({base})")
+        return None
+    return manifest
+
+
+def _rank(entry: dict, seed: int) -> str:
+    # 경로 해시 순서 → 같은 seed 면 파일이 추가/삭제돼도 기존 파일의 순서가 유지됨
+    return hashlib.blake2b(f"{seed}:{entry['path']}".encode(), digest_size=8).hexdigest()
+
+
+def _by_label(entries: Iterable[dict], seed: int) -> Dict[str, List[dict]]:
+    groups: Dict[str, List[dict]] = {}
+    for entry in entries:
+        groups.setdefault(entry["label"], []).append(entry)
+    return {label: sorted(items, key=lambda e: _rank(e, seed)) for label, items in sorted(groups.items())}
+
+
+def stratified_sample(entries: Sequence[dict], size: int, seed: int = 42) -> List[dict]:
+    """라벨 비율을 유지해 size 개 표본 (라벨마다 최소 1개). size 가 전체 이상이면 전체"""
+    if size <= 0 or len(entries) <= size:
+        return list(entries)
+    picked = []
+    for items in _by_label(entries, seed).values():
+        n = max(1, round(size * len(items) / len(entries)))
+        picked.extend(items[:n])
+    return sorted(picked, key=lambda e: e["path"])
+
+
+def train_val_split(entries: Sequence[dict], val_fraction: float, seed: int = 42) -> Tuple[List[dict], List[dict]]:
+    """
+    라벨별로 val_fraction 만큼 검증용으로 분리 (라벨에 2개 이상 있을 때 최소 1개)
+    경로 해시 순서로 고르므로 같은 데이터셋이면 실행마다 같은 분할
+    """
+    train, val = [], []
+    if val_fraction <= 0:
+        return list(entries), val
+    for items in _by_label(entries, seed).values():
+        n = round(len(items) * val_fraction)
+        if n == 0 and len(items) > 1:
+            n = 1
+        val.extend(items[:n])
+        train.extend(items[n:])
+    return train, val
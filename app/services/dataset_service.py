@@ -0,0 +1,122 @@
+import logging
+import re
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+from fastapi import HTTPException
+
+from app.core.metrics import (
+    accumulators_from_state,
+    accumulators_to_state,
+    finalize_accumulators,
+    merge_accumulators,
+)
+from app.integrations.django_bridge import get_dataset_models, get_upload_record_model
+
+logger = logging.getLogger(__name__)
+
+Dataset, DatasetPartial = get_dataset_models()
+UploadRecord = get_upload_record_model()
+
+_DATASET_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+
+
+def get_or_create_dataset(name: str):
+    if not _DATASET_NAME_PATTERN.match(name or ""):
+        raise HTTPException(status_code=400, detail=f"잘못된 데이터셋 이름: {name}")
+    dataset, _ = Dataset.objects.get_or_create(name=name)
+    return dataset
+
+
+def _merge_state(current: dict, incoming: dict) -> dict:
+    merged = merge_accumulators(accumulators_from_state(current), accumulators_from_state(incoming))
+    return accumulators_to_state(merged)
+
+
+def fold_upload(record_id: int, daily: Dict[Optional[date], Tuple[dict, int]]) -> bool:
+    """
+    업로드 1건의 일별 부분 결과를 데이터셋 상태에 합침
+    - 데이터셋 행을 잠가 같은 데이터셋에 대한 동시 반영을 직렬화
+    - folded_at 으로 같은 업로드가 두 번 반영되지 않도록 함 (재시도 안전)
+    """
+    with transaction.atomic():
+        record = UploadRecord.objects.select_for_update().get(id=record_id)
+        if record.dataset_id is None or record.folded_at is not None:
+            return False
+        dataset = Dataset.objects.select_for_update().get(id=record.dataset_id)
+
+        existing = {p.day: p for p in DatasetPartial.objects.filter(dataset=dataset, day__in=[d for d in daily if d])}
+        if None in daily:
+            undated = DatasetPartial.objects.filter(dataset=dataset, day__isnull=True).first()
+            if undated is not None:
+                existing[None] = undated
+
+        created, updated = [], []
+        for day, (state, rows) in daily.items():
+            partial = existing.get(day)
+            if partial is None:
+                created.append(DatasetPartial(dataset=dataset, day=day, state=state, row_count=rows))
+            else:
+                partial.state = _merge_state(partial.state, state)
+                partial.row_count += rows
+                partial.updated_at = timezone.now()
+                updated.append(partial)
+
+        DatasetPartial.objects.bulk_create(created)
+        DatasetPartial.objects.bulk_update(updated, ["state", "row_count", "updated_at"])
+
+        record.folded_at = timezone.now()
+        record.save(update_fields=["folded_at"])
+
+    logger.info(f"데이터셋 '{dataset.name}' 에 업로드 {record_id} 반영: 새 날짜 {len(created)}, 갱신 {len(updated)}")
+    return True
+
+
+def dataset_stats(name: str, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    """
+    기간 [start, end] 의 일별 부분 결과를 병합해 통계 계산 (원본 파일은 다시 읽지 않음)
+    기간을 지정하지 않으면 날짜 없는 행까지 포함한 전체 누적 통계
+    """
+    try:
+        dataset = Dataset.objects.get(name=name)
+    except Dataset.DoesNotExist:
+        raise HTTPException(status_code=404, detail=f"데이터셋 없음: {name}")
+
+    partials = DatasetPartial.objects.filter(dataset=dataset)
+    if start is not None:
+        partials = partials.filter(day__gte=start)
+    if end is not None:
+        partials = partials.filter(day__lte=end)
+
+    merged = None
+    rows = days = 0
+    for partial in partials.order_by("day").iterator():
+        accumulators = accumulators_from_state(partial.state)
+        merged = accumulators if merged is None else merge_accumulators(merged, accumulators)
+        rows += partial.row_count
+        days += 1 if partial.day is not None else 0
+
+    return {
+        "dataset": dataset.name,
+        "start": start,
+        "end": end,
+        "days": days,
+        "rows": rows,
+        "uploads": dataset.uploads.filter(folded_at__isnull=False).count(),
+        "statistics": finalize_accumulators(merged) if merged is not None else {},
+    }
+
+
+def list_datasets() -> list:
+    result = []
+    for dataset in Dataset.objects.order_by("name"):
+        days = dataset.partials.exclude(day__isnull=True).order_by("day").values_list("day", flat=True)
+        result.append({
+            "name": dataset.name,
+            "created_at": dataset.created_at,
+            "first_day": days.first(),
+            "last_day": days.last(),
+        })
+    return result
@@ -0,0 +1,95 @@
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+def _is_data_file(filename: str, extensions) -> bool:
+    name = os.path.basename(filename)
+    # macOS 압축 메타데이터(__MACOSX/, ._*)와 숨김 파일 제외
+    return (
+        name.lower().endswith(extensions)
+        and not name.startswith(".")
+        and "__MACOSX" not in filename
+    )
+
+
+def is_dataset_file(filename: str) -> bool:
+    """압축 해제 시 올릴 파일 (확장자 무관, 압축 메타데이터/숨김 파일만 제외)"""
+    return _is_data_file(filename, "")
+
+
+def is_image(filename: str) -> bool:
+    return _is_data_file(filename, IMAGE_EXTENSIONS)
+
+
+def is_csv(filename: str) -> bool:
+    return _is_data_file(filename, (".csv",))
+
+
+def is_archive(filename: str) -> bool:
+    return (filename or "").lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def iter_archive_members(
+    fileobj: BinaryIO, filename: str, accept: Callable[[str], bool]
+) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    압축 파일(zip / tar / tar.gz) 안에서 accept(경로) 가 참인 파일을 (경로, 읽기 스트림) 으로 하나씩 반환
+    스트림은 다음 항목으로 넘어가기 전까지만 유효 (tar 는 순차 읽기)
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and accept(info.filename):
+                    with zf.open(info) as member:
+                        yield info.filename, member
+        return
+
+    # r|* : 스트림 모드로 순차 읽기 (압축 형식 자동 판별)
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+        for member in tf:
+            if member.isfile() and accept(member.name):
+                yield member.name, tf.extractfile(member)
+
+
+def _read_limited(stream: BinaryIO, name: str, max_file_bytes: int, remaining: Optional[int]) -> bytes:
+    """최대 한도+1 바이트만 읽어 초과 여부 판단 (큰 파일/압축 폭탄을 끝까지 읽지 않음)"""
+    limit = max_file_bytes if remaining is None else min(max_file_bytes, remaining)
+    data = stream.read(limit + 1)
+    if len(data) > limit:
+        if limit == max_file_bytes:
+            raise ValueError(f"이미지 한 장의 크기는 최대 {max_file_bytes} 바이트입니다: {name}")
+        raise ValueError("한 번에 처리할 수 있는 이미지 전체 크기를 초과했습니다.")
+    return data
+
+
+def collect_upload_images(
+    uploads: Iterable[Tuple[str, BinaryIO]],
+    max_files: int,
+    max_file_bytes: int,
+    max_total_bytes: Optional[int] = None,
+) -> List[Tuple[str, bytes]]:
+    """
+    업로드된 이미지 파일들 / 압축 파일을 (파일명, 바이트) 목록으로 정리
+    - 압축 파일은 안의 이미지만 꺼냄
+    - max_files 개수, 파일당 max_file_bytes, 합계 max_total_bytes 초과 시 ValueError
+    """
+    items: List[Tuple[str, bytes]] = []
+    total = 0
+    for filename, fileobj in uploads:
+        if is_archive(filename):
+            entries = iter_archive_members(fileobj, filename, is_image)
+        else:
+            entries = [(filename, fileobj)]
+        for name, stream in entries:
+            if len(items) >= max_files:
+                raise ValueError(f"한 번에 처리할 수 있는 이미지는 최대 {max_files}개입니다.")
+            remaining = None if max_total_bytes is None else max_total_bytes - total
+            data = _read_limited(stream, name, max_file_bytes, remaining)
+            total += len(data)
+            items.append((name, data))
+    return items
@@ -0,0 +1,81 @@
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+def decode_into(
+    file: BytesIO,
+    out: np.ndarray,
+    target_size: Tuple[int, int],
+    mul: np.ndarray = _SCALE,
+    add: Optional[np.ndarray] = None,
+):
+    """
+    이미지 1장을 디코딩해 정규화된 float32 값을 out (H, W, 3) 에 바로 기록
+    - JPEG 은 draft 로 DCT 단계에서 축소 디코딩 (목표 크기 이상 중 가장 작은 배율)
+    - 큰 축소는 reducing_gap 으로 reduce() 후 리샘플링
+    - out = pixel * mul (+ add)
+    """
+    img = Image.open(file)
+    if img.format == "JPEG":
+        img.draft("RGB", target_size)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if img.size != tuple(target_size):
+        img = img.resize(target_size, Image.BILINEAR, reducing_gap=2.0)
+    # uint8 → float32 변환과 정규화를 한 번에 수행해 out 에 기록 (중간 배열 없음)
+    np.multiply(np.asarray(img), mul, out=out, dtype=np.float32)
+    if add is not None:
+        np.add(out, add, out=out)
+
+
+class ImagePreprocessor:
+    """
+    모델 입력 규격에 맞춘 전처리기
+    - (pixel * scale - mean) / std 를 mul/add 상수로 미리 접어 둠
+    - 평균/표준편차가 기본값이면 곱셈 한 번으로 끝남
+    """
+
+    def __init__(self, target_size: Tuple[int, int], scale: float = 1.0 / 255.0, mean=None, std=None):
+        self.target_size = tuple(target_size)
+        mean = np.asarray(mean if mean is not None else [0.0, 0.0, 0.0], dtype=np.float32)
+        std = np.asarray(std if std is not None else [1.0, 1.0, 1.0], dtype=np.float32)
+
+        mul = np.float32(scale) / std
+        add = -mean / std
+        self._mul = np.float32(mul[0]) if np.all(mul == mul[0]) else mul.astype(np.float32)
+        self._add = add.astype(np.float32) if np.any(add) else None
+
+    @classmethod
+    def from_spec(cls, spec) -> "ImagePreprocessor":
+        return cls(spec.target_size, scale=spec.scale, mean=spec.mean, std=spec.std)
+
+    def decode_into(self, file: BytesIO, out: np.ndarray):
+        decode_into(file, out, self.target_size, self._mul, self._add)
+
+    def __call__(self, files: Sequence[BytesIO], out: np.ndarray) -> Tuple[List[int], Dict[int, str]]:
+        """
+        여러 이미지를 미리 할당된 배치 버퍼 out (N, H, W, 3) 에 앞에서부터 채움
+        - 디코딩 실패한 항목은 건너뛰고 오류 메시지로 반환
+        - 반환: (out 에 기록된 순서대로의 입력 인덱스, {입력 인덱스: 오류})
+        """
+        ok: List[int] = []
+        errors: Dict[int, str] = {}
+        for i, file in enumerate(files):
+            try:
+                self.decode_into(file, out[len(ok)])
+                ok.append(i)
+            except Exception as e:
+                errors[i] = f"Invalid image file: {e}"
+        return ok, errors
+
+
+def preprocess_images(
+    files: Sequence[BytesIO], out: np.ndarray, target_size: Tuple[int, int]
+) -> Tuple[List[int], Dict[int, str]]:
+    """기본 정규화(/255)로 여러 이미지를 out 에 채움 (ImagePreprocessor 참고)"""
+    return ImagePreprocessor(target_size)(files, out)
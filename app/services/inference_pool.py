@@ -0,0 +1,203 @@
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.onnx_session import SessionConfig, create_session
+
+logger = logging.getLogger(__name__)
+
+
+# 워밍업 작업이 모든 워커에 하나씩 배정될 때까지 기다리는 최대 시간 (초)
+_WARM_TIMEOUT = 60
+
+
+def run_onnx(sess, arr: np.ndarray) -> np.ndarray:
+    """
+    세션 1회 실행. 배치 차원이 고정(예: 1, 8)된 모델은 고정 크기 단위로 나눠 실행
+    고정 크기보다 작은 마지막 묶음은 0 으로 채워 실행한 뒤 결과에서 잘라냄
+    """
+    input_meta = sess.get_inputs()[0]
+    batch_dim = input_meta.shape[0]
+    if isinstance(batch_dim, int) and batch_dim > 0 and batch_dim != arr.shape[0]:
+        outputs = []
+        for i in range(0, arr.shape[0], batch_dim):
+            chunk = arr[i:i + batch_dim]
+            count = chunk.shape[0]
+            if count < batch_dim:
+                padding = np.zeros((batch_dim - count,) + chunk.shape[1:], dtype=chunk.dtype)
+                chunk = np.concatenate([chunk, padding])
+            outputs.append(sess.run(None, {input_meta.name: chunk})[0][:count])
+        return np.concatenate(outputs)
+    return sess.run(None, {input_meta.name: arr})[0]
+
+
+# ----------------------------
+# 워커 프로세스 측
+# ----------------------------
+_worker_config: Optional[SessionConfig] = None
+_worker_memory_budget = 0
+_worker_sessions: "OrderedDict[str, tuple]" = OrderedDict()  # model_path -> (session, size)
+_worker_shm: dict = {}
+_worker_barrier = None
+
+
+def _init_worker(config: SessionConfig, memory_budget: int, barrier):
+    global _worker_config, _worker_memory_budget, _worker_barrier
+    _worker_config = config
+    _worker_memory_budget = memory_budget
+    # 워밍업 동기화용 (spawn 워커에는 생성 시점에만 넘길 수 있어 initializer 로 전달)
+    _worker_barrier = barrier
+
+
+def _get_session(model_path: str):
+    """워커별 세션 캐시. 모델 경로는 버전마다 달라서 교체된 모델은 새로 로드됨"""
+    entry = _worker_sessions.get(model_path)
+    if entry is not None:
+        _worker_sessions.move_to_end(model_path)
+        return entry[0]
+
+    sess = create_session(model_path, _worker_config)
+    _worker_sessions[model_path] = (sess, os.path.getsize(model_path))
+    # 메모리 예산 초과 시 오래 쓰지 않은 모델부터 해제 (방금 로드한 모델은 유지)
+    while len(_worker_sessions) > 1 and sum(size for _, size in _worker_sessions.values()) > _worker_memory_budget:
+        _worker_sessions.popitem(last=False)
+    return sess
+
+
+def _attach(name: str) -> SharedMemory:
+    shm = _worker_shm.get(name)
+    if shm is None:
+        # 슬롯 교체로 더 이상 쓰이지 않는 매핑 정리
+        if len(_worker_shm) >= 8:
+            for stale in _worker_shm.values():
+                stale.close()
+            _worker_shm.clear()
+        # spawn 워커는 부모의 resource tracker 를 공유하므로 unlink 는 부모(_Slot.release)가 담당
+        shm = SharedMemory(name=name)
+        _worker_shm[name] = shm
+    return shm
+
+
+def _describe_worker(model_path: str) -> dict:
+    sess = _get_session(model_path)
+    input_meta = sess.get_inputs()[0]
+    return {
+        "name": input_meta.name,
+        "shape": list(input_meta.shape),
+        "metadata": dict(sess.get_modelmeta().custom_metadata_map),
+    }
+
+
+def _warm_worker(model_path: str) -> dict:
+    """
+    모델을 로드한 뒤 모든 워커가 같은 작업을 받을 때까지 대기
+    → 이 작업을 끝내지 못한 워커는 다음 워밍업 작업을 가져갈 수 없으므로 워커마다 정확히 한 번씩 실행됨
+    """
+    description = _describe_worker(model_path)
+    try:
+        _worker_barrier.wait(_WARM_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    return description
+
+
+def _run_in_worker(model_path: str, shm_name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    shm = _attach(shm_name)
+    arr = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    return run_onnx(_get_session(model_path), arr)
+
+
+# ----------------------------
+# 부모 프로세스 측
+# ----------------------------
+class _Slot:
+    """워커에 입력 텐서를 넘기는 공유 메모리 버퍼 1개"""
+
+    def __init__(self):
+        self.shm: Optional[SharedMemory] = None
+
+    def ndarray(self, shape: Tuple[int, ...]) -> np.ndarray:
+        nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+        if self.shm is None or self.shm.size < nbytes:
+            self.release()
+            self.shm = SharedMemory(create=True, size=nbytes)
+        return np.ndarray(shape, dtype=np.float32, buffer=self.shm.buf)
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class InferencePool:
+    """
+    ONNX 추론을 N개 워커 프로세스에서 실행
+    - 각 워커는 모델 경로별로 세션을 한 번만 로드해 재사용 (메모리 예산 내 LRU)
+    - 전처리된 텐서는 pickle 대신 공유 메모리 슬롯으로 전달
+    - 워커 수만큼 슬롯을 두어 동시에 여러 배치 실행 가능
+    """
+
+    def __init__(self, num_workers: int, session_config: SessionConfig, memory_budget: int = 2 << 30):
+        self.num_workers = max(1, int(num_workers))
+        self.session_config = session_config
+        self.memory_budget = int(memory_budget)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: "queue.Queue[_Slot]" = queue.Queue()
+        self._barrier = None
+        self._warm_lock = threading.Lock()
+
+    def start(self):
+        context = get_context("spawn")
+        self._barrier = context.Barrier(self.num_workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.session_config, self.memory_budget, self._barrier),
+        )
+        for _ in range(self.num_workers):
+            self._slots.put(_Slot())
+        logger.info(f"추론 워커 풀 시작 (workers={self.num_workers})")
+
+    def describe(self, model_path: str) -> dict:
+        """
+        모델 입력 이름/shape/메타데이터 조회 (모델 로드 실패 시 여기서 예외)
+        워커마다 워밍업 작업을 정확히 하나씩 실행해 모든 워커가 첫 추론 전에 모델을 로드하도록 함
+        (워커 initializer 가 넘겨받은 barrier 로 동기화, 동시에 여러 모델을 워밍업하지 않도록 직렬화)
+        """
+        with self._warm_lock:
+            futures = [self._executor.submit(_warm_worker, model_path) for _ in range(self.num_workers)]
+            try:
+                return [f.result() for f in futures][0]
+            finally:
+                if self._barrier.broken:
+                    self._barrier.reset()
+
+    @contextmanager
+    def acquire(self):
+        slot = self._slots.get()
+        try:
+            yield slot
+        finally:
+            self._slots.put(slot)
+
+    def run(self, model_path: str, slot: _Slot, shape: Tuple[int, ...]) -> np.ndarray:
+        return self._executor.submit(_run_in_worker, model_path, slot.shm.name, tuple(shape)).result()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        while not self._slots.empty():
+            self._slots.get_nowait().release()
+        logger.info("추론 워커 풀 종료")
@@ -0,0 +1,178 @@
+import logging
+import os
+import tempfile
+from dataclasses import replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+from app.services.image_preprocess import ImagePreprocessor
+from app.services.model_spec import ModelSpec, SPEC_METADATA_KEY
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCalibrationReader(CalibrationDataReader):
+    """학습 이미지 샘플을 서빙과 같은 전처리로 한 장씩 공급하는 INT8 보정 데이터"""
+
+    def __init__(self, image_paths: Sequence[str], spec: ModelSpec):
+        self._paths = iter(image_paths)
+        self._spec = spec
+        self._preprocessor = ImagePreprocessor.from_spec(spec)
+
+    def get_next(self):
+        for path in self._paths:
+            arr = np.empty((1, self._spec.height, self._spec.width, self._spec.channels), dtype=np.float32)
+            try:
+                with open(path, "rb") as f:
+                    self._preprocessor.decode_into(f, arr[0])
+            except Exception as e:
+                logger.warning(f"보정 이미지 건너뜀: {path} ({e})")
+                continue
+            return {self._spec.input_name: arr}
+        return None
+
+
+# 정확도 비교(게시 여부 판단)에 쓰는 최대 이미지 수
+EVALUATION_SIZE = 256
+
+
+def _stratified_indices(labels: Sequence[int], size: int, seed: int) -> List[int]:
+    """라벨 비율을 유지하며 최대 size 개 인덱스 (재현성을 위해 시드 고정)"""
+    if len(labels) <= size:
+        return list(range(len(labels)))
+    rng = np.random.default_rng(seed)
+    labels_arr = np.asarray(labels)
+    picked = []
+    for label in np.unique(labels_arr):
+        idx = np.flatnonzero(labels_arr == label)
+        n = max(1, round(size * len(idx) / len(labels_arr)))
+        picked.extend(rng.choice(idx, size=min(n, len(idx)), replace=False).tolist())
+    return sorted(picked)[:size]
+
+
+def sample_calibration_set(image_paths: List[str], labels: List[int], size: int, seed: int = 42) -> Tuple[List[str], List[int]]:
+    """라벨 비율을 유지하며 최대 size 개 샘플링 (재현성을 위해 시드 고정)"""
+    picked = _stratified_indices(labels, size, seed)
+    return [image_paths[i] for i in picked], [labels[i] for i in picked]
+
+
+def split_holdout_set(
+    image_paths: List[str], labels: List[int], size: int, seed: int = 42
+) -> Tuple[Tuple[List[str], List[int]], Tuple[List[str], List[int]]]:
+    """
+    검증 세트가 없을 때: 보정에 쓰지 않을 평가용 표본(최대 size 개, 전체의 절반 이하)을 먼저 떼어냄
+    반환: ((나머지 경로, 라벨), (평가 경로, 라벨))
+    """
+    held = set(_stratified_indices(labels, min(size, len(labels) // 2), seed))
+    rest = [i for i in range(len(labels)) if i not in held]
+    return (
+        ([image_paths[i] for i in rest], [labels[i] for i in rest]),
+        ([image_paths[i] for i in sorted(held)], [labels[i] for i in sorted(held)]),
+    )
+
+
+def evaluate_accuracy(
+    model_path: str, image_paths: Sequence[str], labels: Sequence[int], spec: ModelSpec, batch_size: int = 16
+) -> Tuple[float, int]:
+    """ONNX 모델의 샘플 정확도 → (정확도, 실제로 평가한 이미지 수). 읽을 수 없는 이미지는 제외"""
+    sess = ort.InferenceSession(model_path)
+    preprocessor = ImagePreprocessor.from_spec(spec)
+    buf = np.empty((batch_size, spec.height, spec.width, spec.channels), dtype=np.float32)
+    correct = total = 0
+    for start in range(0, len(image_paths), batch_size):
+        paths = image_paths[start:start + batch_size]
+        files = [open(p, "rb") for p in paths]
+        try:
+            indices, _ = preprocessor(files, buf)
+        finally:
+            for f in files:
+                f.close()
+        if not indices:
+            continue
+        preds = sess.run(None, {spec.input_name: buf[:len(indices)]})[0]
+        for i, pred in zip(indices, preds):
+            correct += int(np.argmax(pred) == labels[start + i])
+            total += 1
+    return (correct / total if total else 0.0), total
+
+
+def build_quantized_model(
+    float_model_path: str,
+    image_paths: List[str],
+    labels: List[int],
+    spec: ModelSpec,
+    mode: str = "static",
+    calibration_size: int = 64,
+    eval_paths: Optional[List[str]] = None,
+    eval_labels: Optional[List[int]] = None,
+) -> Tuple[str, dict]:
+    """
+    float32 ONNX 모델의 INT8 변형 생성
+    - static: 학습 이미지 샘플로 활성값 범위를 보정 (QDQ 형식)
+    - dynamic: 가중치만 INT8, 활성값은 실행 시 양자화
+    - float 대비 정확도 변화를 보정에 쓰지 않은 이미지로 측정해 모델 메타데이터와 보고서에 기록
+      (eval_paths 가 있으면 검증 세트, 없으면 image_paths 에서 보정 전에 떼어낸 표본)
+    반환: (INT8 모델 임시 파일 경로, 보고서)
+    """
+    if eval_paths:
+        evaluation = "validation"
+        eval_paths, eval_labels = sample_calibration_set(eval_paths, eval_labels, EVALUATION_SIZE)
+    else:
+        evaluation = "holdout"
+        (image_paths, labels), (eval_paths, eval_labels) = split_holdout_set(image_paths, labels, EVALUATION_SIZE)
+    sample_paths, sample_labels = sample_calibration_set(image_paths, labels, calibration_size)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".int8.onnx") as tmp:
+        int8_path = tmp.name
+
+    if mode == "dynamic":
+        quantize_dynamic(float_model_path, int8_path, weight_type=QuantType.QInt8)
+    else:
+        quantize_static(
+            float_model_path,
+            int8_path,
+            ImageCalibrationReader(sample_paths, spec),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+
+    float_accuracy, evaluated = evaluate_accuracy(float_model_path, eval_paths, eval_labels, spec)
+    int8_accuracy, int8_evaluated = evaluate_accuracy(int8_path, eval_paths, eval_labels, spec)
+    report = {
+        "mode": mode,
+        "calibration_samples": len(sample_paths),
+        "evaluation": evaluation,
+        # 디코딩에 성공해 실제로 비교한 이미지 수 (두 모델 중 적은 쪽)
+        "evaluation_samples": min(evaluated, int8_evaluated),
+        "float_accuracy": round(float_accuracy, 4),
+        "int8_accuracy": round(int8_accuracy, 4),
+        "accuracy_delta": round(int8_accuracy - float_accuracy, 4),
+        "float_size_bytes": os.path.getsize(float_model_path),
+        "int8_size_bytes": os.path.getsize(int8_path),
+    }
+
+    # 예측 캐시가 float 모델과 섞이지 않도록 버전을 구분해 메타데이터 재기록
+    int8_spec = replace(spec, version=f"{spec.version}-int8", quantization=report)
+    int8_model = onnx.load(int8_path)
+    onnx.helper.set_model_props(int8_model, {SPEC_METADATA_KEY: int8_spec.to_json()})
+    onnx.save(int8_model, int8_path)
+
+    logger.info(f"INT8 양자화 완료: {report}")
+    return int8_path, report
+
+
+def publish_decision(report: dict, max_accuracy_drop: float, min_evaluation_samples: int) -> Tuple[bool, Optional[str]]:
+    """
+    INT8 모델 게시 여부 → (게시 여부, 게시하지 않는 이유)
+    평가한 이미지가 min_evaluation_samples 보다 적으면 정확도 변화를 믿을 수 없으므로 게시하지 않음
+    """
+    if report["evaluation_samples"] < max(min_evaluation_samples, 1):
+        return False, f"평가 이미지 부족 ({report['evaluation_samples']}/{min_evaluation_samples})"
+    if report["accuracy_delta"] < -max_accuracy_drop:
+        return False, f"정확도 저하 {report['accuracy_delta']} (허용 -{max_accuracy_drop})"
+    return True, None
@@ -0,0 +1,215 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.image_preprocess import ImagePreprocessor
+from app.services.inference_pool import InferencePool, run_onnx
+from app.services.model_spec import ModelSpec
+
+logger = logging.getLogger(__name__)
+
+# 학습 태스크가 새 모델을 올린 뒤 카테고리 이름을 발행하는 Redis 채널
+MODEL_UPDATE_CHANNEL = "model_updates"
+
+
+class ModelNotAvailable(Exception):
+    """카테고리에 해당하는 모델을 찾거나 로드할 수 없음"""
+
+
+class ModelWarming(Exception):
+    """모델을 백그라운드에서 로드하는 중 (잠시 후 다시 요청)"""
+
+    def __init__(self, category: str):
+        super().__init__(f"'{category}' 모델 로드 중")
+        self.category = category
+
+
+@dataclass
+class LoadedModel:
+    """카테고리별로 로드된 모델 1개 (버전마다 새 인스턴스)"""
+    category: str
+    model_path: str
+    version: str
+    spec: ModelSpec
+    preprocessor: ImagePreprocessor
+    size_bytes: int
+    session: Any = None  # thread 모드 세션
+    pool: Optional[InferencePool] = None  # process 모드 워커 풀
+    inflight: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+    def run(self, arr: np.ndarray, slot=None) -> np.ndarray:
+        if self.pool is not None:
+            return self.pool.run(self.model_path, slot, arr.shape)
+        return run_onnx(self.session, arr)
+
+
+class ModelRegistry:
+    """
+    MVTec 카테고리별 ONNX 모델 레지스트리
+    - 첫 요청 시 지연 로드 (카테고리별 잠금으로 중복 로드 방지)
+    - 메모리 예산 초과 시 사용 중이 아닌 모델을 오래된 순으로 해제
+    - reload 는 새 버전을 완전히 로드한 뒤 교체 → 처리 중인 요청은 이전 버전으로 끝까지 실행
+    - try_get 은 로드를 기다리지 않음: 백그라운드 로드를 시작하고 ModelWarming 으로 알림
+    """
+
+    def __init__(
+        self,
+        resolve_path: Callable[[str], Optional[str]],
+        open_model: Callable[[str, str], LoadedModel],
+        memory_budget: int,
+        retry_failed_after: float = 30.0,
+    ):
+        self._resolve_path = resolve_path
+        self._open_model = open_model
+        self.memory_budget = int(memory_budget)
+        self.retry_failed_after = retry_failed_after
+        self._models: Dict[str, LoadedModel] = {}
+        self._lock = threading.Lock()
+        self._category_locks: Dict[str, threading.Lock] = {}
+        self._warming: Dict[str, Future] = {}
+        self._failures: Dict[str, Tuple[float, str]] = {}
+        self._loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-loader")
+
+    def _category_lock(self, category: str) -> threading.Lock:
+        with self._lock:
+            return self._category_locks.setdefault(category, threading.Lock())
+
+    def _load(self, category: str) -> LoadedModel:
+        model_path = self._resolve_path(category)
+        if model_path is None:
+            raise ModelNotAvailable(f"'{category}' 모델 파일 없음")
+        try:
+            return self._open_model(category, model_path)
+        except Exception as e:
+            raise ModelNotAvailable(f"'{category}' 모델 로드 실패: {e}") from e
+
+    def _install(self, entry: LoadedModel):
+        with self._lock:
+            # dict 항목 교체는 원자적. 이전 버전은 참조 중인 요청이 끝나면 해제됨
+            self._models[entry.category] = entry
+            self._evict_over_budget(keep=entry.category)
+
+    def _evict_over_budget(self, keep: str):
+        total = sum(m.size_bytes for m in self._models.values())
+        idle = sorted(
+            (m for m in self._models.values() if m.category != keep and m.inflight == 0),
+            key=lambda m: m.last_used,
+        )
+        for model in idle:
+            if total <= self.memory_budget:
+                break
+            del self._models[model.category]
+            total -= model.size_bytes
+            logger.info(f"메모리 예산 초과로 모델 해제: {model.category} ({model.version})")
+
+    def get(self, category: str) -> LoadedModel:
+        entry = self._models.get(category)
+        if entry is not None:
+            return entry
+        with self._category_lock(category):
+            entry = self._models.get(category)
+            if entry is None:
+                entry = self._load(category)
+                self._install(entry)
+                logger.info(f"모델 로드: {category} ({entry.version})")
+        return entry
+
+    def reload(self, category: str) -> LoadedModel:
+        """최신 모델을 다시 받아 교체 (버전이 같으면 기존 인스턴스 유지)"""
+        with self._category_lock(category):
+            entry = self._load(category)
+            current = self._models.get(category)
+            if current is not None and current.version == entry.version:
+                return current
+            self._install(entry)
+            logger.info(f"모델 교체: {category} ({current.version if current else '-'} -> {entry.version})")
+        return entry
+
+    def warm(self, category: str) -> Future:
+        """백그라운드 로드 시작 (이미 로드 중이면 진행 중인 Future 반환)"""
+        with self._lock:
+            future = self._warming.get(category)
+            if future is None:
+                future = self._loader.submit(self._warm, category)
+                self._warming[category] = future
+            return future
+
+    def _warm(self, category: str) -> LoadedModel:
+        try:
+            entry = self.get(category)
+            self._failures.pop(category, None)
+            return entry
+        except ModelNotAvailable as e:
+            self._failures[category] = (time.monotonic(), str(e))
+            logger.warning(f"{e} ({self.retry_failed_after:.0f}초 후 재시도)")
+            raise
+        finally:
+            with self._lock:
+                self._warming.pop(category, None)
+
+    def try_get(self, category: str) -> LoadedModel:
+        """
+        로드된 모델 반환 (대기 없음)
+        - 아직 없으면 백그라운드 로드를 시작하고 ModelWarming
+        - 최근 로드에 실패했으면 재시도 간격 동안 ModelNotAvailable
+        """
+        entry = self._models.get(category)
+        if entry is not None:
+            return entry
+        failure = self._failures.get(category)
+        if failure is not None and time.monotonic() - failure[0] < self.retry_failed_after:
+            raise ModelNotAvailable(failure[1])
+        self.warm(category)
+        raise ModelWarming(category)
+
+    def status(self, category: str) -> str:
+        if category in self._models:
+            return "ready"
+        if category in self._warming:
+            return "warming"
+        if category in self._failures:
+            return "failed"
+        return "unloaded"
+
+    def is_loaded(self, category: str) -> bool:
+        return category in self._models
+
+    @contextmanager
+    def use(self, category: str):
+        entry = self.get(category)
+        with self._lock:
+            entry.inflight += 1
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.inflight -= 1
+                entry.last_used = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = list(self._models.values())
+            warming = sorted(self._warming)
+        return {
+            "memory_budget": self.memory_budget,
+            "memory_used": sum(m.size_bytes for m in models),
+            "models": {
+                m.category: {
+                    "version": m.version,
+                    "path": os.path.basename(m.model_path),
+                    "size_bytes": m.size_bytes,
+                    "inflight": m.inflight,
+                }
+                for m in models
+            },
+            "warming": warming,
+            "failed": {category: error for category, (_, error) in list(self._failures.items())},
+        }
@@ -0,0 +1,75 @@
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 학습 태스크가 ONNX metadata_props 에 기록하는 키
+SPEC_METADATA_KEY = "finnect_input_spec"
+
+DEFAULT_INPUT_SIZE = 224
+DEFAULT_LABELS = ["normal", "defect"]
+
+
+@dataclass
+class ModelSpec:
+    """
+    모델 입력 규격 (학습 시 ONNX 메타데이터로 함께 저장)
+    - 입력 텐서: NHWC, dtype
+    - 정규화: out = (pixel * scale - mean) / std
+    - labels: 출력 인덱스 → 라벨 이름
+    - quantization: INT8 변형 모델의 양자화 정보 (float 모델은 빈 값)
+    """
+    input_name: str = "input_image"
+    height: int = DEFAULT_INPUT_SIZE
+    width: int = DEFAULT_INPUT_SIZE
+    channels: int = 3
+    dtype: str = "float32"
+    scale: float = 1.0 / 255.0
+    mean: List[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
+    std: List[float] = field(default_factory=lambda: [1.0, 1.0, 1.0])
+    labels: List[str] = field(default_factory=lambda: list(DEFAULT_LABELS))
+    version: str = ""
+    quantization: Dict = field(default_factory=dict)
+
+    @property
+    def target_size(self) -> tuple:
+        """PIL 기준 (width, height)"""
+        return (self.width, self.height)
+
+    def label(self, idx: int) -> str:
+        return self.labels[idx] if 0 <= idx < len(self.labels) else "unknown"
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_model_info(cls, input_name: str, input_shape: Sequence, metadata: Optional[Dict[str, str]] = None) -> "ModelSpec":
+        """
+        ONNX 입력 정보 + custom metadata 로 규격 구성
+        - 메타데이터가 없는 이전 모델은 입력 shape 에서 H/W 를 추론하고 기본 라벨 사용
+        """
+        raw = (metadata or {}).get(SPEC_METADATA_KEY)
+        if raw:
+            try:
+                values = json.loads(raw)
+                known = {k: v for k, v in values.items() if k in cls.__dataclass_fields__}
+                return cls(**{**known, "input_name": input_name})
+            except (ValueError, TypeError):
+                logger.warning("모델 입력 규격 메타데이터 파싱 실패, 입력 shape 기준으로 대체")
+
+        spec = cls(input_name=input_name)
+        if len(input_shape) == 4:
+            _, h, w, c = input_shape
+            if isinstance(h, int) and isinstance(w, int):
+                spec.height, spec.width = h, w
+            if isinstance(c, int):
+                spec.channels = c
+        return spec
+
+    @classmethod
+    def from_session(cls, sess) -> "ModelSpec":
+        input_meta = sess.get_inputs()[0]
+        metadata = sess.get_modelmeta().custom_metadata_map
+        return cls.from_model_info(input_meta.name, input_meta.shape, metadata)
@@ -0,0 +1,87 @@
+import logging
+import os
+import re
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_]")
+
+
+class ModelStore:
+    """
+    S3 모델 파일의 로컬 캐시 (S3 ETag 기준 내용 주소)
+    - head_object 로 ETag 만 확인하고, 같은 ETag 파일이 로컬에 있으면 다운로드 생략
+    - 파일명 {category}.{variant}.{etag}.onnx → 버전마다 다른 경로라 교체 중인 요청/워커 세션 캐시와 충돌 없음
+      ('.' 은 카테고리에 쓸 수 없는 문자라 'a' 와 'a-b' 처럼 접두어가 겹치는 카테고리도 구분됨)
+    - variant: float / int8 → 로컬 대체 시에도 요청한 변형만 사용
+    - 카테고리·변형별로 최근 keep_versions 개만 남기고 정리
+      (optimized_cache_dir 를 주면 정리한 버전의 최적화 그래프 캐시 {모델파일명}.{최적화 수준}.opt.onnx 도 함께 삭제)
+    """
+
+    def __init__(self, s3, cache_dir: str, keep_versions: int = 3, optimized_cache_dir: str = ""):
+        self.s3 = s3
+        self.cache_dir = cache_dir
+        self.keep_versions = max(1, int(keep_versions))
+        self.optimized_cache_dir = optimized_cache_dir
+
+    def _local_path(self, category: str, variant: str, etag: str) -> str:
+        # 멀티파트 업로드 ETag 는 "해시-파트수" 형태라 파일명에 쓸 수 있는 문자로 치환
+        safe = _UNSAFE_CHARS.sub("_", etag.strip('"'))
+        return os.path.join(self.cache_dir, f"{category}.{variant}.{safe}.onnx")
+
+    def _local_versions(self, category: str, variant: str) -> list:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        pattern = re.compile(rf"^{re.escape(category)}\.{re.escape(variant)}\.[A-Za-z0-9_]+\.onnx$")
+        paths = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if pattern.match(f)]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def fetch(self, s3_key: str, category: str, variant: str = "float") -> str:
+        """S3 최신 모델의 로컬 경로 반환 (ETag 가 바뀐 경우에만 다운로드). S3 오류는 그대로 전달"""
+        head = self.s3.head_object(s3_key)
+        local_path = self._local_path(category, variant, head["ETag"])
+
+        if os.path.exists(local_path) and os.path.getsize(local_path) == head["ContentLength"]:
+            os.utime(local_path)  # 최근 사용 버전으로 표시 (정리 대상에서 제외)
+            logger.info(f"모델 캐시 적중: {s3_key} -> {os.path.basename(local_path)}")
+            return local_path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        part_path = f"{local_path}.{os.getpid()}.part"
+        try:
+            self.s3.download_file(s3_key, part_path)
+            if os.path.getsize(part_path) != head["ContentLength"]:
+                raise IOError(f"모델 파일 크기 불일치: {s3_key}")
+            os.replace(part_path, local_path)
+        finally:
+            if os.path.exists(part_path):
+                os.unlink(part_path)
+        logger.info(f"모델 다운로드: {s3_key} -> {os.path.basename(local_path)}")
+
+        self.prune(category, variant)
+        return local_path
+
+    def latest_local(self, category: str, variant: str = "float") -> Optional[str]:
+        """S3 를 쓸 수 없을 때 마지막으로 받은 로컬 모델 (해당 변형만)"""
+        versions = self._local_versions(category, variant)
+        return versions[0] if versions else None
+
+    def _optimized_paths(self, model_path: str) -> list:
+        # 최적화 수준 설정이 바뀌었을 수 있으므로 수준과 관계없이 해당 버전의 캐시를 모두 찾음
+        if not self.optimized_cache_dir or not os.path.isdir(self.optimized_cache_dir):
+            return []
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        pattern = re.compile(rf"^{re.escape(name)}\.[a-z]+\.opt\.onnx$")
+        return [
+            os.path.join(self.optimized_cache_dir, f) for f in os.listdir(self.optimized_cache_dir) if pattern.match(f)
+        ]
+
+    def prune(self, category: str, variant: str = "float"):
+        for path in self._local_versions(category, variant)[self.keep_versions:]:
+            for stale in [path] + self._optimized_paths(path):
+                try:
+                    os.unlink(stale)
+                    logger.info(f"이전 모델 파일 정리: {os.path.basename(stale)}")
+                except OSError as e:
+                    logger.warning(f"모델 파일 정리 실패: {stale} ({e})")
@@ -0,0 +1,102 @@
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+_OPTIMIZATION_LEVELS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+_EXECUTION_MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    """
+    ONNX Runtime 세션 설정 (워커 프로세스에도 그대로 전달되도록 pickle 가능한 값만 보관)
+    - 스레드 수 0 은 ONNX Runtime 기본값
+    - optimized_cache_dir 가 있으면 최적화된 그래프를 저장해 다음 로드부터 재사용
+    """
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    execution_mode: str = "sequential"
+    graph_optimization: str = "all"
+    optimized_cache_dir: str = ""
+    warmup_runs: int = 1
+
+    def session_options(self, graph_optimization: str = None) -> "ort.SessionOptions":
+        options = ort.SessionOptions()
+        if self.intra_op_threads > 0:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads > 0:
+            options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = getattr(
+            ort.ExecutionMode, _EXECUTION_MODES.get(self.execution_mode, "ORT_SEQUENTIAL")
+        )
+        options.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel, _OPTIMIZATION_LEVELS.get(graph_optimization or self.graph_optimization, "ORT_ENABLE_ALL")
+        )
+        return options
+
+    def cache_path(self, model_path: str) -> str:
+        # 모델 파일명은 버전(해시)별로 다르므로 파일명 + 최적화 수준을 캐시 키로 사용
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.optimized_cache_dir, f"{name}.{self.graph_optimization}.opt.onnx")
+
+
+def warmup(sess, runs: int = 1):
+    """더미 입력으로 미리 실행해 첫 요청의 메모리 할당/커널 선택 지연 제거"""
+    if runs <= 0:
+        return
+    feeds = {}
+    for input_meta in sess.get_inputs():
+        shape = [d if isinstance(d, int) and d > 0 else 1 for d in input_meta.shape]
+        dtype = np.float32 if "float" in input_meta.type else np.int64
+        feeds[input_meta.name] = np.zeros(shape, dtype=dtype)
+    for _ in range(runs):
+        sess.run(None, feeds)
+
+
+def create_session(model_path: str, config: SessionConfig):
+    """
+    설정을 적용해 세션 생성
+    - 최적화 캐시가 있으면 그래프 최적화 없이 바로 로드
+    - 없으면 최적화 후 캐시 파일로 저장 (임시 파일에 쓴 뒤 교체해 동시 로드에도 안전)
+    """
+    sess = None
+    cache_path = config.cache_path(model_path) if config.optimized_cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            sess = ort.InferenceSession(cache_path, sess_options=config.session_options("disabled"))
+            logger.info(f"최적화 캐시에서 모델 로드: {cache_path}")
+        except Exception as e:
+            logger.warning(f"최적화 캐시 로드 실패, 다시 최적화: {e}")
+            os.unlink(cache_path)
+
+    if sess is None:
+        options = config.session_options()
+        tmp_path = None
+        if cache_path and config.graph_optimization != "disabled":
+            os.makedirs(config.optimized_cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            options.optimized_model_filepath = tmp_path
+        sess = ort.InferenceSession(model_path, sess_options=options)
+        if tmp_path and os.path.exists(tmp_path):
+            os.replace(tmp_path, cache_path)
+
+    warmup(sess, config.warmup_runs)
+    return sess
@@ -0,0 +1,103 @@
+import logging
+import os
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+PARQUET_COMPRESSION = "zstd"
+# 날짜 문자열 컬럼은 timestamp 로 저장 (기간 필터/그룹을 문자열 파싱 없이 처리)
+DATETIME_COLUMNS = ("InvoiceDate",)
+
+
+def processed_key(folder: str, record_id: int, filename: str) -> str:
+    """업로드 1건의 Parquet 위치: {S3_PROCESSED_FOLDER}/{record_id}/{원본 파일명}.parquet"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return f"{folder}/{record_id}/{stem}.parquet"
+
+
+def _typed(chunk: pd.DataFrame) -> pd.DataFrame:
+    converted = {
+        col: pd.to_datetime(chunk[col], errors="coerce")
+        for col in DATETIME_COLUMNS
+        if col in chunk.columns and chunk[col].dtype == object
+    }
+    # category 컬럼은 청크마다 사전이 달라 고정 스키마로 쓸 수 없음 → 원래 값으로 기록 (Parquet 이 자체 사전 인코딩)
+    converted.update({
+        col: chunk[col].astype(chunk[col].cat.categories.dtype)
+        for col in chunk.columns
+        if isinstance(chunk[col].dtype, pd.CategoricalDtype)
+    })
+    return chunk.assign(**converted) if converted else chunk
+
+
+def _writer_schema(schema: pa.Schema) -> pa.Schema:
+    # 첫 청크에서 값이 모두 비어 있던 컬럼(null 타입)은 이후 청크의 값을 담을 수 없음 → 문자열로 선언
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """
+    청크 테이블을 writer 스키마로 변환 (값 손실이 없는 변환만 허용)
+    - 청크마다 다르게 추론된 dtype 흡수: 결측값 때문에 float64 가 된 정수 컬럼, 모두 비어 있는 object 컬럼 등
+    - 소수점 값이 있는 실수 → 정수처럼 값이 바뀌는 경우는 ArrowInvalid
+    """
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(len(table), field.type))
+            continue
+        column = table.column(field.name)
+        if not column.type.equals(field.type):
+            column = column.cast(field.type, safe=True)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class ParquetChunkWriter:
+    """
+    CSV 청크(pandas DataFrame)를 하나의 Parquet 파일로 이어 쓰기
+    - 스키마는 첫 청크 기준으로 고정하고 이후 청크는 그 스키마로 변환 (_conform)
+    - 변환에 실패하면 error 에 기록하고 이후 청크는 무시 (통계 계산은 계속 진행)
+    """
+
+    def __init__(self, path: str, compression: str = PARQUET_COMPRESSION):
+        self.path = path
+        self.compression = compression
+        self.rows = 0
+        self.error: Optional[str] = None
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self.error is not None:
+            return
+        try:
+            chunk = _typed(chunk)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, _writer_schema(table.schema), compression=self.compression)
+            self._writer.write_table(_conform(table, self._writer.schema))
+            self.rows += len(chunk)
+        except Exception as e:
+            self.error = str(e)
+            logger.warning(f"Parquet 변환 실패 (통계 계산은 계속): {e}")
+
+    def close(self) -> bool:
+        """파일을 닫고 정상적으로 만들어졌는지 반환"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.error is None and self.rows > 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
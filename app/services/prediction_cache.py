@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+from app.core.redis import redis_client_async
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    이미지 내용 해시 + 모델 버전 기준 예측 결과 캐시
+    - 1차: 프로세스 내 LRU (max_entries 개)
+    - 2차: Redis (ttl 초)
+    - 모델 버전이 키에 포함되므로 모델 교체 시 자동으로 무효화
+    """
+
+    def __init__(self, redis_client, max_entries: int = 2048, ttl: int = 3600, prefix: str = "pred"):
+        self.redis = redis_client
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = ttl
+        self.prefix = prefix
+        self._local: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def make_key(self, data: bytes, model_version: str) -> str:
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        return f"{self.prefix}:{model_version}:{digest}"
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        with self._lock:
+            value = self._local.get(key)
+            if value is not None:
+                self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: dict):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = self._get_local(key)
+        if value is not None:
+            self.counters["local_hits"] += 1
+            return dict(value)
+
+        try:
+            cached = await self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"예측 캐시 Redis 조회 실패: {e}")
+            cached = None
+
+        if cached is None:
+            self.counters["misses"] += 1
+            return None
+
+        value = json.loads(cached)
+        self._set_local(key, value)
+        self.counters["redis_hits"] += 1
+        return dict(value)
+
+    async def set(self, key: str, value: dict):
+        self._set_local(key, dict(value))
+        try:
+            await self.redis.set(key, json.dumps(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"예측 캐시 Redis 저장 실패: {e}")
+
+    def stats(self) -> dict:
+        hits = self.counters["local_hits"] + self.counters["redis_hits"]
+        total = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "local_entries": len(self._local),
+            "local_capacity": self.max_entries,
+        }
+
+
+prediction_cache = PredictionCache(
+    redis_client_async,
+    max_entries=settings.PREDICTION_CACHE_SIZE,
+    ttl=settings.PREDICTION_CACHE_TTL,
+)
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+from typing import Dict, List, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pa_ds
+import pyarrow.fs as pa_fs
+
+logger = logging.getLogger(__name__)
+
+AGGREGATIONS = ("sum", "mean", "min", "max", "count", "count_distinct")
+FILTER_OPS = ("==", "!=", "<", "<=", ">", ">=", "in", "not_in")
+
+# 원본에 없는 파생 컬럼 (arrow 식으로 스캔 중에 계산)
+DERIVED_COLUMNS = {
+    "revenue": pc.multiply(pc.field("Quantity"), pc.field("UnitPrice")),
+    "year": pc.strftime(pc.field("InvoiceDate"), format="%Y"),
+    "month": pc.strftime(pc.field("InvoiceDate"), format="%Y-%m"),
+    "date": pc.strftime(pc.field("InvoiceDate"), format="%Y-%m-%d"),
+}
+
+
+def query_cache_key(sources: Sequence[str], query: dict) -> str:
+    """(대상 업로드들, 질의) 기준 캐시 키. 업로드마다 Parquet 경로가 다르므로 새 업로드는 자동으로 다른 키"""
+    payload = json.dumps({"sources": sorted(sources), "query": query}, sort_keys=True, default=str)
+    return f"query:{hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()}"
+
+
+def expand_parquet_paths(paths: Sequence[str], filesystem=None) -> List[str]:
+    """
+    "/" 로 끝나는 경로는 디렉터리(여러 조각으로 나눠 처리된 업로드)로 보고 안의 Parquet 파일 목록으로 펼침
+    (pyarrow 는 파일 목록과 디렉터리를 섞어 하나의 데이터셋으로 열 수 없음)
+    """
+    fs = filesystem or pa_fs.LocalFileSystem()
+    expanded: List[str] = []
+    for path in paths:
+        if not path.endswith("/"):
+            expanded.append(path)
+            continue
+        infos = fs.get_file_info(pa_fs.FileSelector(path.rstrip("/"), recursive=True))
+        expanded.extend(sorted(i.path for i in infos if i.type == pa_fs.FileType.File and i.path.endswith(".parquet")))
+    return expanded
+
+
+def _column(name: str, schema: pa.Schema) -> pc.Expression:
+    if name in DERIVED_COLUMNS:
+        return DERIVED_COLUMNS[name]
+    if name not in schema.names:
+        raise ValueError(f"알 수 없는 컬럼: {name}")
+    return pc.field(name)
+
+
+def _literal(name: str, value, schema: pa.Schema):
+    # 날짜 컬럼은 문자열 값("2011-01-01")도 timestamp 로 변환해 비교
+    if name not in schema.names or not pa.types.is_timestamp(schema.field(name).type):
+        return value
+    ts_type = schema.field(name).type
+    if isinstance(value, list):
+        return pa.array([pd.Timestamp(v) for v in value], type=ts_type)
+    return pa.scalar(pd.Timestamp(value), type=ts_type)
+
+
+def _filter_expression(filters: List[dict], schema: pa.Schema):
+    expr = None
+    for f in filters:
+        column, op, value = f["column"], f.get("op", "=="), f.get("value")
+        if op not in FILTER_OPS:
+            raise ValueError(f"지원하지 않는 필터 연산: {op}")
+        field = _column(column, schema)
+        value = _literal(column, value, schema)
+        if op in ("in", "not_in"):
+            if not isinstance(value, (list, pa.Array)):
+                raise ValueError(f"'{op}' 필터 값은 목록이어야 합니다: {column}")
+            cond = pc.is_in(field, value_set=value if isinstance(value, pa.Array) else pa.array(value))
+            cond = ~cond if op == "not_in" else cond
+        else:
+            cond = {
+                "==": field == value,
+                "!=": field != value,
+                "<": field < value,
+                "<=": field <= value,
+                ">": field > value,
+                ">=": field >= value,
+            }[op]
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def run_query(paths: Sequence[str], query: dict, filesystem=None, max_rows: int = 10_000) -> dict:
+    """
+    업로드 Parquet 들에 대해 필터 → 그룹 → 집계 실행 (Arrow 벡터 연산)
+    - 필요한 컬럼만 읽고(projection), 필터는 스캔 단계로 내려 보내 행 그룹 통계로 건너뜀(pushdown)
+    - query: {"group_by": [...], "filters": [{"column", "op", "value"}],
+              "aggregations": [{"column", "func"}], "order_by": [{"column", "desc"}], "limit": n}
+    - 결과 컬럼 이름: 그룹 컬럼 + "{column}_{func}"
+    """
+    dataset = pa_ds.dataset(expand_parquet_paths(paths, filesystem), filesystem=filesystem, format="parquet")
+    schema = dataset.schema
+
+    group_by = list(query.get("group_by") or [])
+    aggregations = list(query.get("aggregations") or [])
+    if not aggregations:
+        raise ValueError("집계(aggregations)를 하나 이상 지정해야 합니다.")
+    for agg in aggregations:
+        if agg.get("func", "sum") not in AGGREGATIONS:
+            raise ValueError(f"지원하지 않는 집계 함수: {agg.get('func')}")
+
+    needed = list(dict.fromkeys(group_by + [agg["column"] for agg in aggregations]))
+    projection: Dict[str, pc.Expression] = {name: _column(name, schema) for name in needed}
+    table = dataset.to_table(columns=projection, filter=_filter_expression(query.get("filters") or [], schema))
+
+    result = table.group_by(group_by).aggregate([(agg["column"], agg.get("func", "sum")) for agg in aggregations])
+
+    order_by = query.get("order_by") or []
+    if order_by:
+        for o in order_by:
+            if o["column"] not in result.column_names:
+                raise ValueError(f"정렬 컬럼이 결과에 없음: {o['column']}")
+        result = result.sort_by([(o["column"], "descending" if o.get("desc") else "ascending") for o in order_by])
+
+    limit = min(int(query.get("limit") or max_rows), max_rows)
+    truncated = result.num_rows > limit
+    result = result.slice(0, limit)
+
+    logger.info(f"질의 실행: files={len(paths)}, scanned_rows={table.num_rows}, result_rows={result.num_rows}")
+    return {
+        "columns": result.column_names,
+        "rows": result.to_pylist(),
+        "scanned_rows": table.num_rows,
+        "truncated": truncated,
+    }
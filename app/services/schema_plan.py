@@ -0,0 +1,222 @@
+import hashlib
+import io
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from app.core.metrics import required_columns
+from app.services.csv_engine import CSV_DTYPES
+
+# 컬럼 종류: int / float / datetime / category / string
+# 파일마다 관찰한 종류는 넓은 쪽으로만 병합 (int + float → float, 그 외 충돌은 string)
+_KIND_DTYPES = {"int": "int64", "float": "float64", "category": "category", "string": "object"}
+
+# 문자열 컬럼을 category 로 읽는 기준 (고유값 수, 고유값 비율)
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5
+# 날짜 형식 추측에 쓰는 표본 값 수
+_DATE_SAMPLE = 100
+
+
+def header_fingerprint(columns: Sequence[str]) -> str:
+    """헤더 행(컬럼 이름과 순서) 기준 지문. 같은 레이아웃의 파일은 같은 스키마 계획을 공유"""
+    normalized = "\x1f".join(str(c).strip() for c in columns)
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def plan_cache_key(fingerprint: str) -> str:
+    return f"csv_plan:{fingerprint}"
+
+
+# -----------------------------
+# 헤더 미리 읽기
+# -----------------------------
+class _PrefixedStream(io.RawIOBase):
+    """이미 읽은 앞부분(prefix) + 나머지 스트림을 하나의 파일 객체처럼 제공"""
+
+    def __init__(self, prefix: bytes, body):
+        self._prefix = prefix
+        self._body = body
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._body.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._body.close()
+        super().close()
+
+
+def peek_header(fileobj, encoding: str, block_size: int = 64 * 1024) -> Tuple[List[str], io.BufferedReader]:
+    """
+    순차 스트림(S3 본문 등)에서 헤더 행만 먼저 읽고, 읽은 부분을 포함한 새 파일 객체 반환
+    (스트림을 되감거나 다시 요청하지 않음)
+    """
+    prefix = b""
+    while b"\n" not in prefix:
+        block = fileobj.read(block_size)
+        if not block:
+            break
+        prefix += block
+    line = prefix.split(b"\n", 1)[0].decode(encoding).rstrip("\r")
+    columns = list(pd.read_csv(io.StringIO(line), nrows=0).columns) if line.strip() else []
+    return columns, io.BufferedReader(_PrefixedStream(prefix, fileobj), block_size)
+
+
+def read_header(path: str, encoding: str) -> List[str]:
+    return list(pd.read_csv(path, nrows=0, encoding=encoding).columns)
+
+
+# -----------------------------
+# 종류 추론 / 병합
+# -----------------------------
+def _date_format(values: pd.Series) -> Optional[str]:
+    sample = values.dropna().astype(str).head(_DATE_SAMPLE)
+    if sample.empty:
+        return None
+    fmt = guess_datetime_format(sample.iloc[0])
+    if fmt is None:
+        return None
+    parsed = pd.to_datetime(sample, format=fmt, errors="coerce")
+    return fmt if parsed.notna().all() else None
+
+
+def _observe_column(series: pd.Series, current: Optional[dict]) -> dict:
+    """청크의 한 컬럼을 보고 종류 추론. current 가 있으면 그 종류가 여전히 맞는지만 싸게 확인"""
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return {"kind": "string"}
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return {"kind": "int"}
+    if pd.api.types.is_float_dtype(series.dtype):
+        return {"kind": "float"}
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return {"kind": "datetime", "format": (current or {}).get("format")}
+
+    kind = (current or {}).get("kind")
+    if kind == "string":
+        # 이미 가장 넓은 종류 → 추가 검사 없음
+        return {"kind": "string"}
+    # 계획대로 category 로 읽은 컬럼은 사전 크기만 보면 됨
+    unique = len(series.cat.categories) if isinstance(series.dtype, pd.CategoricalDtype) else None
+
+    if kind in (None, "datetime"):
+        fmt = (current or {}).get("format") if kind == "datetime" else _date_format(series)
+        if fmt is not None:
+            parsed = pd.to_datetime(series.dropna(), format=fmt, errors="coerce")
+            if parsed.notna().all():
+                return {"kind": "datetime", "format": fmt}
+        if kind == "datetime":
+            return {"kind": "string"}
+
+    if unique is None:
+        unique = series.nunique()
+    if unique <= CATEGORY_MAX_UNIQUE and unique <= max(len(series) * CATEGORY_MAX_RATIO, 1):
+        return {"kind": "category"}
+    return {"kind": "string"}
+
+
+def _merge_kind(a: dict, b: dict) -> dict:
+    if a["kind"] == b["kind"]:
+        if a["kind"] == "datetime" and a.get("format") != b.get("format"):
+            return {"kind": "string"}
+        return a
+    if {a["kind"], b["kind"]} == {"int", "float"}:
+        return {"kind": "float"}
+    return {"kind": "string"}
+
+
+class PlanObserver:
+    """
+    파싱된 청크를 보며 컬럼 종류를 누적 (on_chunk 로 연결해 통계와 같은 패스에서 실행)
+    - 숫자/날짜 dtype 컬럼은 dtype 만 보고 판단, 문자열 컬럼만 값 검사
+    """
+
+    def __init__(self, plan: Optional[dict] = None):
+        self.kinds: Dict[str, dict] = {}
+        self._base = (plan or {}).get("columns", {})
+
+    def observe(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            col = str(col)
+            current = self.kinds.get(col) or self._base.get(col)
+            seen = _observe_column(chunk[col], current)
+            self.kinds[col] = seen if col not in self.kinds else _merge_kind(self.kinds[col], seen)
+
+
+# -----------------------------
+# 계획 생성 / 갱신 / 적용
+# -----------------------------
+def refine_plan(plan: Optional[dict], fingerprint: str, header: Sequence[str], observed: Dict[str, dict]) -> dict:
+    """
+    기존 계획과 새 파일에서 관찰한 종류를 병합한 계획 반환 (새 파일이 올 때마다 넓어지는 방향으로만 변경)
+    plan: {"fingerprint", "header", "columns": {col: {"kind", "format"?}}, "files"}
+    """
+    columns = dict((plan or {}).get("columns", {}))
+    for col, seen in observed.items():
+        columns[col] = seen if col not in columns else _merge_kind(columns[col], seen)
+    return {
+        "fingerprint": fingerprint,
+        "header": list(header),
+        "columns": columns,
+        "files": (plan or {}).get("files", 0) + 1,
+    }
+
+
+def widen_plan(plan: dict) -> dict:
+    """계획대로 읽다 실패한 경우: 숫자/날짜 고정을 풀어 다음 파일은 추론부터 다시 (category/string 은 유지)"""
+    columns = {col: spec for col, spec in plan.get("columns", {}).items() if spec["kind"] in ("category", "string")}
+    return {**plan, "columns": columns}
+
+
+def plan_read_options(plan: Optional[dict], header: Sequence[str], metrics_only: bool = False) -> dict:
+    """
+    계획 → pd.read_csv / dd.read_csv 인자 (dtype, parse_dates, date_format, usecols)
+    - 고유값 지표 컬럼(CSV_DTYPES)은 HyperLogLog 해시 일관성을 위해 계획과 무관하게 고정
+    - metrics_only: 현재 METRICS 에 필요한 컬럼만 읽음 (Parquet 변환 없이 통계만 낼 때)
+    """
+    dtypes = dict(CSV_DTYPES)
+    options: dict = {}
+    wanted = set(header)
+    if metrics_only:
+        needed = required_columns()
+        if set(needed) <= wanted:
+            wanted = set(needed)
+            options["usecols"] = needed
+
+    if plan is not None:
+        dates, formats = [], set()
+        for col, spec in plan.get("columns", {}).items():
+            if col not in wanted or col in CSV_DTYPES:
+                continue
+            if spec["kind"] == "datetime":
+                dates.append(col)
+                formats.add(spec.get("format"))
+            else:
+                dtypes[col] = _KIND_DTYPES[spec["kind"]]
+        # read_csv 의 date_format 은 하나만 받으므로 형식이 같을 때만 날짜 파싱을 맡김
+        if dates and len(formats) == 1 and None not in formats:
+            options["parse_dates"] = dates
+            options["date_format"] = formats.pop()
+
+    options["dtype"] = {col: dtype for col, dtype in dtypes.items() if col in wanted}
+    return options
+
+
+def load_plan(redis_client, fingerprint: str) -> Optional[dict]:
+    cached = redis_client.get(plan_cache_key(fingerprint))
+    return json.loads(cached) if cached else None
+
+
+def save_plan(redis_client, plan: dict, ttl: Optional[int] = None):
+    redis_client.set(plan_cache_key(plan["fingerprint"]), json.dumps(plan), ex=ttl)
@@ -0,0 +1,274 @@
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Callable, Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from app.services.dataset_manifest import normalize_path, split_label
+
+logger = logging.getLogger(__name__)
+
+# 샤드/manifest 는 학습 경로({그룹}) 아래 _shards/ 에 저장
+SHARD_DIR = "_shards"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def shard_prefix(base: str) -> str:
+    return f"{base}/{SHARD_DIR}" if base else SHARD_DIR
+
+
+def manifest_key(base: str) -> str:
+    return f"{shard_prefix(base)}/{MANIFEST_NAME}"
+
+
+def resize_image(data: bytes, size: Tuple[int, int]) -> np.ndarray:
+    """이미지 바이트 → (H, W, 3) uint8. 서빙 전처리와 같은 PIL 리사이즈 (JPEG 은 draft 축소 디코딩)"""
+    img = Image.open(io.BytesIO(data))
+    if img.format == "JPEG":
+        img.draft("RGB", size)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if img.size != tuple(size):
+        img = img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def _example(image: np.ndarray, label: int, path: str) -> bytes:
+    feature = {
+        "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[image.tobytes()])),
+        "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[label])),
+        "path": tf.train.Feature(bytes_list=tf.train.BytesList(value=[path.encode()])),
+    }
+    return tf.train.Example(features=tf.train.Features(feature=feature)).SerializeToString()
+
+
+class _OpenShard:
+    def __init__(self, key: str):
+        fd, self.local_path = tempfile.mkstemp(suffix=".tfrecord")
+        os.close(fd)
+        self.key = key
+        self.writer = tf.io.TFRecordWriter(self.local_path)
+        self.count = 0
+        self.bytes = 0
+        self.label_counts: Dict[int, int] = {}
+
+
+class ShardWriter:
+    """
+    데이터셋 준비 중 라벨이 있는 이미지를 미리 리사이즈해 그룹(학습 경로)별 TFRecord 샤드로 기록
+    - 레코드: image (H×W×3 uint8 원시 바이트), label, path → 학습 시 디코딩/리사이즈 없이 decode_raw
+    - 샤드가 shard_bytes 를 넘거나 열린 샤드가 max_open 개를 넘으면 upload(로컬 경로, S3 키) 후 로컬 파일 삭제
+      → 로컬 디스크 사용 ≈ max_open × shard_bytes
+    - close() 가 남은 샤드를 올리고 {그룹 경로: manifest} 반환
+      (dataset_version: 같은 준비 단계의 파일 manifest 버전. 학습 측은 버전이 다른 샤드를 쓰지 않음)
+    """
+
+    def __init__(
+        self,
+        base_prefix: str,
+        label_names: Sequence[str],
+        image_size: Tuple[int, int],
+        upload: Callable[[str, str], None],
+        shard_bytes: int,
+        max_open: int = 4,
+    ):
+        self.base_prefix = base_prefix
+        self.label_names = list(label_names)
+        self.image_size = tuple(image_size)
+        self.upload = upload
+        self.shard_bytes = shard_bytes
+        self.max_open = max(max_open, 1)
+        self._open: "OrderedDict[str, _OpenShard]" = OrderedDict()
+        self._shards: Dict[str, List[dict]] = {}
+        self.skipped = 0
+
+    def _group_base(self, group: str) -> str:
+        return f"{self.base_prefix}/{group}" if group else self.base_prefix
+
+    def add(self, path: str, data: bytes) -> bool:
+        """이미지 1장 추가. 라벨을 알 수 없거나 디코딩에 실패하면 False"""
+        found = split_label(path, self.label_names)
+        if found is None:
+            return False
+        group, label = found
+        try:
+            image = resize_image(data, self.image_size)
+        except Exception as e:
+            logger.warning(f"샤드에 넣을 수 없는 이미지 건너뜀: {path} ({e})")
+            self.skipped += 1
+            return False
+
+        record = _example(image, label, normalize_path(path))
+        shard = self._open.get(group)
+        if shard is None:
+            if len(self._open) >= self.max_open:
+                # 가장 오래 쓰지 않은 그룹의 샤드를 닫음 (그 그룹은 다음에 새 샤드로 이어 씀)
+                self._flush(*self._open.popitem(last=False))
+            number = len(self._shards.setdefault(group, []))
+            shard = _OpenShard(f"{shard_prefix(self._group_base(group))}/shard-{number:05d}.tfrecord")
+            self._open[group] = shard
+        self._open.move_to_end(group)
+
+        shard.writer.write(record)
+        shard.count += 1
+        shard.bytes += len(record)
+        shard.label_counts[label] = shard.label_counts.get(label, 0) + 1
+        if shard.bytes >= self.shard_bytes:
+            self._flush(group, self._open.pop(group))
+        return True
+
+    def _flush(self, group: str, shard: _OpenShard):
+        shard.writer.close()
+        size = os.path.getsize(shard.local_path)
+        try:
+            self.upload(shard.local_path, shard.key)
+        finally:
+            os.unlink(shard.local_path)
+        self._shards[group].append({
+            "key": shard.key,
+            "count": shard.count,
+            "bytes": size,
+            "label_counts": {self.label_names[k]: v for k, v in sorted(shard.label_counts.items())},
+        })
+
+    def close(self, dataset_version: Optional[str] = None) -> Dict[str, dict]:
+        while self._open:
+            self._flush(*self._open.popitem(last=False))
+
+        manifests = {}
+        image_spec = {"height": self.image_size[1], "width": self.image_size[0], "channels": 3, "dtype": "uint8"}
+        for group, shards in self._shards.items():
+            label_counts: Dict[str, int] = {}
+            for shard in shards:
+                for name, count in shard["label_counts"].items():
+                    label_counts[name] = label_counts.get(name, 0) + count
+            manifests[self._group_base(group)] = {
+                "version": MANIFEST_VERSION,
+                "format": "tfrecord",
+                "image": image_spec,
+                "labels": self.label_names,
+                "total": sum(s["count"] for s in shards),
+                "label_counts": label_counts,
+                "shards": shards,
+                "dataset_version": dataset_version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+        return manifests
+
+    def abort(self):
+        """실패 시 열린 샤드의 로컬 파일 정리 (업로드하지 않음)"""
+        while self._open:
+            _, shard = self._open.popitem()
+            shard.writer.close()
+            if os.path.exists(shard.local_path):
+                os.unlink(shard.local_path)
+
+
+# -----------------------------
+# 학습 측: 샤드 읽기
+# -----------------------------
+def load_manifest(s3_manager, base: str) -> Optional[dict]:
+    """학습 경로의 샤드 manifest (없으면 None)"""
+    key = manifest_key(base)
+    body = s3_manager.read_optional(key)
+    if body is None:
+        return None
+    manifest = json.loads(body.getvalue())
+    if manifest.get("version") != MANIFEST_VERSION or not manifest.get("shards"):
+        logger.warning(f"사용할 수 없는 샤드 manifest: {key}")
+        return None
+    return manifest
+
+
+def make_dataset(
+    shard_paths: Sequence[str], manifest: dict, image_size: Tuple[int, int], paths: Optional[Collection[str]] = None
+) -> tf.data.Dataset:
+    """
+    로컬 샤드 → (float32 이미지 /255, 라벨) tf.data.Dataset
+    샤드 순서를 섞고 여러 샤드를 번갈아 읽어 라벨/디렉터리 순으로 묶인 레코드를 섞음
+    paths: 주어지면 해당 압축 내 경로의 레코드만 사용 (manifest 기반 표본/학습·검증 분할)
+    """
+    spec = manifest["image"]
+    shape = [spec["height"], spec["width"], spec["channels"]]
+    target = [image_size[1], image_size[0]]
+
+    def parse(serialized):
+        features = tf.io.parse_single_example(serialized, {
+            "image": tf.io.FixedLenFeature([], tf.string),
+            "label": tf.io.FixedLenFeature([], tf.int64),
+            "path": tf.io.FixedLenFeature([], tf.string),
+        })
+        image = tf.reshape(tf.io.decode_raw(features["image"], tf.uint8), shape)
+        image = tf.cast(image, tf.float32)
+        if shape[:2] != target:
+            image = tf.image.resize(image, target)
+        return image / 255.0, tf.cast(features["label"], tf.int32)
+
+    def wanted(serialized):
+        path = tf.io.parse_single_example(serialized, {"path": tf.io.FixedLenFeature([], tf.string)})["path"]
+        return table.lookup(path)
+
+    files = tf.data.Dataset.from_tensor_slices(list(shard_paths)).shuffle(len(shard_paths))
+    records = files.interleave(
+        tf.data.TFRecordDataset, cycle_length=min(len(shard_paths), 8), num_parallel_calls=tf.data.AUTOTUNE
+    )
+    if paths is not None:
+        # 디코딩 전에 경로만 파싱해 걸러냄 (빈 목록이면 어떤 경로와도 맞지 않는 "" 하나로 테이블 구성)
+        keys = tf.constant(sorted(paths) or [""], dtype=tf.string)
+        table = tf.lookup.StaticHashTable(
+            tf.lookup.KeyValueTensorInitializer(keys, tf.fill(tf.shape(keys), True)), default_value=False
+        )
+        records = records.filter(wanted)
+    return records.map(parse, num_parallel_calls=tf.data.AUTOTUNE)
+
+
+def write_calibration_images(
+    shard_paths: Sequence[str],
+    manifest: dict,
+    out_dir: str,
+    limit: int,
+    seed: int = 42,
+    paths: Optional[Collection[str]] = None,
+) -> Tuple[List[str], List[int]]:
+    """
+    INT8 보정/평가용: 샤드 레코드 중 최대 limit 장을 무작위(고정 시드 저장소 표집)로 골라 PNG 로 저장 → (경로 목록, 라벨 목록)
+    (양자화 모듈은 이미지 파일 경로 기반)
+    paths: 주어지면 해당 압축 내 경로의 레코드 중에서만 고름 (학습/검증 분할)
+    """
+    spec = manifest["image"]
+    shape = (spec["height"], spec["width"], spec["channels"])
+    rng = np.random.default_rng(seed)
+    picked: List[bytes] = []
+    seen = 0
+    for serialized in tf.data.TFRecordDataset(list(shard_paths)):
+        serialized = serialized.numpy()
+        if paths is not None:
+            path = tf.train.Example.FromString(serialized).features.feature["path"].bytes_list.value[0].decode()
+            if path not in paths:
+                continue
+        if len(picked) < limit:
+            picked.append(serialized)
+        else:
+            j = int(rng.integers(0, seen + 1))
+            if j < limit:
+                picked[j] = serialized
+        seen += 1
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths, labels = [], []
+    for i, serialized in enumerate(picked):
+        feature = tf.train.Example.FromString(serialized).features.feature
+        image = np.frombuffer(feature["image"].bytes_list.value[0], dtype=np.uint8).reshape(shape)
+        path = os.path.join(out_dir, f"{i:06d}.png")
+        Image.fromarray(image).save(path)
+        paths.append(path)
+        labels.append(int(feature["label"].int64_list.value[0]))
+    return paths, labels
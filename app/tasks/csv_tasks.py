@@ -1,53 +1,210 @@
 import json
-from celery import shared_task
+import logging
+import os
+import tempfile
+from contextlib import closing
+from datetime import date
+import pandas as pd
+from celery import chord, shared_task
 
 from app.core.redis import redis_client_sync  # 동기 Redis
-from app.services.csv_convert import convert_xlsx_to_csv
-from app.services.data_service import process_csv
+from app.services.data_service import process_csv_partitions, process_csv_stream, process_parquet, process_xlsx
+from app.services.parquet_store import ParquetChunkWriter, processed_key
+from app.core.metrics import (
+    ProfileAccumulator,
+    accumulators_from_state,
+    accumulators_to_state,
+    finalize_accumulators,
+    merge_accumulators,
+)
+from app.services.csv_engine import (
+    CSV_ENCODING,
+    DailyAccumulators,
+    accumulate_chunks,
+    compute_daily_states_parquet,
+    count_skipped_lines,
+    csv_read_kwargs,
+    profile_read_options,
+)
+from app.services.csv_ranges import LineRangeReader, plan_byte_ranges, range_read_offset
+from app.services.schema_plan import (
+    PlanObserver,
+    header_fingerprint,
+    load_plan,
+    peek_header,
+    plan_read_options,
+    read_header,
+    refine_plan,
+    save_plan,
+    widen_plan,
+)
+from app.services.dataset_service import fold_upload
 from app.integrations.django_bridge import get_upload_record_model
 from app.core.s3_manager import s3_manager
+from app.core.config import settings
 
 UploadRecord = get_upload_record_model()
+logger = logging.getLogger(__name__)
+
+def _upload_parquet(local_path: str, record_id: int, filename: str) -> str:
+    # 원본을 한 번만 Parquet 로 변환해 S3_PROCESSED_FOLDER 에 보관 (이후 분석은 필요한 컬럼만 읽음)
+    key = processed_key(settings.S3_PROCESSED_FOLDER, record_id, filename)
+    s3_manager.upload_file(local_path, s3_manager.bucket, key)
+    return key
+
+def _fold_into_dataset(record, parquet_path: str):
+    # 데이터셋에 속한 업로드: 일별 부분 결과를 데이터셋 상태에 합침 (로컬 Parquet 에서 필요한 컬럼만 읽음)
+    try:
+        daily = compute_daily_states_parquet(
+            parquet_path, distinct_modes=settings.CSV_DISTINCT_MODES, hll_precision=settings.CSV_HLL_PRECISION
+        )
+        fold_upload(record.id, daily)
+        record.refresh_from_db(fields=["folded_at"])
+    except Exception:
+        logger.exception(f"데이터셋 반영 실패 (record_id={record.id})")
+
+def _run_with_plan(header, run):
+    """
+    헤더 지문으로 캐시된 스키마 계획을 찾아 run(plan) 실행 → (stats, converted, data_profile)
+    - 계획대로 읽다 실패하면(새 파일에 결측/다른 형식 등) 숫자/날짜 고정을 푼 계획으로 한 번 더 실행
+    - 실행 중 관찰한 컬럼 종류로 계획을 갱신해 다음 파일에 사용
+    """
+    fingerprint = header_fingerprint(header) if settings.CSV_SCHEMA_PLAN_ENABLED and header else None
+    plan = None
+    if fingerprint:
+        try:
+            plan = load_plan(redis_client_sync, fingerprint)
+        except Exception as e:
+            logger.warning(f"스키마 계획 조회 실패: {e}")
+
+    try:
+        stats, converted, observer, data_profile = run(plan)
+    except Exception:
+        if plan is None:
+            raise
+        logger.warning(f"스키마 계획으로 읽기 실패, 추론 모드로 재시도 (fingerprint={fingerprint})", exc_info=True)
+        plan = widen_plan(plan)
+        stats, converted, observer, data_profile = run(plan)
+
+    if fingerprint:
+        try:
+            save_plan(redis_client_sync, refine_plan(plan, fingerprint, header, observer.kinds), settings.CSV_SCHEMA_PLAN_TTL)
+        except Exception as e:
+            logger.warning(f"스키마 계획 저장 실패: {e}")
+    return stats, converted, data_profile
 
 @shared_task(bind=True)
-def process_csv_task(self, s3_key: bytes, filename: str, record_id: int):
+def process_csv_task(self, s3_key: bytes, filename: str, record_id: int, profile: bool = False):
     record = UploadRecord.objects.get(id=record_id)
-    cache_key = f"csv_file:{filename}"
 
     try:
-        # Redis 캐시 확인
-        cached_stats = redis_client_sync.get(cache_key)
+        # Redis 캐시 확인 (파일명 + S3 ETag 기준 → 같은 이름으로 내용이 바뀐 파일을 다시 올리면 새로 처리)
+        # 데이터셋 업로드는 일별 부분 결과가, 프로파일 요청은 원본 행이 필요하므로 캐시를 쓰지 않음
+        etag = s3_manager.head_object(s3_key)["ETag"].strip('"')
+        cache_key = f"csv_file:{filename}:{etag}"
+        parquet_cache_key = f"csv_parquet:{filename}:{etag}"
+        cached_stats = None if record.dataset_id or profile else redis_client_sync.get(cache_key)
         if cached_stats:
             stats = json.loads(cached_stats)
             record.statistics = cached_stats
+            record.processed_key = redis_client_sync.get(parquet_cache_key)
             record.status = "SUCCESS"
             record.save()
             return {"record_id": record.id, "statistics": stats, "source": "redis"}
         
-        # S3에서 파일 다운로드 (Worker 메모리로 로드)
-        file_obj = s3_manager.read_file(s3_key)
+        # CSV 처리 + Parquet 변환
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parquet_path = os.path.join(tmp_dir, "processed.parquet")
 
-        # 파일 사이즈 업데이트
-        file_size = file_obj.getbuffer().nbytes
-        record.file_size = file_size
-        record.save()
+            if filename.lower().endswith(".xlsx"):
+                # XLSX 는 zip 컨테이너라 임의 접근이 필요 → 임시 파일로 받은 뒤 행 단위로 스트리밍
+                # 읽은 행 청크로 통계와 Parquet 을 함께 처리 (CSV 변환 없음)
+                local_path = os.path.join(tmp_dir, os.path.basename(s3_key))
+                s3_manager.download_file(s3_key, local_path)
+                record.file_size = os.path.getsize(local_path)
+                record.save()
 
-        # CSV 처리
-        if filename.lower().endswith(".xlsx"):
-            csv_file = convert_xlsx_to_csv(file_obj)
-            stats = process_csv(csv_file)
-        else:
-            stats = process_csv(file_obj)
+                data_profile = ProfileAccumulator() if profile else None
+                writer = ParquetChunkWriter(parquet_path)
+                with writer:
+                    stats = process_xlsx(local_path, on_chunk=writer.write, profile=data_profile)
+                converted = writer.close()
+            elif settings.CSV_ENGINE == "stream":
+                # S3 응답 본문을 받는 대로 청크 단위로 파싱 (파일 크기와 무관하게 메모리 사용량 일정)
+                # 같은 청크로 Parquet 도 함께 기록 → 원본은 한 번만 파싱
+                body, file_size = s3_manager.open_stream(s3_key)
+                record.file_size = file_size
+                record.save()
+                # 헤더 행만 먼저 읽어 스키마 계획 조회 (읽은 부분은 파서에 그대로 이어서 전달)
+                header, stream = peek_header(body, CSV_ENCODING)
+                streams = [stream]
+
+                def run(plan):
+                    # 재시도 시에는 본문을 다시 요청
+                    source = streams.pop() if streams else peek_header(s3_manager.open_stream(s3_key)[0], CSV_ENCODING)[1]
+                    observer = PlanObserver(plan)
+                    data_profile = ProfileAccumulator() if profile else None
+                    writer = ParquetChunkWriter(parquet_path)
+
+                    def on_chunk(chunk):
+                        observer.observe(chunk)
+                        writer.write(chunk)
+
+                    with closing(source), writer:
+                        stats = process_csv_stream(
+                            source, on_chunk=on_chunk, read_options=plan_read_options(plan, header), profile=data_profile
+                        )
+                    return stats, writer.close(), observer, data_profile
+
+                stats, converted, data_profile = _run_with_plan(header, run)
+            else:
+                # Dask 파티션 엔진: 임시 파일로 내려받아 병렬 처리
+                local_path = os.path.join(tmp_dir, os.path.basename(s3_key))
+                s3_manager.download_file(s3_key, local_path)
+                record.file_size = os.path.getsize(local_path)
+                record.save()
+
+                header = read_header(local_path, CSV_ENCODING)
+
+                def run(plan):
+                    # 파티션을 병렬로 파싱하고, 같은 파티션으로 통계/Parquet 변환/프로파일을 함께 처리 (CSV 는 한 번만 파싱)
+                    observer = PlanObserver(plan)
+                    data_profile = ProfileAccumulator() if profile else None
+                    writer = ParquetChunkWriter(parquet_path)
+
+                    def on_chunk(chunk):
+                        observer.observe(chunk)
+                        writer.write(chunk)
+
+                    with writer:
+                        stats = process_csv_partitions(
+                            local_path, on_chunk=on_chunk,
+                            read_options=plan_read_options(plan, header), profile=data_profile,
+                        )
+                    return stats, writer.close(), observer, data_profile
+
+                stats, converted, data_profile = _run_with_plan(header, run)
+
+            if converted:
+                record.processed_key = _upload_parquet(parquet_path, record.id, filename)
+                if record.dataset_id:
+                    _fold_into_dataset(record, parquet_path)
+            elif record.dataset_id:
+                logger.warning(f"Parquet 변환 실패로 데이터셋에 반영하지 못함 (record_id={record.id})")
 
         stats_json = json.dumps(stats)
 
         # DB 저장
         record.statistics = stats_json
+        if data_profile is not None:
+            record.profile = data_profile.finalize()
         record.status = "SUCCESS"
         record.save()
 
         # Redis 저장 (1시간 TTL)
         redis_client_sync.set(cache_key, stats_json, ex=3600)
+        if record.processed_key:
+            redis_client_sync.set(parquet_cache_key, record.processed_key, ex=3600)
         for col, value in stats.items():
             redis_client_sync.set(f"csv_col:{col}", value, ex=3600)
 
@@ -58,3 +215,195 @@ def process_csv_task(self, s3_key: bytes, filename: str, record_id: int):
         record.statistics = json.dumps({"error": str(e)})
         record.save()
         return {"error": str(e)}
+
+
+@shared_task(bind=True)
+def recompute_csv_stats_task(self, record_id: int):
+    # 원본 CSV 를 다시 파싱하지 않고 변환된 Parquet 에서 필요한 컬럼만 읽어 통계 재계산 (METRICS 변경 시 등)
+    record = UploadRecord.objects.get(id=record_id)
+    if not record.processed_key:
+        return {"error": "변환된 Parquet 없음"}
+
+    stats = process_parquet(record.processed_key)
+    record.statistics = json.dumps(stats)
+    record.save(update_fields=["statistics"])
+    return {"record_id": record.id, "statistics": stats, "source": "parquet"}
+
+
+# -----------------------------
+# 여러 파일 CSV 업로드: 바이트 구간 단위로 나눠 워커들에 분산 (group → chord 병합)
+# -----------------------------
+@shared_task(bind=True)
+def process_csv_batch_task(self, s3_keys: list, record_id: int, profile: bool = False):
+    """
+    업로드된 CSV 들을 CSV_BATCH_CHUNK_BYTES 구간으로 나눠 구간별 부분 집계 태스크를 chord 로 실행
+    처리 시간은 (전체 크기 / 워커 프로세스 수) 에 비례
+    """
+    record = UploadRecord.objects.get(id=record_id)
+    try:
+        parts, total_size = [], 0
+        for s3_key in s3_keys:
+            size = s3_manager.head_object(s3_key)["ContentLength"]
+            total_size += size
+            if size == 0:
+                continue
+            # 헤더 행만 읽어 구간 태스크에 전달 (구간은 헤더 없이 시작)
+            with closing(s3_manager.open_range(s3_key, 0)) as body:
+                header, _ = peek_header(body, CSV_ENCODING)
+            if not header:
+                continue
+
+            plan = None
+            if settings.CSV_SCHEMA_PLAN_ENABLED:
+                try:
+                    plan = load_plan(redis_client_sync, header_fingerprint(header))
+                except Exception as e:
+                    logger.warning(f"스키마 계획 조회 실패: {e}")
+
+            for start, end in plan_byte_ranges(size, settings.CSV_BATCH_CHUNK_BYTES):
+                part_key = f"{settings.S3_PROCESSED_FOLDER}/{record_id}/part-{len(parts):05d}.parquet"
+                parts.append(csv_range_stats_task.s(
+                    s3_key, start, end, header, plan, part_key, bool(record.dataset_id), profile
+                ))
+
+        if not parts:
+            raise ValueError("처리할 CSV 데이터가 없습니다.")
+
+        record.file_size = total_size
+        record.save(update_fields=["file_size"])
+
+        callback = merge_csv_batch_task.s(record_id).on_error(csv_batch_failed_task.s(record_id))
+        chord(parts)(callback)
+        logger.info(f"CSV 일괄 처리 분배: record_id={record_id}, files={len(s3_keys)}, parts={len(parts)}")
+        return {"record_id": record_id, "parts": len(parts)}
+
+    except Exception as e:
+        record.status = "FAILURE"
+        record.statistics = json.dumps({"error": str(e)})
+        record.save()
+        return {"error": str(e)}
+
+
+@shared_task(bind=True)
+def csv_range_stats_task(
+    self, s3_key: str, start: int, end: int, header: list, plan, part_key: str, with_daily: bool,
+    with_profile: bool = False,
+):
+    """
+    CSV 의 바이트 구간 [start, end) 하나를 파싱해 부분 집계 상태 반환 (최종 통계가 아닌 병합 가능한 누적기 상태)
+    - 같은 패스에서 구간의 Parquet 조각을 기록하고, 데이터셋 업로드면 일별 부분 결과, 요청 시 프로파일도 계산
+    - 스키마 계획은 읽기에만 사용 (계획 갱신은 단일 업로드 처리에서), 계획대로 읽다 실패하면 고정을 풀고 재시도
+    """
+    def run(options):
+        daily = DailyAccumulators(
+            distinct_modes=settings.CSV_DISTINCT_MODES, hll_precision=settings.CSV_HLL_PRECISION
+        ) if with_daily else None
+        data_profile = ProfileAccumulator() if with_profile else None
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = ParquetChunkWriter(os.path.join(tmp_dir, "part.parquet"))
+
+            def on_chunk(chunk):
+                writer.write(chunk)
+                if daily is not None:
+                    daily.update(chunk)
+
+            reader = LineRangeReader(s3_manager.open_range(s3_key, range_read_offset(start)), start, end)
+            with closing(reader), writer, count_skipped_lines(data_profile):
+                try:
+                    chunks = pd.read_csv(
+                        reader, header=None, names=header, chunksize=settings.CSV_STREAM_CHUNK_ROWS,
+                        **csv_read_kwargs(profile_read_options(options, data_profile)),
+                    )
+                except pd.errors.EmptyDataError:
+                    # 구간 안에서 시작하는 줄이 없음 (헤더만 있는 파일, 구간보다 긴 줄 등)
+                    chunks = []
+                accumulators, rows = accumulate_chunks(
+                    chunks, settings.CSV_DISTINCT_MODES, settings.CSV_HLL_PRECISION, on_chunk, data_profile
+                )
+            converted = writer.close()
+            if converted:
+                s3_manager.upload_file(writer.path, s3_manager.bucket, part_key)
+
+        return {
+            "state": accumulators_to_state(accumulators),
+            "rows": rows,
+            # 행이 없는 구간은 Parquet 조각이 없어도 정상
+            "converted": converted or rows == 0,
+            "daily": {
+                (day.isoformat() if day else ""): [state, day_rows]
+                for day, (state, day_rows) in daily.states().items()
+            } if daily is not None else None,
+            "profile": data_profile.to_state() if data_profile is not None else None,
+        }
+
+    try:
+        return run(plan_read_options(plan, header))
+    except Exception:
+        if plan is None:
+            raise
+        logger.warning(f"스키마 계획으로 구간 읽기 실패, 추론 모드로 재시도 ({s3_key} [{start}, {end}))", exc_info=True)
+        return run(plan_read_options(widen_plan(plan), header))
+
+
+@shared_task(bind=True)
+def merge_csv_batch_task(self, results: list, record_id: int):
+    """구간별 부분 집계를 병합해 최종 통계 저장 (chord 콜백)"""
+    record = UploadRecord.objects.get(id=record_id)
+    try:
+        merged = None
+        for result in results:
+            accumulators = accumulators_from_state(result["state"])
+            merged = accumulators if merged is None else merge_accumulators(merged, accumulators)
+        stats = finalize_accumulators(merged)
+        rows = sum(result["rows"] for result in results)
+
+        # 구간별 Parquet 조각은 한 디렉터리에 모여 있음 → 디렉터리("/" 로 끝나는 키)를 업로드의 변환 위치로 기록
+        if all(result["converted"] for result in results):
+            record.processed_key = f"{settings.S3_PROCESSED_FOLDER}/{record_id}/"
+        else:
+            logger.warning(f"일부 구간의 Parquet 변환 실패 (record_id={record_id})")
+
+        profiles = [ProfileAccumulator.from_state(result["profile"]) for result in results if result.get("profile")]
+        if profiles:
+            for other in profiles[1:]:
+                profiles[0].merge(other)
+            record.profile = profiles[0].finalize()
+
+        record.statistics = json.dumps(stats)
+        record.status = "SUCCESS"
+        record.save()
+
+        if record.dataset_id:
+            daily = {}
+            for result in results:
+                for day, (state, day_rows) in (result["daily"] or {}).items():
+                    key = date.fromisoformat(day) if day else None
+                    if key in daily:
+                        current, current_rows = daily[key]
+                        state = accumulators_to_state(
+                            merge_accumulators(accumulators_from_state(current), accumulators_from_state(state))
+                        )
+                        day_rows += current_rows
+                    daily[key] = (state, day_rows)
+            try:
+                fold_upload(record_id, daily)
+            except Exception:
+                logger.exception(f"데이터셋 반영 실패 (record_id={record_id})")
+
+        logger.info(f"CSV 일괄 처리 완료: record_id={record_id}, parts={len(results)}, rows={rows}")
+        return {"record_id": record_id, "statistics": stats, "source": "batch"}
+
+    except Exception as e:
+        record.status = "FAILURE"
+        record.statistics = json.dumps({"error": str(e)})
+        record.save()
+        return {"error": str(e)}
+
+
+@shared_task
+def csv_batch_failed_task(request, exc, traceback, record_id: int):
+    """구간 태스크가 실패해 chord 콜백이 실행되지 못한 경우 업로드를 실패로 표시"""
+    logger.error(f"CSV 일괄 처리 실패 (record_id={record_id}): {exc}")
+    UploadRecord.objects.filter(id=record_id).update(
+        status="FAILURE", statistics=json.dumps({"error": str(exc)})
+    )
@@ -1,14 +1,16 @@
 import os
+import json
 import shutil
 import tempfile
-import zipfile
 import logging
 import time
+from io import BytesIO
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, models
 from tensorflow.keras.callbacks import Callback
 import tf2onnx
+import onnx
 import s3fs
 from asgiref.sync import sync_to_async
 
@@ -17,10 +19,36 @@ from app.core.config import settings
 from app.integrations.django_bridge import get_upload_record_model
 from app.core.celery_app import celery_app
 from app.core.s3_manager import S3Manager
+from app.core.redis import redis_client_sync
+from app.services.model_quantization import EVALUATION_SIZE, build_quantized_model, publish_decision
+from app.services.model_registry import MODEL_UPDATE_CHANNEL
+from app.services.model_spec import ModelSpec, SPEC_METADATA_KEY
+from app.services.image_archive import is_dataset_file, iter_archive_members
+from app.services.dataset_manifest import (
+    ManifestBuilder,
+    load_manifest as load_dataset_manifest,
+    save_manifest as save_dataset_manifest,
+    stratified_sample,
+    tee_images,
+    train_val_split,
+)
+from app.services.training_shards import (
+    MANIFEST_NAME,
+    ShardWriter,
+    load_manifest as load_shard_manifest,
+    make_dataset,
+    manifest_key as shard_manifest_key,
+    shard_prefix,
+    write_calibration_images,
+)
 
 logger = logging.getLogger(__name__)
 UploadRecord = get_upload_record_model()
 
+# 학습/서빙 공통 입력 규격 (ONNX 메타데이터로 함께 내보냄)
+IMG_SIZE = 256
+LABEL_NAMES = ['good', 'defect']
+
 # =================================================================
 # 학습 전용 유틸리티 함수 및 클래스
 # =================================================================
@@ -29,7 +57,7 @@ def load_and_preprocess_image(path_tensor: tf.Tensor, label: tf.Tensor) -> tuple
     # S3 경로를 받아 이미지를 로드하고 전처리하는 tf.data.Dataset map 함수
     img_raw = tf.io.read_file(path_tensor)
     img = tf.image.decode_jpeg(img_raw, channels=3)
-    img = tf.image.resize(img, (224, 224)) 
+    img = tf.image.resize(img, (IMG_SIZE, IMG_SIZE)) 
     img = img / 255.0
     label = tf.one_hot(label, depth=2) 
     return img, label
@@ -106,6 +134,7 @@ class S3CheckpointCallback(Callback):
 @celery_app.task(bind=True)
 def trigger_training_task(self, category: str):
     temp_onnx_path = None
+    temp_int8_path = None
     local_data_dir = None
     s3_manager = S3Manager()
 
@@ -116,54 +145,134 @@ def trigger_training_task(self, category: str):
         # 학습 환경 정의
         EPOCHS = 3
         BATCH_SIZE = 16 #4
-        LABEL_NAMES = ['good', 'defect']
         
         # S3 학습 데이터 경로, 최종 베이스 경로 정의
         MVTEC_BASE_DIR = f"{settings.S3_TRAINING_DATA_FOLDER}/mvtec_ad"
-        S3_TRAIN_DIR = f"s3://{settings.BUCKET_NAME}/{MVTEC_BASE_DIR}/{category}/train"
-
-        # S3에서 파일 경로 목록 가져오기
-        all_image_paths, all_image_labels, num_classes = get_s3_files(S3_TRAIN_DIR, LABEL_NAMES)
-
-        if not all_image_paths:
-            logger.error(f"S3 경로 {S3_TRAIN_DIR}에서 파일을 찾을 수 없습니다.")
-            return {"status": "failed", "reason": "No training data found"}
-
-        logger.info(f"S3에서 총 {len(all_image_paths)}개의 학습 파일을 찾았습니다. 로컬 다운로드 시작.")
-
-        # S3 파일들을 로컬로 다운로드 및 로컬 경로 목록 생성
-        local_image_paths = []
-        
-        for s3_url in all_image_paths:
-            s3_key = s3_url.replace(f"s3://{settings.BUCKET_NAME}/", "")
+        S3_TRAIN_PREFIX = f"{MVTEC_BASE_DIR}/{category}/train"
+        S3_TRAIN_DIR = f"s3://{settings.BUCKET_NAME}/{S3_TRAIN_PREFIX}"
+
+        # 데이터셋 준비 단계의 파일 목록 manifest (GET 한 번) → 재귀 glob 없이 표본 추출 / 학습·검증 분할
+        train_entries, val_entries = None, []
+        dataset_manifest = load_dataset_manifest(s3_manager, S3_TRAIN_PREFIX)
+        if dataset_manifest is not None:
+            entries = [entry for entry in dataset_manifest["files"] if entry["label"] in LABEL_NAMES]
+            entries = stratified_sample(entries, settings.TRAINING_SAMPLE_SIZE)
+            train_entries, val_entries = train_val_split(entries, settings.TRAINING_VAL_FRACTION)
+            logger.info(
+                f"데이터셋 manifest {dataset_manifest['version']}: 학습 {len(train_entries)}개, 검증 {len(val_entries)}개"
+            )
+
+        # 데이터셋 준비 단계에서 만든 TFRecord 샤드가 있으면 샤드 몇 개(큰 순차 객체)만 받아 전체 데이터로 학습
+        shard_manifest = load_shard_manifest(s3_manager, S3_TRAIN_PREFIX)
+        if shard_manifest is not None and shard_manifest["labels"] != LABEL_NAMES:
+            logger.warning(f"샤드 라벨 {shard_manifest['labels']} 이 학습 라벨과 달라 개별 파일로 학습합니다.")
+            shard_manifest = None
+        if (
+            shard_manifest is not None and dataset_manifest is not None
+            and shard_manifest.get("dataset_version") != dataset_manifest["version"]
+        ):
+            # 이전 준비 단계의 샤드: 새 파일 목록에만 있는 이미지가 빠지므로 쓰지 않음
+            logger.warning(
+                f"샤드 버전 {shard_manifest.get('dataset_version')} 이 데이터셋 manifest {dataset_manifest['version']} 와 "
+                f"달라 개별 파일로 학습합니다."
+            )
+            shard_manifest = None
+
+        val_dataset = None
+        if shard_manifest is not None:
+            shard_downloads = [
+                (shard["key"], os.path.join(local_data_dir, "shards", os.path.basename(shard["key"])))
+                for shard in shard_manifest["shards"]
+            ]
+            s3_manager.download_many(shard_downloads)
+            shard_paths = [local_path for _, local_path in shard_downloads]
+            num_classes = len(LABEL_NAMES)
+            # 파일 manifest 가 있으면 그 분할에 속한 레코드만 사용
+            train_paths = {entry["path"] for entry in train_entries} if train_entries is not None else None
+            train_dataset = make_dataset(shard_paths, shard_manifest, (IMG_SIZE, IMG_SIZE), paths=train_paths)
+            if val_entries:
+                val_paths = {entry["path"] for entry in val_entries}
+                val_dataset = make_dataset(shard_paths, shard_manifest, (IMG_SIZE, IMG_SIZE), paths=val_paths)
+
+            # INT8 보정/평가는 이미지 파일 경로 기반 → 샤드에서 표본만 파일로 꺼냄
+            # 보정은 학습 분할, 정확도 비교는 검증 분할 (검증 분할이 없으면 양자화 모듈이 보정 전에 평가용 표본을 떼어냄)
+            local_image_paths, all_image_labels = [], []
+            eval_image_paths, eval_image_labels = [], []
+            if settings.QUANTIZATION_ENABLED:
+                calibration_limit = settings.QUANTIZATION_CALIBRATION_SIZE
+                if val_dataset is None:
+                    calibration_limit += EVALUATION_SIZE
+                local_image_paths, all_image_labels = write_calibration_images(
+                    shard_paths, shard_manifest, os.path.join(local_data_dir, "calibration"),
+                    calibration_limit, paths=train_paths,
+                )
+                if val_dataset is not None:
+                    eval_image_paths, eval_image_labels = write_calibration_images(
+                        shard_paths, shard_manifest, os.path.join(local_data_dir, "evaluation"),
+                        EVALUATION_SIZE, paths=val_paths,
+                    )
+            logger.info(
+                f"샤드 {len(shard_paths)}개 다운로드 완료. 총 {shard_manifest['total']}개 "
+                f"({shard_manifest['label_counts']}). 학습 시작."
+            )
+        else:
+            if train_entries is not None:
+                # manifest 항목으로 바로 다운로드 목록 구성 (LIST 호출 없음)
+                all_image_keys = [entry["key"] for entry in train_entries]
+                all_image_labels = [LABEL_NAMES.index(entry["label"]) for entry in train_entries]
+                num_classes = len(LABEL_NAMES)
+            else:
+                # manifest 가 없는 이전 데이터: S3에서 파일 경로 목록 가져오기
+                all_image_paths, all_image_labels, num_classes = get_s3_files(S3_TRAIN_DIR, LABEL_NAMES)
+                all_image_keys = [s3_url.replace(f"s3://{settings.BUCKET_NAME}/", "") for s3_url in all_image_paths]
+
+            if not all_image_keys:
+                logger.error(f"S3 경로 {S3_TRAIN_DIR}에서 파일을 찾을 수 없습니다.")
+                return {"status": "failed", "reason": "No training data found"}
+
+            logger.info(f"S3에서 총 {len(all_image_keys)}개의 학습 파일을 찾았습니다. 로컬 다운로드 시작.")
+
+            # S3 파일들을 로컬로 다운로드 및 로컬 경로 목록 생성 (검증용 파일 포함)
+            # 스레드 풀로 동시 다운로드 (파일 단위 재시도, 연결 풀 재사용)
+            def local_path_for(s3_key):
+                relative_path = s3_key.replace(f"{MVTEC_BASE_DIR}/", "") 
+                return os.path.join(local_data_dir, relative_path)
+
+            val_keys = [entry["key"] for entry in val_entries]
+            downloads = [(s3_key, local_path_for(s3_key)) for s3_key in all_image_keys + val_keys]
+
+            s3_manager.download_many(downloads)
+            local_image_paths = [local_path_for(s3_key) for s3_key in all_image_keys]
+            eval_image_paths = [local_path_for(s3_key) for s3_key in val_keys]
+            eval_image_labels = [LABEL_NAMES.index(entry["label"]) for entry in val_entries]
+
+            logger.info(f"로컬 다운로드 완료. 총 {len(downloads)}개. 학습 시작.")
+
+            # Keras/TF 학습 시작 (로컬 경로 사용)
             
-            relative_path = s3_key.replace(f"{MVTEC_BASE_DIR}/", "") 
-            local_path = os.path.join(local_data_dir, relative_path)
-            
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            s3_manager.download_file(s3_key, local_path)
-            local_image_paths.append(local_path)
-
-        logger.info(f"로컬 다운로드 완료. 총 {len(local_image_paths)}개. 학습 시작.")
+            # 데이터 전처리 함수 정의
+            def load_and_preprocess_image(path, label):
+                image = tf.io.read_file(path)
+                image = tf.image.decode_image(image, channels=3, expand_animations=False) # JPG/PNG 파일 모두 처리
+                image = tf.image.resize(image, [IMG_SIZE, IMG_SIZE])
+                image = tf.cast(image, tf.float32) / 255.0
+                return image, label
+
+            # Dataset 생성 및 구성
+            train_dataset = tf.data.Dataset.from_tensor_slices((local_image_paths, all_image_labels))
+            train_dataset = train_dataset.map(load_and_preprocess_image, num_parallel_calls=tf.data.AUTOTUNE) # 병렬 처리 활성화
+            # train_dataset = train_dataset.map(load_and_preprocess_image) # 병렬 처리 비활성화
+
+            if val_keys:
+                val_dataset = tf.data.Dataset.from_tensor_slices((eval_image_paths, eval_image_labels))
+                val_dataset = val_dataset.map(load_and_preprocess_image, num_parallel_calls=tf.data.AUTOTUNE)
 
-        # Keras/TF 학습 시작 (로컬 경로 사용)
-        
-        # 데이터 전처리 함수 정의
-        def load_and_preprocess_image(path, label):
-            image = tf.io.read_file(path)
-            image = tf.image.decode_image(image, channels=3, expand_animations=False) # JPG/PNG 파일 모두 처리
-            image = tf.image.resize(image, [256, 256])
-            image = tf.cast(image, tf.float32) / 255.0
-            return image, label
-
-        # Dataset 생성 및 구성
-        train_dataset = tf.data.Dataset.from_tensor_slices((local_image_paths, all_image_labels))
-        train_dataset = train_dataset.map(load_and_preprocess_image, num_parallel_calls=tf.data.AUTOTUNE) # 병렬 처리 활성화
-        # train_dataset = train_dataset.map(load_and_preprocess_image) # 병렬 처리 비활성화
         train_dataset = train_dataset.shuffle(buffer_size=100).batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+        if val_dataset is not None:
+            val_dataset = val_dataset.batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
 
         # 모델 정의 및 학습
-        inputs = layers.Input(shape=(256, 256, 3), name='input_image') # 입력 노드 정의 및 이름 지정
+        inputs = layers.Input(shape=(IMG_SIZE, IMG_SIZE, 3), name='input_image') # 입력 노드 정의 및 이름 지정
         x = layers.Conv2D(32, (3, 3), activation='relu')(inputs)
         x = layers.MaxPooling2D(pool_size=(2, 2))(x)
         x = layers.Flatten()(x)
@@ -172,25 +281,67 @@ def trigger_training_task(self, category: str):
 
         model = models.Model(inputs=inputs, outputs=outputs)
         model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
-        model.build(input_shape=(None, 256, 256, 3))
+        model.build(input_shape=(None, IMG_SIZE, IMG_SIZE, 3))
 
         s3_callback = S3CheckpointCallback(s3_prefix=f"models/{category}_checkpoints")
         logger.info(f"모델 학습 시작. Category: {category}, Epochs: {EPOCHS}")
-        model.fit(train_dataset, epochs=EPOCHS, callbacks=[s3_callback])
+        model.fit(train_dataset, validation_data=val_dataset, epochs=EPOCHS, callbacks=[s3_callback])
         
         # ONNX 변환 및 S3 저장 (디스크 관리)
         with tempfile.NamedTemporaryFile(delete=False, suffix=".onnx") as tmp:
             temp_onnx_path = tmp.name
         
-        input_signature = [tf.TensorSpec(shape=[1, 256, 256, 3], dtype=tf.float32, name='input_image')]
+        # 배치 차원은 동적으로 두어 서빙 측 배치 추론 허용
+        input_signature = [tf.TensorSpec(shape=[None, IMG_SIZE, IMG_SIZE, 3], dtype=tf.float32, name='input_image')]
 
-        tf2onnx.convert.from_keras(model, input_signature=input_signature, output_path=temp_onnx_path)
+        onnx_model, _ = tf2onnx.convert.from_keras(model, input_signature=input_signature)
+
+        # 서빙 측 전처리/라벨 매핑이 참조할 입력 규격을 모델 메타데이터로 저장
+        spec = ModelSpec(
+            input_name='input_image', height=IMG_SIZE, width=IMG_SIZE, channels=3, dtype='float32',
+            scale=1.0 / 255.0, labels=LABEL_NAMES, version=time.strftime("%Y%m%d%H%M%S"),
+        )
+        onnx.helper.set_model_props(onnx_model, {SPEC_METADATA_KEY: spec.to_json()})
+        onnx.save(onnx_model, temp_onnx_path)
 
         final_s3_onnx_path = f"models/{category}_latest.onnx"
         s3_manager.upload_file(temp_onnx_path, settings.BUCKET_NAME, final_s3_onnx_path)
+
+        # INT8 양자화 변형 생성 (학습 이미지 샘플로 보정, 검증/홀드아웃 이미지의 정확도 저하가 허용 범위일 때만 게시)
+        quantization = None
+        int8_s3_path = f"models/{category}_latest.int8.onnx"
+        if settings.QUANTIZATION_ENABLED:
+            try:
+                temp_int8_path, quantization = build_quantized_model(
+                    temp_onnx_path, local_image_paths, all_image_labels, spec,
+                    mode=settings.QUANTIZATION_MODE, calibration_size=settings.QUANTIZATION_CALIBRATION_SIZE,
+                    eval_paths=eval_image_paths, eval_labels=eval_image_labels,
+                )
+                quantization["published"], quantization["reason"] = publish_decision(
+                    quantization, settings.QUANTIZATION_MAX_ACCURACY_DROP, settings.QUANTIZATION_MIN_EVAL_SAMPLES
+                )
+                if quantization["published"]:
+                    s3_manager.upload_file(temp_int8_path, settings.BUCKET_NAME, int8_s3_path)
+                else:
+                    logger.warning(f"INT8 모델을 게시하지 않음 ({quantization['reason']}): {quantization}")
+            except Exception as e:
+                logger.warning(f"INT8 양자화 실패 (float 모델만 게시): {e}", exc_info=True)
+
+            # 이전 학습의 INT8 모델이 새 float 모델 대신 서빙되지 않도록 정리
+            if not (quantization and quantization["published"]):
+                try:
+                    s3_manager.delete_file(int8_s3_path)
+                except Exception:
+                    pass
+
+        # API 서버의 모델 레지스트리에 새 버전 알림 (로드된 카테고리면 즉시 교체)
+        try:
+            redis_client_sync.publish(MODEL_UPDATE_CHANNEL, category)
+        except Exception as e:
+            logger.warning(f"모델 업데이트 알림 실패: {e}")
         
         logger.info(f"학습 완료 및 ONNX 모델 S3 업로드 성공. 경로: {final_s3_onnx_path}")
-        return {"status": "success", "category": category, "onnx_path": final_s3_onnx_path}
+        return {"status": "success", "category": category, "onnx_path": final_s3_onnx_path, "quantization": quantization}
 
     except Exception as e:
         logger.error(f"모델 학습 중 오류 발생: {e}", exc_info=True)
@@ -200,6 +351,9 @@ def trigger_training_task(self, category: str):
         if local_data_dir and os.path.exists(local_data_dir):
             shutil.rmtree(local_data_dir)
             logger.info(f"학습 데이터 로컬 임시 디렉터리 {local_data_dir} 삭제 완료.")
+        for path in (temp_onnx_path, temp_int8_path):
+            if path and os.path.exists(path):
+                os.unlink(path)
 
 
 # =================================================================
@@ -217,34 +371,57 @@ def set_status_and_save_sync(record_id: int, new_status: str):
 
 @celery_app.task(bind=True)
 def process_image_dataset_task(self, s3_key: str, record_id: int, filename: str):
-    temp_dir = None
-    
+    shards = None
+
     try:
-        temp_dir = tempfile.mkdtemp()
-        local_zip_path = os.path.join(temp_dir, filename)
-        logger.info(f"데이터셋 처리 시작: {filename} -> 임시 경로: {temp_dir}")
-        
-        # S3 다운로드, 압축 해제, 재업로드
-        s3_manager.download_file(s3_key, local_zip_path)
-        
-        unzip_path = os.path.join(temp_dir, "unzipped_data")
-        os.makedirs(unzip_path, exist_ok=True)
-        with zipfile.ZipFile(local_zip_path, 'r') as zip_ref:
-            zip_ref.extractall(unzip_path)
-            
+        logger.info(f"데이터셋 처리 시작: {filename} (S3 스트리밍 압축 해제)")
+
         category_name = filename.split('.')[0] 
         final_s3_prefix = f"{settings.S3_TRAINING_DATA_FOLDER}/{category_name}" 
         
-        for root, _, files in os.walk(unzip_path):
-            if files:
-                relative_path = os.path.relpath(root, unzip_path)
-                s3_target_dir = os.path.join(final_s3_prefix, relative_path).replace("\\", "/") + "/"
-                
-                for f in files:
-                    local_file_path = os.path.join(root, f)
-                    s3_manager.upload_file(local_file_path, settings.BUCKET_NAME, s3_target_dir + f)
+        # 로컬 다운로드/압축 해제 없이 S3 원본에서 항목을 하나씩 꺼내 바로 동시 업로드
+        # - zip: 끝의 목차를 읽어야 하므로 Range 요청 기반 seek 가능 스트림
+        # - tar / tar.gz: 순차 스트림 그대로 (r|*)
+        if filename.lower().endswith(".zip"):
+            source = s3_manager.open_seekable(s3_key)
+        else:
+            source, _ = s3_manager.open_stream(s3_key)
+
+        # 같은 읽기에서 라벨 디렉터리(good/defect) 아래 이미지의 목록(크기, 체크섬, 해상도)을 모으고
+        # 미리 리사이즈해 TFRecord 샤드로도 기록
+        index = ManifestBuilder(final_s3_prefix, LABEL_NAMES, source=filename)
+        consumers = [index.add]
+        if settings.DATASET_SHARDS_ENABLED:
+            shards = ShardWriter(
+                final_s3_prefix, LABEL_NAMES, (IMG_SIZE, IMG_SIZE),
+                upload=lambda local_path, key: s3_manager.upload_file(local_path, settings.BUCKET_NAME, key),
+                shard_bytes=settings.DATASET_SHARD_BYTES, max_open=settings.DATASET_SHARD_MAX_OPEN,
+            )
+            consumers.append(shards.add)
+        with source:
+            members = tee_images(iter_archive_members(source, filename, is_dataset_file), *consumers)
+            count = s3_manager.upload_stream_many(members, final_s3_prefix, settings.BUCKET_NAME)
                     
-        logger.info(f"데이터셋 재업로드 완료. 최종 S3 경로: {final_s3_prefix}")
+        logger.info(f"데이터셋 재업로드 완료 ({count}개). 최종 S3 경로: {final_s3_prefix}")
+
+        # 학습 경로별 버전 manifest (학습 측은 latest.json 하나만 읽음)
+        # 샤드 manifest 에도 같은 버전을 기록 → 이번 준비에서 샤드를 만들지 못했으면 이전 샤드는 학습에 쓰이지 않음
+        dataset_version = time.strftime("%Y%m%d%H%M%S")
+        manifests = index.build(dataset_version)
+        if shards is None:
+            # 샤드를 끈 재준비: 이전 준비의 샤드 manifest 제거 (학습은 개별 파일 사용)
+            for base in manifests:
+                s3_manager.delete_file(shard_manifest_key(base))
+        for base, manifest in manifests.items():
+            save_dataset_manifest(s3_manager, base, manifest)
+            logger.info(f"데이터셋 manifest {manifest['version']} 기록 ({manifest['total']}개 이미지): {base}")
+
+        if shards is not None:
+            # manifest 는 모든 샤드 업로드가 끝난 뒤 마지막에 기록 (학습 측이 불완전한 샤드 목록을 보지 않음)
+            for base, manifest in shards.close(dataset_version).items():
+                body = BytesIO(json.dumps(manifest).encode())
+                s3_manager.upload_fileobj(body, shard_prefix(base), MANIFEST_NAME)
+                logger.info(f"학습 샤드 {len(manifest['shards'])}개 기록 ({manifest['total']}개 이미지): {base}")
         
         # DB 상태 업데이트 및 원본 RAW ZIP 파일 삭제
         s3_manager.delete_file(s3_key) 
@@ -258,13 +435,9 @@ def process_image_dataset_task(self, s3_key: str, record_id: int, filename: str)
 
     except Exception as e:
         logger.error(f"데이터셋 처리 중 오류 발생: {e}")
+        if shards is not None:
+            shards.abort()
         # 에러 시 상태 업데이트 및 저장
         sync_to_async(set_status_and_save_sync)(record_id, "DATA_PREP_FAILED") 
         
-        raise self.retry(exc=e, countdown=60, max_retries=3)
-
-    finally:
-        # 로컬 임시 파일 삭제
-        if temp_dir and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            logger.info(f"로컬 임시 디렉터리 {temp_dir} 삭제 완료.")
\ No newline at end of file
+        raise self.retry(exc=e, countdown=60, max_retries=3)
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_user_created_at_user_email_user_hashed_password_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadrecord',
+            name='processed_key',
+            field=models.CharField(blank=True, max_length=512, null=True),
+        ),
+    ]
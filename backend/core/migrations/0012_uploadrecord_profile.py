@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_dataset_datasetpartial_uploadrecord_dataset_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadrecord',
+            name='profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -16,6 +16,12 @@ class UploadRecord(models.Model):
 
     # CSV 결과
     statistics = JSONField(null=True, blank=True)  # CSV 통계 결과
+    processed_key = models.CharField(max_length=512, null=True, blank=True)  # 변환된 Parquet 의 S3 키
+    profile = JSONField(null=True, blank=True)  # 데이터 품질 프로파일 (요청한 업로드만, 통계와 같은 패스에서 계산)
+
+    # 누적 통계 데이터셋 (일별 부분 집계에 합쳐진 시각, 중복 반영 방지)
+    dataset = models.ForeignKey("Dataset", null=True, blank=True, on_delete=models.SET_NULL, related_name="uploads")
+    folded_at = models.DateTimeField(null=True, blank=True)
 
     # 공용 처리 상태
     STATUS_CHOICES = [
@@ -29,6 +35,30 @@ class UploadRecord(models.Model):
         return f"{self.filename} ({self.uploaded_at})"
 
 
+# 누적 통계 데이터셋 (예: 일별 매출 델타 파일을 계속 업로드)
+class Dataset(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+# 데이터셋의 일별 부분 집계 (METRICS 누적기 상태). 기간 통계는 이 상태들을 병합해 계산
+class DatasetPartial(models.Model):
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name="partials")
+    day = models.DateField(null=True, blank=True)  # 날짜를 알 수 없는 행은 null
+    state = JSONField()
+    row_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("dataset", "day")
+
+    def __str__(self):
+        return f"{self.dataset.name} {self.day}"
+
+
 # 챗봇 대화 기록
 class ChatRecord(models.Model):
     user_message = models.TextField()  # 사용자가 입력한 메시지
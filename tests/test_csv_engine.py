@@ -0,0 +1,212 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.core.metrics import ProfileAccumulator
+from app.services.csv_engine import compute_stats_dask, compute_stats_stream
+
+CSV = (
+    "InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country\n"
+    "536365,85123A,WHITE HANGING HEART,6,12/1/2010 8:26,2.55,17850,United Kingdom\n"
+    "536365,71053,WHITE METAL LANTERN,6,12/1/2010 8:26,3.39,17850,United Kingdom\n"
+    "536366,22633,HAND WARMER,6,12/1/2010 8:28,1.85,,United Kingdom\n"
+    "C536379,D,Discount,-1,12/1/2010 9:41,27.5,14527,United Kingdom\n"
+    "536380,22961,JAM MAKING SET,24,12/1/2010 9:41,1.45,17809,United Kingdom\n"
+)
+
+class _Stream(io.RawIOBase):
+    """seek 불가능한 스트림 (S3 StreamingBody 대용)"""
+
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._buf.readinto(b)
+
+def _expected():
+    df = pd.read_csv(io.StringIO(CSV), dtype={"InvoiceNo": "object"})
+    return {
+        "num_customers": df["CustomerID"].nunique(),
+        "total_quantity": df["Quantity"].sum(),
+        "total_revenue": (df["Quantity"] * df["UnitPrice"]).sum(),
+        "num_invoices": df["InvoiceNo"].nunique(),
+    }
+
+def test_stream_matches_pandas():
+    stats = compute_stats_stream(_Stream(CSV.encode()), chunksize=2)
+    expected = _expected()
+    assert stats["num_customers"] == expected["num_customers"] == 3
+    assert stats["num_invoices"] == expected["num_invoices"] == 4
+    assert stats["total_quantity"] == expected["total_quantity"]
+    assert stats["total_revenue"] == pytest.approx(expected["total_revenue"])
+
+def test_dask_matches_pandas(tmp_path):
+    path = tmp_path / "retail.csv"
+    path.write_text(CSV)
+    stats = compute_stats_dask(str(path), blocksize=128, scheduler="synchronous")
+    expected = _expected()
+    assert {k: stats[k] for k in ("num_customers", "num_invoices", "total_quantity")} == {
+        k: expected[k] for k in ("num_customers", "num_invoices", "total_quantity")
+    }
+    assert stats["total_revenue"] == pytest.approx(expected["total_revenue"])
+
+def test_stream_writes_parquet_in_same_pass(tmp_path):
+    from app.services.csv_engine import compute_stats_parquet
+    from app.services.parquet_store import ParquetChunkWriter
+
+    path = str(tmp_path / "retail.parquet")
+    writer = ParquetChunkWriter(path)
+    with writer:
+        stats = compute_stats_stream(_Stream(CSV.encode()), chunksize=2, on_chunk=writer.write)
+    assert writer.close() and writer.rows == 5
+
+    assert compute_stats_parquet(path) == stats
+    schema = pd.read_parquet(path).dtypes
+    assert str(schema["InvoiceDate"]).startswith("datetime64")
+
+def test_parquet_writer_absorbs_chunk_dtype_drift(tmp_path):
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from app.services.parquet_store import ParquetChunkWriter
+
+    path = str(tmp_path / "drift.parquet")
+    writer = ParquetChunkWriter(path)
+    with writer:
+        writer.write(pd.DataFrame({"Quantity": [1, 2], "Description": [None, None]}))
+        # 결측값으로 float64 가 된 정수 컬럼, 뒤늦게 값이 나온 object 컬럼
+        writer.write(pd.DataFrame({"Quantity": [3.0, np.nan], "Description": ["LANTERN", None]}))
+    assert writer.close() and writer.rows == 4
+
+    table = pq.read_table(path)
+    assert table.schema.field("Quantity").type == pa.int64()
+    assert table.column("Quantity").to_pylist() == [1, 2, 3, None]
+    assert table.column("Description").to_pylist() == [None, None, "LANTERN", None]
+
+    # 값이 바뀌는 변환(소수 → 정수)은 실패로 기록
+    writer = ParquetChunkWriter(str(tmp_path / "bad.parquet"))
+    with writer:
+        writer.write(pd.DataFrame({"Quantity": [1]}))
+        writer.write(pd.DataFrame({"Quantity": [2.5]}))
+    assert not writer.close() and writer.error
+
+def test_dask_partitions_feed_stats_and_parquet_in_one_pass(tmp_path):
+    from app.services.csv_engine import compute_stats_chunks, compute_stats_parquet, iter_csv_partitions
+    from app.services.parquet_store import ParquetChunkWriter
+
+    csv_path = tmp_path / "retail.csv"
+    csv_path.write_text(CSV)
+    path = str(tmp_path / "retail.parquet")
+    writer = ParquetChunkWriter(path)
+    partitions = iter_csv_partitions(str(csv_path), blocksize=128, scheduler="threads", num_workers=2)
+    with writer:
+        stats = compute_stats_chunks(partitions, on_chunk=writer.write)
+    assert writer.close() and writer.rows == 5
+
+    # 파티션은 파일 순서대로 기록됨
+    assert pd.read_parquet(path)["InvoiceNo"].tolist() == ["536365", "536365", "536366", "C536379", "536380"]
+    assert compute_stats_parquet(path) == stats
+
+def test_daily_states_merge_to_window_totals(tmp_path):
+    from datetime import date
+
+    from app.core.metrics import accumulators_from_state, finalize_accumulators, merge_accumulators
+    from app.services.csv_engine import compute_daily_states_parquet
+    from app.services.csv_engine import iter_csv_partitions
+    from app.services.parquet_store import ParquetChunkWriter
+
+    csv_path = tmp_path / "retail.csv"
+    csv_path.write_text(CSV)
+    path = str(tmp_path / "retail.parquet")
+    with ParquetChunkWriter(path) as writer:
+        for partition in iter_csv_partitions(str(csv_path), blocksize=128, scheduler="synchronous"):
+            writer.write(partition)
+    assert writer.close()
+    daily = compute_daily_states_parquet(path)
+
+    assert list(daily) == [date(2010, 12, 1)] and daily[date(2010, 12, 1)][1] == 5
+    merged = {}
+    for state, _ in daily.values():
+        merged = merge_accumulators(merged, accumulators_from_state(state))
+    assert finalize_accumulators(merged) == compute_stats_stream(_Stream(CSV.encode()))
+
+def test_xlsx_chunks_match_csv_stats(tmp_path):
+    from datetime import datetime
+
+    from openpyxl import Workbook
+
+    from app.services.csv_convert import iter_xlsx_chunks
+    from app.services.csv_engine import compute_stats_chunks
+
+    # 엑셀에서는 송장 번호/고객 ID 가 숫자 셀, 날짜가 날짜 셀로 저장됨
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["InvoiceNo", "StockCode", "Description", "Quantity", "InvoiceDate", "UnitPrice", "CustomerID", "Country"])
+    ws.append([536365, "85123A", "WHITE HANGING HEART", 6, datetime(2010, 12, 1, 8, 26), 2.55, 17850, "United Kingdom"])
+    ws.append([536365, 71053, "WHITE METAL LANTERN", 6, datetime(2010, 12, 1, 8, 26), 3.39, 17850, "United Kingdom"])
+    ws.append([536366, 22633, "HAND WARMER", 6, datetime(2010, 12, 1, 8, 28), 1.85, None, "United Kingdom"])
+    ws.append(["C536379", "D", "Discount", -1, datetime(2010, 12, 1, 9, 41), 27.5, 14527, "United Kingdom"])
+    ws.append([536380, 22961, "JAM MAKING SET", 24, datetime(2010, 12, 1, 9, 41), 1.45, 17809])
+    path = tmp_path / "retail.xlsx"
+    wb.save(path)
+
+    stats = compute_stats_chunks(iter_xlsx_chunks(str(path), chunksize=2))
+    assert stats == compute_stats_stream(_Stream(CSV.encode()))
+
+def test_xlsx_text_cells_in_numeric_columns_are_coerced():
+    from app.services.csv_convert import _typed_chunk
+
+    df = _typed_chunk([[6, "2.5"], ["N/A", 1]], ["Quantity", "UnitPrice"])
+    assert df["Quantity"].tolist()[0] == 6 and pd.isna(df["Quantity"].tolist()[1])
+    assert df["UnitPrice"].tolist() == [2.5, 1.0]
+
+def test_profile_collected_in_same_pass():
+    bad_line = "536381,22961,JAM MAKING SET,24,12/1/2010 9:41,1.45,17809,United Kingdom,extra\n"
+    profile = ProfileAccumulator()
+    stats = compute_stats_stream(_Stream((CSV + bad_line).encode()), chunksize=2, profile=profile)
+    assert stats == compute_stats_stream(_Stream(CSV.encode()), chunksize=2)
+
+    # 청크마다 따로 모은 프로파일을 상태로 주고받아 병합해도 같은 결과
+    merged = ProfileAccumulator.from_state(ProfileAccumulator().to_state())
+    merged.merge(ProfileAccumulator.from_state(profile.to_state()))
+    result = merged.finalize()
+
+    assert result["rows"] == 5
+    assert result["skipped_lines"] == 1
+    assert result["negative_quantity"] == 1
+    assert result["returns"] == 1
+    assert result["columns"]["CustomerID"]["nulls"] == 1
+    assert result["columns"]["Quantity"]["min"] == -1
+    assert result["columns"]["Quantity"]["max"] == 24
+    assert sum(result["columns"]["UnitPrice"]["histogram"]) == 5
+    assert len(result["columns"]["UnitPrice"]["histogram"]) == len(result["histogram_edges"]) + 1
+
+def test_partition_profile_counts_skipped_lines_with_processes_setting(tmp_path):
+    from app.services.csv_engine import (
+        count_skipped_lines,
+        iter_csv_partitions,
+        profile_read_options,
+        profile_scheduler,
+    )
+
+    bad_line = "536381,22961,JAM MAKING SET,24,12/1/2010 9:41,1.45,17809,United Kingdom,extra\n"
+    csv_path = tmp_path / "retail.csv"
+    csv_path.write_text(CSV + bad_line)
+    profile = ProfileAccumulator()
+
+    # processes 로 설정돼 있어도 프로파일링 중에는 이 프로세스에서 파싱해 건너뛴 줄이 잡힘
+    assert profile_scheduler("processes", profile) == "threads"
+    assert profile_scheduler("processes", None) == "processes"
+    partitions = iter_csv_partitions(
+        str(csv_path), blocksize=128, scheduler=profile_scheduler("processes", profile),
+        read_options=profile_read_options(None, profile),
+    )
+    with count_skipped_lines(profile):
+        for partition in partitions:
+            profile.update(partition)
+    assert profile.finalize()["skipped_lines"] == 1
@@ -0,0 +1,44 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.core.metrics import finalize_accumulators, merge_accumulators
+from app.services.csv_engine import accumulate_chunks, compute_stats_stream
+from app.services.csv_ranges import LineRangeReader, plan_byte_ranges, range_read_offset
+
+CSV = (
+    "InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country\n"
+    "536365,85123A,WHITE HANGING HEART,6,12/1/2010 8:26,2.55,17850,United Kingdom\n"
+    "536365,71053,WHITE METAL LANTERN,6,12/1/2010 8:26,3.39,17850,United Kingdom\n"
+    "536366,22633,HAND WARMER,6,12/1/2010 8:28,1.85,,United Kingdom\n"
+    "C536379,D,Discount,-1,12/1/2010 9:41,27.5,14527,United Kingdom\n"
+    "536380,22961,JAM MAKING SET,24,12/1/2010 9:41,1.45,17809,United Kingdom\n"
+)
+
+def _read_range(data: bytes, start: int, end: int, block_size: int) -> bytes:
+    body = io.BytesIO(data[range_read_offset(start):])
+    return io.BufferedReader(LineRangeReader(body, start, end, block_size)).read()
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 64, 80, 1000])
+@pytest.mark.parametrize("block_size", [1, 5, 4096])
+def test_ranges_cover_every_row_once(chunk_bytes, block_size):
+    data = CSV.encode()
+    parts = [_read_range(data, s, e, block_size) for s, e in plan_byte_ranges(len(data), chunk_bytes)]
+    # 헤더를 뺀 모든 행이 정확히 한 구간에만 들어감
+    assert b"".join(parts) == data[data.index(b"\n") + 1:]
+    assert all(p == b"" or p.endswith(b"\n") for p in parts)
+
+def test_range_partials_merge_to_single_pass_stats():
+    data = CSV.encode()
+    header = CSV.splitlines()[0].split(",")
+    merged = None
+    for start, end in plan_byte_ranges(len(data), 150):
+        chunks = pd.read_csv(
+            io.BytesIO(_read_range(data, start, end, 64)), header=None, names=header,
+            chunksize=2, dtype={"InvoiceNo": "object", "CustomerID": "float64"},
+        )
+        accumulators, _ = accumulate_chunks(chunks)
+        merged = accumulators if merged is None else merge_accumulators(merged, accumulators)
+
+    assert finalize_accumulators(merged) == compute_stats_stream(io.BytesIO(data))
@@ -0,0 +1,64 @@
+import io
+from collections import Counter
+
+from PIL import Image
+
+from app.services.dataset_manifest import (
+    ManifestBuilder,
+    split_label,
+    stratified_sample,
+    tee_images,
+    train_val_split,
+)
+
+LABELS = ["good", "defect"]
+
+def _png(size):
+    buf = io.BytesIO()
+    Image.new("RGB", size).save(buf, format="PNG")
+    return buf.getvalue()
+
+def _entries(good, defect):
+    return [{"path": f"g/{i}.png", "label": "good"} for i in range(good)] + [
+        {"path": f"d/{i}.png", "label": "defect"} for i in range(defect)
+    ]
+
+def test_split_label_uses_deepest_label_dir():
+    assert split_label("bottle/train/good/000.png", LABELS) == ("bottle/train", 0)
+    assert split_label("./defect/x.png", LABELS) == ("", 1)
+    assert split_label("bottle/readme/000.png", LABELS) is None
+    assert split_label("../../models/good/000.png", LABELS) is None
+
+def test_builder_records_files_per_group():
+    builder = ManifestBuilder("train/mvtec", LABELS, source="mvtec.zip")
+    members = [
+        ("./bottle/train/good/0.png", io.BytesIO(_png((4, 3)))),
+        ("bottle/train/defect/1.png", io.BytesIO(_png((5, 5)))),
+        ("bottle/train/good/broken.png", io.BytesIO(b"not an image")),
+        ("bottle/license.txt", io.BytesIO(b"x")),
+    ]
+    assert [name for name, _ in tee_images(members, builder.add)] == [name for name, _ in members]
+    manifests = builder.build(version="20260101000000")
+
+    assert list(manifests) == ["train/mvtec/bottle/train"]
+    manifest = manifests["train/mvtec/bottle/train"]
+    assert manifest["version"] == "20260101000000" and manifest["total"] == 2
+    assert manifest["label_counts"] == {"good": 1, "defect": 1}
+    first = manifest["files"][1]
+    assert first["path"] == "bottle/train/good/0.png"
+    assert first["key"] == "train/mvtec/bottle/train/good/0.png"
+    assert (first["width"], first["height"]) == (4, 3) and len(first["md5"]) == 32
+
+def test_stratified_sample_keeps_label_ratio():
+    sample = stratified_sample(_entries(80, 20), 10)
+    assert Counter(e["label"] for e in sample) == {"good": 8, "defect": 2}
+    assert stratified_sample(_entries(3, 1), 10) == _entries(3, 1)
+
+def test_train_val_split_is_stratified_and_stable():
+    entries = _entries(50, 10)
+    train, val = train_val_split(entries, 0.2)
+    assert Counter(e["label"] for e in val) == {"good": 10, "defect": 2}
+    assert len(train) + len(val) == len(entries)
+    assert not {e["path"] for e in train} & {e["path"] for e in val}
+    # 같은 seed 면 순서가 달라도 같은 분할
+    assert train_val_split(list(reversed(entries)), 0.2)[1] == val
@@ -0,0 +1,113 @@
+import contextlib
+import os
+import types
+from datetime import date
+
+import pandas as pd
+
+# 모듈 수준 settings 에 필요한 환경 변수 (실제 값은 쓰지 않음)
+for _name in (
+    "SECRET_KEY", "DATABASE_URL", "OPENAI_API_KEY", "POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD",
+    "DJANGO_SECRET_KEY", "AWS_ACCESS_KEY", "AWS_SECRET_KEY", "BUCKET_NAME",
+    "RAW_FOLDER", "PROCESSED_FOLDER", "RAW_DATASET_FOLDER", "TRAINING_DATA_FOLDER",
+):
+    os.environ.setdefault(_name, "test")
+
+import pytest
+
+from app.services import dataset_service
+from app.services.csv_engine import DailyAccumulators
+
+# DB 없이 fold_upload / dataset_stats 가 쓰는 ORM 호출만 메모리로 흉내냄
+class _Rows(list):
+    def filter(self, **kw):
+        def ok(row):
+            for key, value in kw.items():
+                field, _, op = key.partition("__")
+                actual = getattr(row, field)
+                if op == "in" and actual not in value:
+                    return False
+                if op == "isnull" and (actual is None) != value:
+                    return False
+                if op == "gte" and (actual is None or actual < value):
+                    return False
+                if op == "lte" and (actual is None or actual > value):
+                    return False
+                if not op and actual != value:
+                    return False
+            return True
+        return _Rows(row for row in self if ok(row))
+
+    def select_for_update(self):
+        return self
+
+    def get(self, **kw):
+        found = self.filter(**kw)
+        if not found:
+            raise dataset_service.Dataset.DoesNotExist
+        return found[0]
+
+    def first(self):
+        return self[0] if self else None
+
+    def order_by(self, field):
+        return _Rows(sorted(self, key=lambda row: (getattr(row, field) is not None, getattr(row, field) or date.min)))
+
+    def iterator(self):
+        return iter(self)
+
+    def count(self):
+        return len(self)
+
+class _Partial(types.SimpleNamespace):
+    objects = _Rows()
+
+_Partial.objects.bulk_create = lambda rows: _Partial.objects.extend(rows)
+_Partial.objects.bulk_update = lambda rows, fields: None
+
+@pytest.fixture
+def store(monkeypatch):
+    _Partial.objects.clear()
+    dataset = types.SimpleNamespace(id=1, name="retail", uploads=None)
+    records = _Rows(
+        types.SimpleNamespace(id=i, dataset_id=1, folded_at=None, save=lambda update_fields: None) for i in (1, 2, 3)
+    )
+    dataset.uploads = records
+    datasets = _Rows([dataset])
+    monkeypatch.setattr(dataset_service, "Dataset", types.SimpleNamespace(objects=datasets, DoesNotExist=LookupError))
+    monkeypatch.setattr(dataset_service, "DatasetPartial", _Partial)
+    monkeypatch.setattr(dataset_service, "UploadRecord", types.SimpleNamespace(objects=records))
+    monkeypatch.setattr(dataset_service, "transaction", types.SimpleNamespace(atomic=contextlib.nullcontext))
+    return records
+
+def _daily(ids, modes=None):
+    daily = DailyAccumulators(distinct_modes=modes)
+    daily.update(pd.DataFrame({
+        "InvoiceDate": ["12/1/2010 8:26" if i % 2 else "12/2/2010 9:00" for i in ids],
+        "InvoiceNo": [f"5363{i}" for i in ids],
+        "CustomerID": [float(17000 + i) for i in ids],
+        "Quantity": 2,
+        "UnitPrice": 1.5,
+    }))
+    return daily.states()
+
+def test_fold_and_window_stats(store):
+    assert dataset_service.fold_upload(1, _daily(range(4)))
+    assert dataset_service.fold_upload(2, _daily(range(2, 6)))
+    # 같은 업로드는 두 번 반영하지 않음
+    assert not dataset_service.fold_upload(1, _daily(range(4)))
+
+    total = dataset_service.dataset_stats("retail")
+    assert total["rows"] == 8 and total["days"] == 2 and total["uploads"] == 2
+    assert total["statistics"] == {"num_customers": 6, "total_quantity": 16, "total_revenue": 24.0, "num_invoices": 6}
+
+    day1 = dataset_service.dataset_stats("retail", start=date(2010, 12, 1), end=date(2010, 12, 1))
+    assert day1["rows"] == 4 and day1["statistics"]["num_customers"] == 3
+
+def test_fold_after_distinct_mode_change(store):
+    # 기존 날짜는 exact 로 저장된 상태에서 CSV_DISTINCT_MODES 가 hll 로 바뀐 경우
+    assert dataset_service.fold_upload(1, _daily(range(4)))
+    assert dataset_service.fold_upload(2, _daily(range(2, 6), {"num_customers": "hll", "num_invoices": "hll"}))
+    stats = dataset_service.dataset_stats("retail")["statistics"]
+    assert stats["num_customers"] == 6 and stats["num_invoices"] == 6
+    assert {p.state["num_customers"]["kind"] for p in _Partial.objects} == {"hll"}
@@ -0,0 +1,53 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from app.services.image_archive import collect_upload_images
+
+def _zip(entries):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+def _tar_gz(entries):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in entries.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+def test_collects_plain_files_and_archive_images():
+    uploads = [
+        ("a.png", io.BytesIO(b"a")),
+        ("frames.zip", _zip({"f/1.jpg": b"1", "f/readme.txt": b"x", "__MACOSX/f/._1.jpg": b"m"})),
+        ("frames.tar.gz", _tar_gz({"2.JPG": b"2", "._2.jpg": b"m"})),
+    ]
+    items = collect_upload_images(uploads, max_files=10, max_file_bytes=10)
+    assert items == [("a.png", b"a"), ("f/1.jpg", b"1"), ("2.JPG", b"2")]
+
+def test_rejects_too_many_images():
+    with pytest.raises(ValueError):
+        collect_upload_images([("frames.zip", _zip({f"{i}.png": b"x" for i in range(3)}))], max_files=2, max_file_bytes=10)
+
+class _BoundedReader(io.BytesIO):
+    """read() 전체 읽기 없이 한도만큼만 읽는지 확인"""
+    def read(self, size=-1):
+        assert size is not None and size >= 0
+        return super().read(size)
+
+def test_rejects_oversized_image_and_total():
+    with pytest.raises(ValueError, match="한 장"):
+        collect_upload_images([("big.png", _BoundedReader(b"x" * 100))], max_files=10, max_file_bytes=10)
+    with pytest.raises(ValueError, match="한 장"):
+        collect_upload_images([("frames.zip", _zip({"big.png": b"x" * 100}))], max_files=10, max_file_bytes=10)
+    uploads = [(f"{i}.png", _BoundedReader(b"x" * 8)) for i in range(3)]
+    with pytest.raises(ValueError, match="전체"):
+        collect_upload_images(uploads, max_files=10, max_file_bytes=10, max_total_bytes=20)
@@ -0,0 +1,25 @@
+import io
+import numpy as np
+from PIL import Image
+from app.services.image_preprocess import preprocess_images
+
+def _image_bytes(size, color, fmt):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, fmt)
+    return io.BytesIO(buf.getvalue())
+
+def test_preprocess_images_writes_into_buffer():
+    out = np.zeros((3, 32, 32, 3), dtype=np.float32)
+    files = [
+        _image_bytes((32, 32), (255, 0, 0), "PNG"),
+        io.BytesIO(b"not an image"),
+        _image_bytes((640, 480), (0, 0, 255), "JPEG"),
+    ]
+    indices, errors = preprocess_images(files, out, (32, 32))
+
+    assert indices == [0, 2]
+    assert list(errors) == [1]
+    np.testing.assert_allclose(out[0, :, :, 0], 1.0)
+    np.testing.assert_allclose(out[0, :, :, 1:], 0.0)
+    assert out[1, :, :, 2].mean() > 0.9
+    assert out.dtype == np.float32
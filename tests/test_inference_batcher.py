@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from app.services.inference_batcher import InferenceBatcher
+
+def test_concurrent_requests_are_batched():
+    calls = []
+
+    def run_batch(items):
+        calls.append(list(items))
+        return [x * 10 for x in items]
+
+    async def scenario():
+        batcher = InferenceBatcher(run_batch, max_batch_size=4, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(8)])
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == [i * 10 for i in range(8)]
+    assert all(len(c) <= 4 for c in calls)
+    assert len(calls) < 8
+
+def test_batch_error_is_propagated():
+    def run_batch(items):
+        raise ValueError("boom")
+
+    async def scenario():
+        batcher = InferenceBatcher(run_batch, max_batch_size=2, max_wait_ms=1)
+        await batcher.start()
+        try:
+            await batcher.submit(1)
+        finally:
+            await batcher.stop()
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
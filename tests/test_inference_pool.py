@@ -0,0 +1,21 @@
+import types
+
+import numpy as np
+
+from app.services.inference_pool import run_onnx
+
+class _FixedBatchSession:
+    """배치 차원이 4 로 고정된 모델 흉내 (다른 크기 입력은 거부)"""
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="x", shape=[4, 2])]
+
+    def run(self, _, feed):
+        arr = feed["x"]
+        assert arr.shape[0] == 4
+        return [arr.sum(axis=1, keepdims=True)]
+
+def test_run_onnx_pads_trailing_partial_batch():
+    arr = np.arange(22, dtype=np.float32).reshape(11, 2)
+    out = run_onnx(_FixedBatchSession(), arr)
+    np.testing.assert_allclose(out.ravel(), arr.sum(axis=1))
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.metrics import (
+    Accumulator,
+    ExactDistinct,
+    HyperLogLog,
+    accumulators_from_state,
+    accumulators_to_state,
+    build_accumulators,
+    finalize_accumulators,
+    merge_accumulators,
+)
+
+def test_hyperloglog_estimate_and_merge():
+    values = pd.DataFrame({"id": np.arange(200_000, dtype=np.float64)})
+    a, b, exact = HyperLogLog("id"), HyperLogLog("id"), ExactDistinct("id")
+    # 두 청크가 절반씩 겹침
+    a.update(values.iloc[:120_000])
+    b.update(values.iloc[80_000:])
+    exact.update(values)
+
+    a.merge(b)
+    assert abs(a.finalize() - exact.finalize()) / exact.finalize() < 0.03
+    assert HyperLogLog("id").finalize() == 0
+
+def test_state_roundtrip_merges_across_files():
+    chunk1 = pd.DataFrame({"CustomerID": [1.0, 2.0, None], "InvoiceNo": ["a", "b", "b"], "Quantity": [1, 2, 3], "UnitPrice": [1.0, 1.0, 2.0]})
+    chunk2 = pd.DataFrame({"CustomerID": [2.0, 3.0], "InvoiceNo": ["c", "c"], "Quantity": [4, 5], "UnitPrice": [0.5, 0.5]})
+    modes = {"num_invoices": "hll"}
+
+    first, second = build_accumulators(modes), build_accumulators(modes)
+    for acc in first.values():
+        acc.update(chunk1)
+    for acc in second.values():
+        acc.update(chunk2)
+
+    # JSON 으로 전달된 부분 결과끼리 병합
+    merged = merge_accumulators(accumulators_from_state(accumulators_to_state(first)), accumulators_from_state(accumulators_to_state(second)))
+    assert finalize_accumulators(merged) == {
+        "num_customers": 3,
+        "total_quantity": 15,
+        "total_revenue": 13.5,
+        "num_invoices": 3,
+    }
+
+def test_accumulator_requires_all_methods():
+    class Partial(Accumulator):
+        def update(self, df):
+            pass
+
+    with pytest.raises(TypeError):
+        Accumulator()
+    with pytest.raises(TypeError):
+        Partial()
+
+def test_merge_across_distinct_modes_converts_exact_to_hll():
+    import json
+
+    def chunk(ids):
+        return pd.DataFrame({
+            "CustomerID": [float(i) for i in ids], "InvoiceNo": [f"a{i}" for i in ids], "Quantity": 1, "UnitPrice": 1.0,
+        })
+
+    chunk1, chunk2 = chunk(range(300)), chunk(range(200, 500))
+    both = pd.concat([chunk1, chunk2])
+
+    def stored(modes, chunk):
+        accs = build_accumulators(modes)
+        for acc in accs.values():
+            acc.update(chunk)
+        # DB(JSON) 에 저장했다가 읽은 부분 결과
+        return accumulators_from_state(json.loads(json.dumps(accumulators_to_state(accs))))
+
+    expected = HyperLogLog("CustomerID")
+    expected.update(both)
+    hll_modes = {"num_customers": "hll", "num_invoices": "hll"}
+
+    # 저장된 exact + 새 hll, 저장된 hll + 새 exact 모두 hll 로 병합
+    for first, second in ((None, hll_modes), (hll_modes, None)):
+        merged = merge_accumulators(stored(first, chunk1), stored(second, chunk2))
+        assert merged["num_customers"].kind == "hll"
+        np.testing.assert_array_equal(merged["num_customers"].registers, expected.registers)
+        assert finalize_accumulators(merged)["num_invoices"] == finalize_accumulators(stored(hll_modes, both))["num_invoices"]
+
+    with pytest.raises(ValueError):
+        merge_accumulators({"x": ExactDistinct("c")}, {"x": accumulators_from_state({"x": {"kind": "sum", "total": 1}})["x"]})
@@ -0,0 +1,38 @@
+import onnx
+from onnx import TensorProto, helper
+from PIL import Image
+
+from app.services.model_quantization import evaluate_accuracy, publish_decision
+from app.services.model_spec import ModelSpec
+
+def _flatten_model(path):
+    # (N, 2, 2, 3) → (N, 12): 입력 값이 가장 큰 위치를 예측으로 쓰는 작은 모델
+    graph = helper.make_graph(
+        [helper.make_node("Flatten", ["input_image"], ["output"])],
+        "flatten",
+        [helper.make_tensor_value_info("input_image", TensorProto.FLOAT, [None, 2, 2, 3])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [None, 12])],
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8), path)
+
+def test_evaluate_accuracy_reports_evaluated_count(tmp_path):
+    model = str(tmp_path / "m.onnx")
+    _flatten_model(model)
+    spec = ModelSpec(input_name="input_image", height=2, width=2, channels=3, scale=1.0 / 255.0)
+    red = str(tmp_path / "red.png")
+    Image.new("RGB", (2, 2), (255, 0, 0)).save(red)
+    broken = str(tmp_path / "broken.png")
+    with open(broken, "wb") as f:
+        f.write(b"not an image")
+
+    # 읽을 수 없는 이미지는 평가 수에서 빠짐
+    assert evaluate_accuracy(model, [red, broken], [0, 0], spec) == (1.0, 1)
+    assert evaluate_accuracy(model, [broken], [0], spec) == (0.0, 0)
+
+def test_publish_requires_enough_evaluated_images():
+    report = {"evaluation_samples": 0, "accuracy_delta": 0.0}
+    published, reason = publish_decision(report, max_accuracy_drop=0.02, min_evaluation_samples=20)
+    assert not published and reason
+
+    assert publish_decision({"evaluation_samples": 50, "accuracy_delta": -0.01}, 0.02, 20) == (True, None)
+    assert not publish_decision({"evaluation_samples": 50, "accuracy_delta": -0.05}, 0.02, 20)[0]
@@ -0,0 +1,62 @@
+import pytest
+
+from app.services.image_preprocess import ImagePreprocessor
+from app.services.model_registry import LoadedModel, ModelNotAvailable, ModelRegistry, ModelWarming
+from app.services.model_spec import ModelSpec
+
+def _registry(paths, budget):
+    opened = []
+
+    def open_model(category, path):
+        opened.append(path)
+        spec = ModelSpec()
+        return LoadedModel(
+            category=category, model_path=path, version=path, spec=spec,
+            preprocessor=ImagePreprocessor.from_spec(spec), size_bytes=100,
+        )
+
+    return ModelRegistry(lambda c: paths.get(c), open_model, memory_budget=budget), opened
+
+def test_lazy_load_and_evict_idle_over_budget():
+    registry, opened = _registry({"bottle": "bottle-1", "screw": "screw-1", "cable": "cable-1"}, budget=200)
+
+    registry.get("bottle")
+    registry.get("bottle")
+    assert opened == ["bottle-1"]
+
+    with registry.use("screw"):
+        registry.get("cable")
+        # bottle 은 유휴 상태라 해제, 사용 중인 screw 는 유지
+        assert not registry.is_loaded("bottle")
+        assert registry.is_loaded("screw") and registry.is_loaded("cable")
+
+def test_reload_swaps_without_affecting_inflight():
+    paths = {"bottle": "bottle-1"}
+    registry, _ = _registry(paths, budget=1000)
+
+    with registry.use("bottle") as old:
+        paths["bottle"] = "bottle-2"
+        new = registry.reload("bottle")
+        assert old.version == "bottle-1"
+        assert registry.get("bottle") is new
+    assert new.version == "bottle-2"
+
+def test_try_get_warms_in_background():
+    registry, opened = _registry({"bottle": "bottle-1"}, budget=1000)
+
+    with pytest.raises(ModelWarming):
+        registry.try_get("bottle")
+    registry.warm("bottle").result(timeout=5)
+
+    assert registry.status("bottle") == "ready"
+    assert registry.try_get("bottle").version == "bottle-1"
+    assert opened == ["bottle-1"]
+
+    # 모델이 없으면 재시도 간격 동안 바로 실패
+    with pytest.raises(ModelWarming):
+        registry.try_get("screw")
+    with pytest.raises(ModelNotAvailable):
+        registry.warm("screw").result(timeout=5)
+    assert registry.status("screw") == "failed"
+    with pytest.raises(ModelNotAvailable):
+        registry.try_get("screw")
@@ -0,0 +1,58 @@
+import os
+
+from app.services.model_store import ModelStore
+
+class _FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def head_object(self, s3_key):
+        body = self.objects[s3_key]
+        return {"ETag": f'"{len(body)}-{s3_key[-8:]}"', "ContentLength": len(body)}
+
+    def download_file(self, s3_key, local_path):
+        with open(local_path, "wb") as f:
+            f.write(self.objects[s3_key])
+
+def test_local_versions_are_separated_by_category_and_variant(tmp_path):
+    s3 = _FakeS3({
+        "models/a_latest.onnx": b"float-a",
+        "models/a_latest.int8.onnx": b"int8-a",
+        "models/a-b_latest.onnx": b"float-a-b",
+    })
+    store = ModelStore(s3, str(tmp_path))
+    float_a = store.fetch("models/a_latest.onnx", "a")
+    int8_a = store.fetch("models/a_latest.int8.onnx", "a", "int8")
+    store.fetch("models/a-b_latest.onnx", "a-b")
+
+    # 'a' 의 로컬 대체는 'a-b' 파일이나 INT8 변형을 고르지 않음
+    assert store.latest_local("a") == float_a
+    assert store.latest_local("a", "int8") == int8_a
+    assert store.latest_local("a-b", "int8") is None
+    # ETag 가 같으면 다시 받지 않음
+    assert store.fetch("models/a_latest.onnx", "a") == float_a
+
+def test_prune_removes_optimized_graphs_of_pruned_versions(tmp_path):
+    from app.services.onnx_session import SessionConfig
+
+    models_dir, optimized_dir = tmp_path / "models", tmp_path / "optimized"
+    optimized_dir.mkdir()
+    s3 = _FakeS3({"models/a_latest.onnx": b"v1"})
+    store = ModelStore(s3, str(models_dir), keep_versions=1, optimized_cache_dir=str(optimized_dir))
+
+    old = store.fetch("models/a_latest.onnx", "a")
+    # 같은 버전을 두 최적화 수준으로 캐시해 둔 상태 (설정 변경 전후)
+    old_caches = [SessionConfig(graph_optimization=level, optimized_cache_dir=str(optimized_dir)).cache_path(old)
+                  for level in ("all", "basic")]
+    for path in old_caches:
+        open(path, "wb").close()
+
+    s3.objects["models/a_latest.onnx"] = b"v2-new"
+    new = store.fetch("models/a_latest.onnx", "a")
+    new_cache = SessionConfig(optimized_cache_dir=str(optimized_dir)).cache_path(new)
+    open(new_cache, "wb").close()
+    store.prune("a")
+
+    assert not os.path.exists(old)
+    assert not any(os.path.exists(path) for path in old_caches)
+    assert os.path.exists(new) and os.path.exists(new_cache)
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from app.services.parquet_store import ParquetChunkWriter
+from app.services.query_service import query_cache_key, run_query
+
+def _write(path, rows):
+    with ParquetChunkWriter(str(path)) as writer:
+        writer.write(pd.DataFrame(rows, columns=["InvoiceNo", "Quantity", "InvoiceDate", "UnitPrice", "Country"]))
+    return str(path)
+
+def test_group_filter_aggregate_over_uploads(tmp_path):
+    a = _write(tmp_path / "a.parquet", [
+        ["1", 2, "12/1/2010 8:26", 1.5, "France"],
+        ["2", 4, "1/5/2011 9:00", 2.0, "France"],
+        ["3", 1, "1/7/2011 9:00", 10.0, "Germany"],
+    ])
+    b = _write(tmp_path / "b.parquet", [["4", 3, "1/9/2011 10:00", 1.0, "France"]])
+
+    result = run_query([a, b], {
+        "group_by": ["Country", "month"],
+        "filters": [{"column": "InvoiceDate", "op": ">=", "value": "2011-01-01"}],
+        "aggregations": [{"column": "revenue", "func": "sum"}, {"column": "InvoiceNo", "func": "count"}],
+        "order_by": [{"column": "revenue_sum", "desc": True}],
+    })
+
+    assert result["rows"] == [
+        {"Country": "France", "month": "2011-01", "revenue_sum": 11.0, "InvoiceNo_count": 2},
+        {"Country": "Germany", "month": "2011-01", "revenue_sum": 10.0, "InvoiceNo_count": 1},
+    ]
+
+    with pytest.raises(ValueError):
+        run_query([a], {"aggregations": [{"column": "Missing", "func": "sum"}]})
+
+def test_cache_key_depends_on_sources_and_query():
+    q = {"group_by": ["Country"], "aggregations": [{"column": "Quantity", "func": "sum"}]}
+    assert query_cache_key(["b", "a"], q) == query_cache_key(["a", "b"], dict(q))
+    assert query_cache_key(["a"], q) != query_cache_key(["a", "c"], q)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+
+import pytest
+
+# 모듈 수준 settings 에 필요한 환경 변수 (실제 값은 쓰지 않음)
+for _name in (
+    "SECRET_KEY", "DATABASE_URL", "OPENAI_API_KEY", "POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD",
+    "DJANGO_SECRET_KEY", "AWS_ACCESS_KEY", "AWS_SECRET_KEY", "BUCKET_NAME",
+    "RAW_FOLDER", "PROCESSED_FOLDER", "RAW_DATASET_FOLDER", "TRAINING_DATA_FOLDER",
+):
+    os.environ.setdefault(_name, "test")
+
+from botocore.exceptions import ClientError
+
+from app.core.s3_manager import S3Manager
+
+class _FakeClient:
+    """멀티파트 API 만 메모리로 흉내냄"""
+
+    def __init__(self):
+        self.uploads = {}
+        self.completed = {}
+        self.sent = []
+        self.aborted = []
+        self.fail_part = None
+        self._next = 0
+
+    def create_multipart_upload(self, Bucket, Key):
+        self._next += 1
+        upload_id = f"u{self._next}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise IOError("connection reset")
+        self.sent.append((UploadId, PartNumber))
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.uploads[UploadId][PartNumber] = {"PartNumber": PartNumber, "ETag": etag, "Size": len(Body)}
+        return {"ETag": etag}
+
+    def get_paginator(self, name):
+        uploads = self.uploads
+
+        class _Pages:
+            def paginate(self, Bucket, Key, UploadId):
+                if UploadId not in uploads:
+                    raise ClientError({"Error": {"Code": "NoSuchUpload"}}, "ListParts")
+                return [{"Parts": list(uploads[UploadId].values())}]
+
+        return _Pages()
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed[Key] = (UploadId, [p["PartNumber"] for p in MultipartUpload["Parts"]])
+        del self.uploads[UploadId]
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+        del self.uploads[UploadId]
+
+@pytest.fixture
+def manager():
+    m = S3Manager()
+    m.s3_client = _FakeClient()
+    m.transfer_config.multipart_threshold = 16
+    m.transfer_config.multipart_chunksize = 10
+    m.transfer_config.max_request_concurrency = 1
+    return m
+
+def _file(tmp_path, data):
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    return str(path)
+
+def test_resumes_only_own_upload_and_skips_sent_parts(manager, tmp_path):
+    client = manager.s3_client
+    path = _file(tmp_path, os.urandom(35))
+    # 같은 키로 다른 작성자가 진행 중인 업로드
+    foreign = client.create_multipart_upload(Bucket="b", Key="k")["UploadId"]
+
+    client.fail_part = 3
+    with pytest.raises(IOError):
+        manager.upload_file_resumable(path, "b", "k")
+    assert os.path.exists(path + ".s3upload")
+
+    client.fail_part, client.sent = None, []
+    manager.upload_file_resumable(path, "b", "k")
+    own = client.completed["k"][0]
+    assert own != foreign and foreign in client.uploads
+    # 이미 올라간 파트(ETag 일치)는 다시 보내지 않음
+    assert client.sent == [(own, 3)]
+    assert client.completed["k"][1] == [1, 2, 3, 4]
+    assert not os.path.exists(path + ".s3upload")
+
+def test_resend_changed_parts_and_restart_on_part_size_change(manager, tmp_path):
+    client = manager.s3_client
+    data = bytearray(os.urandom(35))
+    path = _file(tmp_path, bytes(data))
+    client.fail_part = 4
+    with pytest.raises(IOError):
+        manager.upload_file_resumable(path, "b", "k")
+
+    # 두 번째 파트 내용이 바뀌면 그 파트만 다시 전송
+    data[12] ^= 0xFF
+    _file(tmp_path, bytes(data))
+    client.fail_part, client.sent = None, []
+    manager.upload_file_resumable(path, "b", "k")
+    assert [n for _, n in client.sent] == [2, 4]
+
+    # 파트 크기가 바뀌면 기존 업로드를 중단하고 새로 시작
+    client.fail_part = 4
+    with pytest.raises(IOError):
+        manager.upload_file_resumable(path, "b", "k")
+    first = client.sent[-1][0]
+    manager.transfer_config.multipart_chunksize = 20
+    client.fail_part, client.sent = None, []
+    manager.upload_file_resumable(path, "b", "k")
+    assert client.aborted == [first]
+    assert client.completed["k"][0] != first and len(client.sent) == 2
+
+def test_upload_file_cleans_up_failed_multipart(manager, tmp_path):
+    client = manager.s3_client
+    path = _file(tmp_path, os.urandom(35))
+    client.fail_part = 2
+    with pytest.raises(IOError):
+        manager.upload_file(path, "b", "k")
+    # 한 번만 호출하는 경로: 미완료 업로드와 상태 파일을 남기지 않음
+    assert client.uploads == {} and len(client.aborted) == 1
+    assert not os.path.exists(path + ".s3upload")
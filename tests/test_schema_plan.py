@@ -0,0 +1,67 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.csv_engine import compute_stats_stream
+from app.services.schema_plan import (
+    PlanObserver,
+    header_fingerprint,
+    peek_header,
+    plan_read_options,
+    refine_plan,
+    widen_plan,
+)
+
+CSV = (
+    "InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country\n"
+    "536365,85123A,WHITE HANGING HEART,6,12/1/2010 8:26,2.55,17850,United Kingdom\n"
+    "536365,71053,WHITE METAL LANTERN,6,12/1/2010 8:26,3.39,17850,United Kingdom\n"
+    "536366,22633,HAND WARMER,6,12/1/2010 8:28,1.85,,United Kingdom\n"
+    "C536379,D,Discount,-1,12/1/2010 9:41,27.5,14527,United Kingdom\n"
+    "536380,22961,JAM MAKING SET,24,12/1/2010 9:41,1.45,17809,United Kingdom\n"
+)
+
+def _plan_from(data: bytes, plan=None):
+    header, stream = peek_header(io.BytesIO(data), "ISO-8859-1")
+    observer = PlanObserver(plan)
+    stats = compute_stats_stream(stream, chunksize=2, on_chunk=observer.observe, read_options=plan_read_options(plan, header))
+    return header, stats, refine_plan(plan, header_fingerprint(header), header, observer.kinds)
+
+def test_peek_header_keeps_stream_intact():
+    header, stream = peek_header(io.BytesIO(CSV.encode()), "ISO-8859-1", block_size=16)
+    assert header[0] == "InvoiceNo" and len(header) == 8
+    assert stream.read() == CSV.encode()
+
+def test_plan_infers_kinds_and_reuses_them():
+    header, stats, plan = _plan_from(CSV.encode())
+    columns = plan["columns"]
+    assert columns["Quantity"]["kind"] == "int"
+    assert columns["UnitPrice"]["kind"] == "float"
+    assert columns["InvoiceDate"] == {"kind": "datetime", "format": "%m/%d/%Y %H:%M"}
+    assert columns["Country"]["kind"] == "category"
+
+    options = plan_read_options(plan, header)
+    assert options["parse_dates"] == ["InvoiceDate"]
+    # 고유값 지표 컬럼은 계획과 무관하게 고정 dtype
+    assert options["dtype"]["InvoiceNo"] == "object"
+
+    _, cached_stats, refined = _plan_from(CSV.encode(), plan)
+    assert cached_stats == stats
+    assert refined["files"] == 2
+
+def test_metrics_only_reads_required_columns():
+    header = CSV.splitlines()[0].split(",")
+    options = plan_read_options(None, header, metrics_only=True)
+    assert set(options["usecols"]) == {"InvoiceNo", "CustomerID", "Quantity", "UnitPrice"}
+    assert set(options["dtype"]) <= set(options["usecols"])
+
+def test_plan_widens_on_mismatch():
+    header, _, plan = _plan_from(CSV.encode())
+    with_missing = CSV.replace(",6,12/1/2010 8:28,", ",,12/1/2010 8:28,")
+    with pytest.raises(ValueError):
+        _plan_from(with_missing.encode(), plan)
+
+    _, stats, refined = _plan_from(with_missing.encode(), widen_plan(plan))
+    assert refined["columns"]["Quantity"]["kind"] == "float"
+    assert stats["total_quantity"] == pytest.approx(35)
@@ -0,0 +1,64 @@
+import io
+import shutil
+
+import numpy as np
+from PIL import Image
+
+from app.services.dataset_manifest import tee_images
+from app.services.training_shards import ShardWriter, make_dataset, write_calibration_images
+
+LABELS = ["good", "defect"]
+
+def _png(color, size=(40, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+def test_shards_round_trip_with_manifest(tmp_path):
+    uploaded = {}
+
+    def upload(local_path, key):
+        target = tmp_path / key.replace("/", "_")
+        shutil.copy(local_path, target)
+        uploaded[key] = str(target)
+
+    writer = ShardWriter("train/mvtec", LABELS, (8, 8), upload, shard_bytes=100, max_open=1)
+    members = [
+        ("bottle/train/good/0.png", io.BytesIO(_png((255, 0, 0)))),
+        ("bottle/train/defect/1.png", io.BytesIO(_png((0, 0, 255)))),
+        ("bottle/train/good/notes.txt", io.BytesIO(b"x")),
+        ("cable/train/good/2.png", io.BytesIO(_png((0, 255, 0)))),
+    ]
+    # tee 는 원본 바이트를 그대로 넘김
+    passed = [(name, stream.read()) for name, stream in tee_images(members, writer.add)]
+    assert [name for name, _ in passed] == [name for name, _ in members]
+    manifests = writer.close("20260101000000")
+
+    bottle = manifests["train/mvtec/bottle/train"]
+    # 같은 준비 단계의 파일 manifest 버전 (학습 측이 이전 샤드를 구분)
+    assert bottle["dataset_version"] == "20260101000000"
+    assert bottle["total"] == 2 and bottle["label_counts"] == {"good": 1, "defect": 1}
+    # shard_bytes 가 레코드 하나보다 작아 레코드마다 샤드가 나뉨
+    assert [s["key"] for s in bottle["shards"]] == [
+        "train/mvtec/bottle/train/_shards/shard-00000.tfrecord",
+        "train/mvtec/bottle/train/_shards/shard-00001.tfrecord",
+    ]
+    assert manifests["train/mvtec/cable/train"]["total"] == 1
+
+    paths = [uploaded[s["key"]] for s in bottle["shards"]]
+    records = sorted((int(label), image.numpy()) for image, label in make_dataset(paths, bottle, (8, 8)))
+    assert [label for label, _ in records] == [0, 1]
+    assert records[0][1].shape == (8, 8, 3)
+    np.testing.assert_allclose(records[0][1][0, 0], [1.0, 0.0, 0.0])
+    np.testing.assert_allclose(records[1][1][0, 0], [0.0, 0.0, 1.0])
+
+    # 경로 목록으로 분할에 속한 레코드만 선택
+    only_defect = make_dataset(paths, bottle, (8, 8), paths={"bottle/train/defect/1.png"})
+    assert [int(label) for _, label in only_defect] == [1]
+    assert list(make_dataset(paths, bottle, (8, 8), paths=set())) == []
+
+    # 보정/평가 이미지도 분할 경로 안에서만 고름
+    calib_paths, calib_labels = write_calibration_images(
+        paths, bottle, str(tmp_path / "calibration"), 10, paths={"bottle/train/good/0.png"}
+    )
+    assert len(calib_paths) == 1 and calib_labels == [0]
@@ -1,22 +1,65 @@
 import io
+import os
+import types
+
 import pytest
+
+# 모듈 수준 settings 에 필요한 환경 변수 (실제 값은 쓰지 않음)
+for _name in (
+    "SECRET_KEY", "DATABASE_URL", "OPENAI_API_KEY", "POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD",
+    "DJANGO_SECRET_KEY", "AWS_ACCESS_KEY", "AWS_SECRET_KEY", "BUCKET_NAME",
+    "RAW_FOLDER", "PROCESSED_FOLDER", "RAW_DATASET_FOLDER", "TRAINING_DATA_FOLDER",
+):
+    os.environ.setdefault(_name, "test")
+
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from app.main import app
 
+from app.routers import upload
+from app.services.model_registry import ModelWarming
+
+# lifespan(모델 로드, 배처) 없이 업로드 라우터만 올림
+app = FastAPI()
+app.include_router(upload.router)
 client = TestClient(app)
 
-def fake_predict_image(bytes_io):
-    return {"prediction":"normal","confidence":0.95}
+class _FakeRecords:
+    def create(self, **fields):
+        return types.SimpleNamespace(id=1, uploaded_at="2026-01-01T00:00:00", **fields)
+
+class _FakeRedis:
+    async def set(self, *args, **kwargs):
+        return True
 
 @pytest.fixture(autouse=True)
-def patch_predict(monkeypatch):
-    from app.services import data_service
-    monkeypatch.setattr(data_service, "predict_image", lambda f: {"prediction":"normal","confidence":0.99})
+def patch_backends(monkeypatch):
+    monkeypatch.setattr(upload, "UploadRecord", types.SimpleNamespace(objects=_FakeRecords()))
+    monkeypatch.setattr(upload, "redis_client_async", _FakeRedis())
 
-def test_upload_image_success(tmp_path):
+def _png_file():
     file_content = b"\x89PNG\r\n\x1a\n" + b"\x00" * 1000
-    files = {"file": ("test.png", io.BytesIO(file_content), "image/png")}
-    resp = client.post("/upload/image", files=files)
+    return {"file": ("test.png", io.BytesIO(file_content), "image/png")}
+
+def test_upload_image_success(monkeypatch):
+    calls = []
+
+    async def fake_predict_image_async(file_bytes, category):
+        calls.append((len(file_bytes), category))
+        return {"prediction": "normal", "confidence": 0.99}
+
+    monkeypatch.setattr(upload, "predict_image_async", fake_predict_image_async)
+    resp = client.post("/upload/image", files=_png_file())
     assert resp.status_code == 200
     data = resp.json()
     assert data["prediction"]["prediction"] == "normal"
+    assert calls == [(1008, upload.DEFAULT_CATEGORY)]
+
+def test_upload_image_while_model_warming(monkeypatch):
+    async def warming(file_bytes, category):
+        raise ModelWarming(category)
+
+    monkeypatch.setattr(upload, "predict_image_async", warming)
+    resp = client.post("/upload/image", files=_png_file())
+    assert resp.status_code == 503
+    assert resp.json()["detail"]["status"] == "warming"
+    assert "Retry-After" in resp.headers